@@ -0,0 +1,7 @@
+import os
+
+import django
+
+# 测试直接导入 read_for_you 下的模块（views 等依赖 Django 设置），在收集测试前初始化 Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'read_for_you.settings')
+django.setup()
@@ -1,48 +1,92 @@
 import os
 import traceback
-from typing import List, Dict, Union
-from azure.storage.blob import BlobServiceClient, BlobClient, generate_blob_sas, BlobSasPermissions
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError, ResourceNotModifiedError
+from azure.storage.blob import BlobServiceClient, BlobClient, BlobBlock, ContentSettings, generate_blob_sas, BlobSasPermissions
 from datetime import datetime, timedelta
 from io import BytesIO
 import asyncio
+from .HedgedReader import HedgedReader
+from .SingleFlight import SingleFlight
+from .DiskBlobCache import DiskBlobCache
+from .BlobNameIndex import BlobNameIndex
 from ..constants import (
 	AZURE_STORAGE_CONNECTION_STRING,
 	AZURE_STORAGE_CONTAINER_NAME,
 	AZURE_STORAGE_ACCOUNT_NAME,
 	AZURE_STORAGE_ACCOUNT_KEY,
+	BLOB_SAS_EXPIRY_MINUTES,
+	BLOB_DISK_CACHE_ENABLED,
+	BLOB_DISK_CACHE_DIR,
+	BLOB_DISK_CACHE_MAX_BYTES,
+	BLOB_DISK_CACHE_MAX_ITEM_BYTES,
+	BLOB_DISK_CACHE_TTL_RULES,
+	BLOB_DISK_CACHE_FILL_CONCURRENCY,
+	BLOB_NAME_INDEX_TTL_SECONDS,
+	BLOB_HEDGE_ENABLED,
+	BLOB_HEDGE_FIRST_CHUNK_BYTES,
+	BLOB_READ_TIMEOUT_SECONDS,
 )
 
 
 class AzureBlobService:
 	"""Azure Blob Storage 服务类"""
 
+	# 进程内共享：同一 blob 的并发下载只执行一次，其余调用等待并共享结果
+	_single_flight = SingleFlight()
+
+	# 节点内共享：书库内容（zbooksnap/）与识别结果（results_of_users/）缓存在本机磁盘，所有 worker 进程共用
+	_disk_cache = DiskBlobCache(
+		BLOB_DISK_CACHE_DIR if BLOB_DISK_CACHE_ENABLED else '',
+		BLOB_DISK_CACHE_MAX_BYTES,
+		BLOB_DISK_CACHE_MAX_ITEM_BYTES,
+		BLOB_DISK_CACHE_TTL_RULES,
+	)
+
+	# 磁盘缓存未命中时的后台填充：(blob 名称, ETag) 同时只有一个任务
+	_fill_executor = ThreadPoolExecutor(max_workers=BLOB_DISK_CACHE_FILL_CONCURRENCY, thread_name_prefix='blob-cache-fill')
+	_fills_in_flight = set()
+	_fill_lock = threading.Lock()
+
+	# 进程内共享：(前缀, 文件类型) -> blob 名称，命中时下载前不再列举前缀
+	_name_index = BlobNameIndex(BLOB_NAME_INDEX_TTL_SECONDS)
+
 	def __init__(self):
 		"""初始化 Azure Blob Storage 客户端"""
 		# 下载优化参数
 		self.download_concurrency = 8
 		self.max_chunk_get_size = 32 * 1024 * 1024
-		self.max_single_get_size = 1024 * 1024 * 1024
+		# 启用对冲读取时首个响应只取开头一段，对冲只重复这一段，其余部分分块并发下载
+		self.max_single_get_size = BLOB_HEDGE_FIRST_CHUNK_BYTES if BLOB_HEDGE_ENABLED else 1024 * 1024 * 1024
 		connection_string = AZURE_STORAGE_CONNECTION_STRING
 		if not connection_string:
 			raise ValueError("AZURE_STORAGE_CONNECTION_STRING 未配置，请在 constants.py 中设置")
 		self.connection_string = connection_string
+		client_options = {'max_single_get_size': BLOB_HEDGE_FIRST_CHUNK_BYTES} if BLOB_HEDGE_ENABLED else {}
 		self.blob_service_client = BlobServiceClient.from_connection_string(
-		    connection_string)
+		    connection_string, **client_options)
 		self.container_name = AZURE_STORAGE_CONTAINER_NAME
 		if not self.container_name:
 			raise ValueError("AZURE_STORAGE_CONTAINER_NAME 未配置，请在 constants.py 中设置")
+		# 下载请求超过延迟分位数仍未返回时发出对冲请求
+		self.hedged_reader = HedgedReader.get('AzureBlobService')
 
-	def _generate_blob_url_with_sas(self, blob_name: str, expiry_hours: int = 24) -> str:
-		"""生成带 SAS Token 的 Blob 访问 URL，默认有效期 24 小时。"""
+	def _generate_blob_url_with_sas(self, blob_name: str, expiry_hours: int = 24, expiry_minutes: int = None) -> str:
+		"""生成带 SAS Token 的 Blob 访问 URL，默认有效期 24 小时（指定 expiry_minutes 时按分钟计）。"""
 		try:
 			if AZURE_STORAGE_ACCOUNT_NAME and AZURE_STORAGE_ACCOUNT_KEY:
+				expiry = timedelta(minutes=expiry_minutes) if expiry_minutes else timedelta(hours=expiry_hours)
 				sas_token = generate_blob_sas(
 					account_name=AZURE_STORAGE_ACCOUNT_NAME,
 					container_name=self.container_name,
 					blob_name=blob_name,
 					account_key=AZURE_STORAGE_ACCOUNT_KEY,
 					permission=BlobSasPermissions(read=True),
-					expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
+					expiry=datetime.utcnow() + expiry
 				)
 				return f"https://{AZURE_STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{self.container_name}/{blob_name}?{sas_token}"
 			# 如果缺少账号信息，退化为直接返回公开 URL
@@ -56,40 +100,81 @@ class AzureBlobService:
 			    self.container_name)
 			return container_client.get_blob_client(blob_name).url
 
-	def downloadFile(self, prefix: str, file_type: str) -> Union[bytes, List[str]]:
+	def getReadUrl(self, blob_name: str) -> str:
+		"""生成短期（BLOB_SAS_EXPIRY_MINUTES 分钟）只读 SAS URL，浏览器可直接从 Blob Storage 下载"""
+		return self._generate_blob_url_with_sas(blob_name, expiry_minutes=BLOB_SAS_EXPIRY_MINUTES)
+
+	def findBlobName(self, prefix: str, file_type: str, verify: bool = False) -> str:
+		"""
+		在前缀下查找第一个以 file_type 结尾的 blob
+
+		优先使用名称索引（书籍列表与识别结果的固定布局），未命中时才列举前缀。
+		索引命中时默认不确认 blob 是否存在，后续读取返回 FileNotFoundError 时调用 refindBlobName；
+		名称直接生成 SAS URL 交给浏览器时传入 verify=True，先确认 blob 存在，不存在时列举前缀重新查找
+
+		返回:
+			str: blob 完整名称；不存在时抛出 FileNotFoundError
+		"""
+		blob_name = self._resolveBlobName(prefix, file_type)
+		if blob_name is None:
+			return self._listBlobName(prefix, file_type)
+		if not verify:
+			return blob_name
 		try:
-			container_client = self.blob_service_client.get_container_client(
-				self.container_name)
-			blob_list = container_client.list_blobs(name_starts_with=prefix)
-
-			for blob in blob_list:
-				blob_name = blob.name
-
-				if blob_name.lower().endswith(file_type.lower()):
-					blob_client = BlobClient.from_connection_string(
-						conn_str=self.connection_string,
-						container_name=self.container_name,
-						blob_name=blob_name,
-						max_single_get_size=self.max_single_get_size,
-						max_chunk_get_size=self.max_chunk_get_size,
-					)
-					# 仅 max_concurrency 可以放在 download_blob()
-					download_stream = blob_client.download_blob(
-						max_concurrency=self.download_concurrency
-					)
-
-					chunks = []
-					try:
-						for chunk in download_stream.chunks():
-							chunks.append(chunk)
-						file_data = b''.join(chunks)
-					finally:
-						del download_stream
-						del chunks
-
-					return file_data
-
-			raise FileNotFoundError(f"未找到符合条件的文件: prefix='{prefix}', type='{file_type}'")
+			self.getBlobProperties(blob_name)
+			return blob_name
+		except FileNotFoundError:
+			return self.refindBlobName(prefix, file_type)
+
+	def refindBlobName(self, prefix: str, file_type: str) -> str:
+		"""索引中的 blob 已不存在（被删除或改名）时丢弃该条目，列举前缀重新查找"""
+		self._name_index.discard(prefix, file_type)
+		return self._single_flight.do(
+			('listBlobName', prefix, file_type.lower()),
+			lambda: self._listBlobName(prefix, file_type),
+		)
+
+	def _resolveBlobName(self, prefix: str, file_type: str) -> Optional[str]:
+		"""查询名称索引，书库索引过期时先重新加载书籍列表；未命中返回 None"""
+		if self._name_index.needsRefresh():
+			self._single_flight.do(('refreshNameIndex',), self._refreshNameIndex)
+		return self._name_index.resolve(prefix, file_type)
+
+	def _refreshNameIndex(self) -> None:
+		try:
+			self._loadBooksMetadata()
+		except Exception as e:
+			self._name_index.markRefreshed()
+			print(f"⚠️ 加载书籍列表失败，Blob 名称索引暂不可用: {e}")
+
+	def _listBlobName(self, prefix: str, file_type: str) -> str:
+		"""列举前缀查找 blob，并将结果记入名称索引"""
+		container_client = self.blob_service_client.get_container_client(self.container_name)
+		for blob in container_client.list_blobs(name_starts_with=prefix):
+			if blob.name.lower().endswith(file_type.lower()):
+				self._name_index.add(prefix, file_type, blob.name)
+				return blob.name
+		raise FileNotFoundError(f"未找到符合条件的文件: prefix='{prefix}', type='{file_type}'")
+
+	def downloadFile(self, prefix: str, file_type: str) -> Union[bytes, mmap.mmap]:
+		"""
+		下载前缀下第一个以 file_type 结尾的文件
+
+		返回:
+			bytes，或磁盘缓存命中时的只读 mmap（不复制内容，调用方按块写出后 close）；
+			并发下载同一 blob 时合并为一次，调用方共享返回的 bytes，不应修改返回值
+		"""
+		try:
+			blob_name = self._resolveBlobName(prefix, file_type)
+			if blob_name is not None:
+				try:
+					return self._readBlob(blob_name, self._tunedBlobClient(blob_name))
+				except FileNotFoundError:
+					# 索引已过期（blob 被删除或改名），列举前缀重新查找
+					pass
+
+			blob_name = self.refindBlobName(prefix, file_type)
+			return self._readBlob(blob_name, self._tunedBlobClient(blob_name))
 
 		except Exception as e:
 			print(f"❌ downloadFile Error:")
@@ -97,6 +182,211 @@ class AzureBlobService:
 			print(f"   错误信息: {e}")
 			raise
 
+	def _tunedBlobClient(self, blob_name: str) -> BlobClient:
+		"""按下载优化参数创建 BlobClient（分块大小只能在创建客户端时设置，仅 max_concurrency 可以放在 download_blob()）"""
+		return BlobClient.from_connection_string(
+			conn_str=self.connection_string,
+			container_name=self.container_name,
+			blob_name=blob_name,
+			max_single_get_size=self.max_single_get_size,
+			max_chunk_get_size=self.max_chunk_get_size,
+		)
+
+	def downloadBlob(self, blob_name: str) -> bytes:
+		"""
+		按完整 blob 名称下载文件（调用方需要完整的 bytes，如解析 JSON；直接写出内容时使用 downloadFile）
+
+		参数:
+			blob_name: blob 完整路径，如 "results_of_users/abc/result.json"
+
+		返回:
+			bytes: 文件内容；blob 不存在时抛出 FileNotFoundError
+		"""
+		data = self._readBlob(blob_name, self.blob_service_client.get_blob_client(
+			container=self.container_name, blob=blob_name))
+		if isinstance(data, mmap.mmap):
+			with data:
+				return data[:]
+		return data
+
+	def _readBlob(self, blob_name: str, blob_client) -> Union[bytes, mmap.mmap]:
+		"""
+		读取 blob：磁盘缓存在 TTL 内直接返回只读 mmap（每个调用方各自打开，用完后 close）；
+		过期后按记录的 ETag 条件下载，未变化时不传输内容；其余情况下载并返回 bytes（并发下载同一 blob 只执行一次）
+		"""
+		cached = self._disk_cache.get(blob_name)
+		if cached is not None:
+			return cached
+
+		known_etag = self._disk_cache.etag(blob_name)
+		if known_etag:
+			file_data = self._single_flight.do(
+				('revalidateBlob', blob_name, known_etag),
+				lambda: self._fetchBlob(blob_name, blob_client, known_etag),
+			)
+			if file_data is not None:
+				return file_data
+			cached = self._disk_cache.get(blob_name, known_etag)
+			if cached is not None:
+				return cached
+			# 缓存文件已被淘汰，重新下载
+
+		return self._single_flight.do(
+			('downloadBlob', blob_name),
+			lambda: self._fetchBlob(blob_name, blob_client),
+		)
+
+	def _fetchBlob(self, blob_name: str, blob_client, if_none_match: Optional[str] = None) -> Optional[bytes]:
+		"""下载 blob 并写入磁盘缓存；给出 if_none_match 且内容未变化时返回 None"""
+		try:
+			if if_none_match:
+				download_stream = self.hedged_reader.run(lambda: blob_client.download_blob(
+					max_concurrency=self.download_concurrency, timeout=BLOB_READ_TIMEOUT_SECONDS,
+					etag=if_none_match, match_condition=MatchConditions.IfModified), blob_name)
+			else:
+				download_stream = self.hedged_reader.run(
+					lambda: blob_client.download_blob(
+						max_concurrency=self.download_concurrency, timeout=BLOB_READ_TIMEOUT_SECONDS), blob_name)
+			file_data = download_stream.readall()
+		except ResourceNotModifiedError:
+			return None
+		except ResourceNotFoundError:
+			raise FileNotFoundError(f"未找到文件: '{blob_name}'")
+
+		self._storeInDiskCache(blob_name, download_stream.properties.etag, file_data)
+		return file_data
+
+	def openCachedBlob(self, blob_name: str, etag: str, size: int) -> Optional[mmap.mmap]:
+		"""
+		从磁盘缓存读取 blob（ETag 需与 getBlobProperties 的结果一致），命中时返回只读 mmap，调用方用完后 close
+
+		未命中时返回 None，由调用方直接从 Blob Storage 读取所需的区间，不等待整个 blob 下载；
+		同时在后台整体下载写入缓存（同一版本同时只有一个后台任务），之后的请求从磁盘读取。
+		blob 不可缓存时返回 None
+		"""
+		if not self._disk_cache.cacheable(blob_name, size):
+			return None
+		cached = self._disk_cache.get(blob_name, etag)
+		if cached is None:
+			self._scheduleCacheFill(blob_name, etag, size)
+		return cached
+
+	def _scheduleCacheFill(self, blob_name: str, etag: str, size: int) -> None:
+		"""在后台线程中下载 blob 写入磁盘缓存；同一 (名称, ETag) 已有任务进行中时忽略"""
+		key = (blob_name, etag)
+		with self._fill_lock:
+			if key in self._fills_in_flight:
+				return
+			self._fills_in_flight.add(key)
+
+		blob_client = self.blob_service_client.get_blob_client(
+			container=self.container_name, blob=blob_name)
+
+		def fill():
+			try:
+				# 只接受与调用方所见版本一致的内容，避免旧 ETag 下存入新内容
+				download_stream = self.hedged_reader.run(lambda: blob_client.download_blob(
+					max_concurrency=self.download_concurrency, timeout=BLOB_READ_TIMEOUT_SECONDS,
+					etag=etag, match_condition=MatchConditions.IfNotModified), blob_name, size)
+				self._disk_cache.put(blob_name, etag, download_stream.readinto)
+			except (ResourceModifiedError, ResourceNotFoundError):
+				# 下载前 blob 已被修改或删除，下次请求按新版本重新填充
+				pass
+			except Exception as e:
+				print(f"⚠️ 写入 Blob 磁盘缓存失败: {blob_name}: {e}")
+			finally:
+				with self._fill_lock:
+					self._fills_in_flight.discard(key)
+
+		try:
+			self._fill_executor.submit(fill)
+		except RuntimeError:
+			# 进程退出时线程池已关闭
+			with self._fill_lock:
+				self._fills_in_flight.discard(key)
+
+	def _storeInDiskCache(self, blob_name: str, etag: str, data: bytes) -> None:
+		"""将已下载的内容写入磁盘缓存（不可缓存时忽略，写入失败只记录警告）"""
+		if not self._disk_cache.cacheable(blob_name, len(data)):
+			return
+		try:
+			self._disk_cache.put(blob_name, etag, lambda f: f.write(data))
+		except OSError as e:
+			print(f"⚠️ 写入 Blob 磁盘缓存失败: {blob_name}: {e}")
+
+	def getBlobProperties(self, blob_name: str) -> Dict:
+		"""
+		获取 blob 的大小、ETag、内容类型与最后修改时间
+
+		返回:
+			{'size': 字节数, 'etag': 'xxx', 'content_type': 'xxx', 'last_modified': datetime}；
+			blob 不存在时抛出 FileNotFoundError
+		"""
+		try:
+			blob_client = self.blob_service_client.get_blob_client(
+				container=self.container_name, blob=blob_name)
+			properties = blob_client.get_blob_properties()
+			return {
+				'size': properties.size,
+				'etag': properties.etag,
+				'content_type': properties.content_settings.content_type,
+				'last_modified': properties.last_modified,
+			}
+		except ResourceNotFoundError:
+			raise FileNotFoundError(f"未找到文件: '{blob_name}'")
+
+	def iterBlob(self, blob_name: str, offset: int = None, length: int = None):
+		"""
+		按块读取 blob（或其中 offset 起 length 字节的区间），返回 bytes 块的迭代器
+
+		只在迭代时逐块下载，不在内存中整体缓存；blob 不存在时抛出 FileNotFoundError
+		"""
+		try:
+			blob_client = self.blob_service_client.get_blob_client(
+				container=self.container_name, blob=blob_name)
+			return self.hedged_reader.run(
+				lambda: blob_client.download_blob(
+					offset=offset, length=length, timeout=BLOB_READ_TIMEOUT_SECONDS), blob_name, length).chunks()
+		except ResourceNotFoundError:
+			raise FileNotFoundError(f"未找到文件: '{blob_name}'")
+
+	def stageBlock(self, blob_name: str, block_id: str, data: bytes) -> None:
+		"""将一段数据暂存为块 blob 的未提交块"""
+		blob_client = self.blob_service_client.get_blob_client(
+			container=self.container_name, blob=blob_name)
+		blob_client.stage_block(block_id, data, length=len(data))
+
+	def getBlockIds(self, blob_name: str) -> Tuple[List[str], List[str]]:
+		"""获取块 blob 已提交与未提交的块 ID；blob 不存在时返回两个空列表"""
+		try:
+			blob_client = self.blob_service_client.get_blob_client(
+				container=self.container_name, blob=blob_name)
+			committed, uncommitted = blob_client.get_block_list('all')
+			return [block.id for block in committed], [block.id for block in uncommitted]
+		except ResourceNotFoundError:
+			return [], []
+
+	def commitBlocks(self, blob_name: str, block_ids: List[str], content_type: str = None) -> None:
+		"""按顺序提交已暂存的块，生成完整的 blob"""
+		blob_client = self.blob_service_client.get_blob_client(
+			container=self.container_name, blob=blob_name)
+		blob_client.commit_block_list(
+			[BlobBlock(block_id=block_id) for block_id in block_ids],
+			content_settings=ContentSettings(content_type=content_type) if content_type else None)
+
+	def deleteBlob(self, blob_name: str) -> bool:
+		"""删除 blob，不存在时视为成功"""
+		try:
+			blob_client = self.blob_service_client.get_blob_client(
+				container=self.container_name, blob=blob_name)
+			blob_client.delete_blob()
+			return True
+		except ResourceNotFoundError:
+			return True
+		except Exception as e:
+			print(f"⚠️ deleteBlob Error: {blob_name} - {e}")
+			return False
+
 	def download_meta_data(self):
 		"""
 		下载书籍元数据，并为每本书注入带 SAS Token 的封面图片 URL。
@@ -117,13 +407,7 @@ class AzureBlobService:
 			]
 		}
 		"""
-		container_client = self.blob_service_client.get_container_client(self.container_name)
-		blob_client = container_client.get_blob_client('metadata/books_list.json')
-		download_stream = blob_client.download_blob()
-		file_data = download_stream.readall()
-
-		import json
-		books_metadata = json.loads(file_data.decode('utf-8'))
+		books_metadata = self._loadBooksMetadata()
 
 		# 为每本书注入带 SAS Token 的封面图片 URL
 		for book in books_metadata:
@@ -143,6 +427,22 @@ class AzureBlobService:
 			'data': books_metadata
 		}
 
+	def _loadBooksMetadata(self) -> List[Dict]:
+		"""下载并解析 metadata/books_list.json，同时重建 Blob 名称索引"""
+		container_client = self.blob_service_client.get_container_client(self.container_name)
+		blob_client = container_client.get_blob_client('metadata/books_list.json')
+		# 只合并下载，解析与注入 SAS 由每个调用方各自完成，避免共享同一份可变数据
+		file_data = self._single_flight.do(
+			('downloadBlob', 'metadata/books_list.json'),
+			lambda: self.hedged_reader.run(
+				lambda: blob_client.download_blob(timeout=BLOB_READ_TIMEOUT_SECONDS), 'metadata/books_list.json').readall(),
+		)
+
+		import json
+		books_metadata = json.loads(file_data.decode('utf-8'))
+		self._name_index.loadBooks(books_metadata)
+		return books_metadata
+
 	# def downloadFile(self, info):
 	# 	"""
 	# 	根据 info 字典下载文件并返回统一格式的 JSON。
@@ -231,22 +531,15 @@ class AzureBlobService:
 			# 拼接完整的 blob 路径
 			blob_name = prefix.rstrip('/') + '/' + file_name
 			
-			# 读取文件数据
-			if hasattr(file, 'read'):
-				file_data = file.read()
-				# 重置文件指针（如果需要再次读取）
-				if hasattr(file, 'seek'):
-					file.seek(0)
-			else:
-				# 如果是 bytes 类型
-				file_data = file
-			
 			# 获取 blob client
 			container_client = self.blob_service_client.get_container_client(self.container_name)
 			blob_client = container_client.get_blob_client(blob_name)
 			
-			# 上传文件
-			blob_client.upload_blob(file_data, overwrite=True)
+			# 上传文件（文件对象按块流式上传，不整体读入内存）
+			blob_client.upload_blob(file, overwrite=True)
+			# 重置文件指针（如果需要再次读取）
+			if hasattr(file, 'seek'):
+				file.seek(0)
 			
 			print(f"✅ 文件上传成功: {blob_name}")
 			return True
@@ -1,26 +1,59 @@
 import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
 from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
+from .HedgedReader import HedgedReader
+from .LRUCache import LRUCache
+from .SingleFlight import SingleFlight
 from ..constants import (
     AZURE_BLOB_ACCOUNT_URL2,
     AZURE_STORAGE_ACCOUNT_NAME2,
     AZURE_STORAGE_CONTAINER_NAME2,
+    IMAGE_CACHE_MAX_BYTES,
+    IMAGE_CACHE_MAX_ITEM_BYTES,
+    IMAGE_CACHE_TTL_SECONDS,
+    IMAGE_BATCH_CONCURRENCY,
+    BLOB_HEDGE_ENABLED,
+    BLOB_HEDGE_FIRST_CHUNK_BYTES,
+    BLOB_READ_TIMEOUT_SECONDS,
 )
 
 
 class AzureBlobService2:
     """Azure Blob Storage 服务类（第二个存储账户）"""
 
+    # 进程内共享：DefaultAzureCredential 获取令牌与建立连接的开销较大，所有实例复用同一个客户端
+    _shared_client = None
+    _client_lock = threading.Lock()
+
+    # 热点图片的进程内 LRU 缓存：blob 名称 -> ({'data', 'mime_type', 'etag'}, 上次确认版本的时间)
+    # 超过 IMAGE_CACHE_TTL_SECONDS 的条目在命中时先条件下载确认版本
+    _image_cache = LRUCache(IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MAX_ITEM_BYTES)
+
+    # 缓存未命中时，同一图片的并发下载只执行一次，其余调用等待并共享结果
+    _single_flight = SingleFlight()
+
     def __init__(self):
         account_name = AZURE_STORAGE_ACCOUNT_NAME2
         account_url = AZURE_BLOB_ACCOUNT_URL2
         if not account_name or not account_url:
             raise ValueError(
                 "Azure Blob Storage 2 认证信息未配置。请在 constants.py 文件中设置 AZURE_STORAGE_ACCOUNT_NAME2 与 AZURE_BLOB_ACCOUNT_URL2")
-        credential = DefaultAzureCredential()
-        self.blob_service_client = BlobServiceClient(
-            account_url, credential=credential)
+        with AzureBlobService2._client_lock:
+            if AzureBlobService2._shared_client is None:
+                # 启用对冲读取时首个响应只取开头一段，测得的延迟是首字节时间
+                client_options = {'max_single_get_size': BLOB_HEDGE_FIRST_CHUNK_BYTES} if BLOB_HEDGE_ENABLED else {}
+                AzureBlobService2._shared_client = BlobServiceClient(
+                    account_url, credential=DefaultAzureCredential(), **client_options)
+        self.blob_service_client = AzureBlobService2._shared_client
+        # 下载请求超过延迟分位数仍未返回时发出对冲请求
+        self.hedged_reader = HedgedReader.get('AzureBlobService2')
 
         # 获取容器名称
         self.container_name = AZURE_STORAGE_CONTAINER_NAME2
@@ -39,51 +72,105 @@ class AzureBlobService2:
             str: 图片的 base64 编码字符串，格式为 "data:image/[type];base64,..."
         """
         try:
-            # 从 URL 中提取 blob 名称
-            # 支持完整 URL 或相对路径
-            blob_name = self._extract_blob_name(image_url)
-
-            # 获取容器客户端
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name)
-
-            import time
-            start_time = time.time()
-            download_stream = blob_client.download_blob(max_concurrency=4)
-            api_time = time.time() - start_time
-
-            chunk_start = time.time()
-            # 使用chunks()迭代器增量读取，避免内存积压
-            chunks = []
-            try:
-                for chunk in download_stream.chunks():
-                    chunks.append(chunk)
-                image_bytes = b''.join(chunks)
-            finally:
-                # 显式释放下载流资源
-                del download_stream
-                del chunks
-            chunk_time = time.time() - chunk_start
-            total_time = time.time() - start_time
+            image = self.downloadImage(image_url)
+
+            # 转换为 base64，添加 data URL 前缀
+            base64_str = base64.b64encode(image['data']).decode('utf-8')
+            return f"data:{image['mime_type']};base64,{base64_str}"
 
-            print(
-                f"⏱️ Blob下载耗时: API调用 {api_time:.3f}s, 数据读取 {chunk_time:.3f}s, 总计 {total_time:.3f}s - {blob_name}"
-            )
+        except Exception as e:
+            raise Exception(f"下载图片失败: {str(e)}")
 
-            # 根据文件扩展名确定 MIME 类型
-            mime_type = self._get_mime_type(blob_name)
+    def downloadImage(self, image_url: str, if_none_match: Optional[str] = None) -> Optional[Dict]:
+        """
+        根据图片 URL 下载图片原始内容（优先读取进程内 LRU 缓存，超过 IMAGE_CACHE_TTL_SECONDS 的条目先确认版本）
 
-            # 转换为 base64
-            base64_str = base64.b64encode(image_bytes).decode('utf-8')
+        参数:
+            image_url: 图片的 URL（完整 URL 或相对路径）
+            if_none_match: 客户端已缓存版本的 ETag（可选）；与当前版本相同时不传输图片内容
 
-            # 添加 data URL 前缀
-            data_url = f"data:{mime_type};base64,{base64_str}"
+        返回:
+            {'data': bytes, 'mime_type': 'image/xxx', 'etag': '"0x..."'}；
+            if_none_match 与当前版本相同时返回 {'data': None, 'mime_type': ..., 'etag': ...}；
+            blob 不存在时抛出 FileNotFoundError
+        """
+        blob_name = self._extract_blob_name(image_url)
+        mime_type = self._get_mime_type(blob_name)
+
+        cached = self._image_cache.get(blob_name)
+        if cached is not None:
+            image, checked_at = cached
+            if time.monotonic() - checked_at > IMAGE_CACHE_TTL_SECONDS:
+                image = self._single_flight.do(
+                    ('revalidate', blob_name),
+                    lambda: self._revalidateImage(blob_name, mime_type, image),
+                )
+            if if_none_match and image['etag'] == if_none_match:
+                return {'data': None, 'mime_type': mime_type, 'etag': image['etag']}
+            return image
+
+        return self._single_flight.do(
+            (blob_name, if_none_match),
+            lambda: self._fetchImage(blob_name, mime_type, if_none_match),
+        )
+
+    def _fetchImage(self, blob_name: str, mime_type: str, if_none_match: Optional[str]) -> Dict:
+        """从 Blob Storage 下载图片并写入 LRU 缓存"""
+        blob_client = self.blob_service_client.get_blob_client(
+            container=self.container_name,
+            blob=blob_name)
+        try:
+            if if_none_match:
+                # 条件下载：版本未变化时 Blob Storage 返回 304，不传输内容
+                download_stream = self.hedged_reader.run(lambda: blob_client.download_blob(
+                    max_concurrency=4, timeout=BLOB_READ_TIMEOUT_SECONDS,
+                    etag=if_none_match, match_condition=MatchConditions.IfModified), blob_name)
+            else:
+                download_stream = self.hedged_reader.run(lambda: blob_client.download_blob(
+                    max_concurrency=4, timeout=BLOB_READ_TIMEOUT_SECONDS), blob_name)
+        except ResourceNotModifiedError:
+            return {'data': None, 'mime_type': mime_type, 'etag': if_none_match}
+        except ResourceNotFoundError:
+            self._image_cache.discard(blob_name)
+            raise FileNotFoundError(f"未找到图片: '{blob_name}'")
+
+        image = {'data': download_stream.readall(), 'mime_type': mime_type, 'etag': download_stream.properties.etag}
+        self._image_cache.put(blob_name, (image, time.monotonic()), len(image['data']))
+        return image
+
+    def _revalidateImage(self, blob_name: str, mime_type: str, image: Dict) -> Dict:
+        """用缓存条目的 ETag 条件下载：版本未变化时续期并返回缓存内容，已变化时返回（并缓存）新内容"""
+        fetched = self._fetchImage(blob_name, mime_type, image['etag'])
+        if fetched['data'] is not None:
+            return fetched
+        self._image_cache.put(blob_name, (image, time.monotonic()), len(image['data']))
+        return image
+
+    def downloadImages(self, image_urls: List[str], concurrency: int = IMAGE_BATCH_CONCURRENCY) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+        """
+        以有限并发批量下载图片（共享同一个客户端与 LRU 缓存），按完成顺序逐个产出
 
-            return data_url
+        参数:
+            image_urls: 图片 URL 列表（重复的 URL 只下载一次）
+            concurrency: 最大并发下载数
 
-        except Exception as e:
-            raise Exception(f"下载图片失败: {str(e)}")
+        返回:
+            迭代器，每项为 (image_url, 图片 dict 或 None, 异常或 None)
+        """
+        image_urls = list(dict.fromkeys(image_urls))
+        if not image_urls:
+            return
+        executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(image_urls))))
+        try:
+            futures = {executor.submit(self.downloadImage, image_url): image_url for image_url in image_urls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            # 客户端中途断开时生成器被关闭，取消尚未开始的下载
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def _extract_blob_name(self, image_url: str) -> str:
         """
@@ -0,0 +1,95 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class BlobFile(io.RawIOBase):
+	"""
+	按需分块读取 blob 的只读文件对象（可 seek），PDF 引擎可以直接解析存储在 Blob Storage 中的文件
+
+	PDF 引擎先读取文件末尾的交叉引用表，之后只读取用到的对象：内容按 BLOCK_SIZE 对齐的区间下载，
+	最近使用的 MAX_BLOCKS 个块保留在内存中，只裁剪少数页面时不必下载整个文件。
+	通常通过 BlobFile.open() 使用（外层加 BufferedReader，逐字节读取时不必每次进入 Python 层）。
+	"""
+
+	BLOCK_SIZE = 1024 * 1024
+	MAX_BLOCKS = 32
+
+	def __init__(self, blob_service, blob_name: str, size: Optional[int] = None, name: str = ''):
+		"""
+		参数:
+			blob_service: AzureBlobService 实例
+			blob_name: blob 完整名称
+			size: blob 大小（可选），未给出时查询 blob 属性；blob 不存在时抛出 FileNotFoundError
+			name: 文件名（可选），默认为 blob 名称的最后一段
+		"""
+		super().__init__()
+		self.blob_service = blob_service
+		self.blob_name = blob_name
+		self.size = size if size is not None else blob_service.getBlobProperties(blob_name)['size']
+		self.name = name or blob_name.rsplit('/', 1)[-1]
+		self._position = 0
+		self._blocks = OrderedDict()
+		self._lock = threading.Lock()
+
+	@classmethod
+	def open(cls, blob_service, blob_name: str, size: Optional[int] = None, name: str = '') -> io.BufferedReader:
+		"""返回带缓冲的只读文件对象，原始的 BlobFile 可通过 .raw 取得"""
+		return io.BufferedReader(cls(blob_service, blob_name, size, name), buffer_size=64 * 1024)
+
+	def readable(self) -> bool:
+		return True
+
+	def seekable(self) -> bool:
+		return True
+
+	def tell(self) -> int:
+		return self._position
+
+	def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+		if whence == os.SEEK_SET:
+			position = offset
+		elif whence == os.SEEK_CUR:
+			position = self._position + offset
+		elif whence == os.SEEK_END:
+			position = self.size + offset
+		else:
+			raise ValueError(f"无效的 whence: {whence}")
+		if position < 0:
+			raise ValueError(f"无效的偏移量: {position}")
+		self._position = position
+		return position
+
+	def readinto(self, buffer) -> int:
+		if self._position >= self.size:
+			return 0
+		index, start = divmod(self._position, self.BLOCK_SIZE)
+		data = self._block(index)[start:start + len(buffer)]
+		buffer[:len(data)] = data
+		self._position += len(data)
+		return len(data)
+
+	def _block(self, index: int) -> memoryview:
+		with self._lock:
+			block = self._blocks.get(index)
+			if block is not None:
+				self._blocks.move_to_end(index)
+				return block
+
+		offset = index * self.BLOCK_SIZE
+		length = min(self.BLOCK_SIZE, self.size - offset)
+		block = memoryview(b''.join(self.blob_service.iterBlob(self.blob_name, offset=offset, length=length)))
+		if len(block) != length:
+			raise IOError(f"读取 blob 区间不完整: {self.blob_name} [{offset}, {offset + length})")
+
+		with self._lock:
+			self._blocks[index] = block
+			while len(self._blocks) > self.MAX_BLOCKS:
+				self._blocks.popitem(last=False)
+		return block
+
+	def close(self) -> None:
+		self._blocks.clear()
+		super().close()
@@ -0,0 +1,95 @@
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class BlobNameIndex:
+	"""
+	(前缀, 文件类型) -> blob 名称 的解析索引，下载前无需再用 list_blobs 查找文件名
+
+	- 书库（zbooksnap/<id>/）：由 metadata/books_list.json 的 book_prefix、all_files（pdf_file）生成，
+	  取 all_files 中第一个以该类型结尾的文件，与按前缀列举时的结果一致
+	- 识别结果（results_of_users/<id>/）：按固定布局解析为 result.pdf / result.json，不需要索引
+	- 其他前缀列举得到的结果由调用方 add() 记入索引
+
+	书库索引超过 ttl 秒后需要重新加载（needsRefresh()），重新加载时列举记入的条目一并清除。
+	"""
+
+	RESULT_PREFIX_PATTERN = re.compile(r'^results_of_users/[^/]+/?$')
+	RESULT_FILE_TYPES = ('pdf', 'json')
+
+	def __init__(self, ttl: float):
+		self.ttl = ttl
+		self._entries: Dict[Tuple[str, str], str] = {}
+		self._loaded_at = None
+		self._hits = 0
+		self._misses = 0
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def _key(prefix: str, file_type: str) -> Tuple[str, str]:
+		return prefix, file_type.lower()
+
+	def resolve(self, prefix: str, file_type: str) -> Optional[str]:
+		"""返回 blob 名称；索引中没有时返回 None（由调用方列举）"""
+		result_type = file_type.lower().lstrip('.')
+		if result_type in self.RESULT_FILE_TYPES and self.RESULT_PREFIX_PATTERN.match(prefix):
+			with self._lock:
+				self._hits += 1
+			return f"{prefix.rstrip('/')}/result.{result_type}"
+
+		with self._lock:
+			blob_name = self._entries.get(self._key(prefix, file_type))
+			if blob_name is None:
+				self._misses += 1
+			else:
+				self._hits += 1
+			return blob_name
+
+	def add(self, prefix: str, file_type: str, blob_name: str) -> None:
+		with self._lock:
+			self._entries[self._key(prefix, file_type)] = blob_name
+
+	def discard(self, prefix: str, file_type: str) -> None:
+		"""移除失效的条目（如 blob 已被删除或改名）"""
+		with self._lock:
+			self._entries.pop(self._key(prefix, file_type), None)
+
+	def needsRefresh(self) -> bool:
+		with self._lock:
+			return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+	def markRefreshed(self) -> None:
+		"""加载失败时也记录时间，避免每次未命中都重新下载书籍列表"""
+		with self._lock:
+			self._loaded_at = time.monotonic()
+
+	def loadBooks(self, books: List[Dict]) -> int:
+		"""
+		用 books_list.json 的内容重建书库索引
+
+		返回:
+			int: 索引条目数
+		"""
+		entries = {}
+		for book in books:
+			book_prefix = book.get('book_prefix') or ''
+			if not book_prefix:
+				continue
+			base = book_prefix.rstrip('/') + '/'
+			files = book.get('all_files') or [name for name in (book.get('pdf_file'), book.get('cover_file')) if name]
+			for file_name in files:
+				extension = file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ''
+				# 同一类型只保留第一个文件（与列举结果一致）
+				if extension and (book_prefix, extension) not in entries:
+					entries[(book_prefix, extension)] = base + file_name
+
+		with self._lock:
+			self._entries = entries
+			self._loaded_at = time.monotonic()
+		return len(entries)
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {'entries': len(self._entries), 'hits': self._hits, 'misses': self._misses}
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _parse_ttl_rules(rules: str) -> List[Tuple[str, float]]:
+	"""解析 "前缀=秒数,前缀=秒数" 形式的 TTL 规则，按前缀长度降序（最长前缀优先匹配）"""
+	parsed = []
+	for rule in (rules or '').split(','):
+		prefix, _, seconds = rule.strip().partition('=')
+		if prefix and seconds:
+			try:
+				parsed.append((prefix.strip(), float(seconds)))
+			except ValueError:
+				print(f"⚠️ 忽略无效的 Blob 磁盘缓存 TTL 规则: '{rule}'")
+	return sorted(parsed, key=lambda rule: len(rule[0]), reverse=True)
+
+
+class DiskBlobCache:
+	"""
+	本机磁盘上的 blob 缓存，同一节点的所有 worker 进程共享同一个目录
+
+	- 以 blob 名称与 ETag 为键：数据文件为 <hash(名称)>-<hash(ETag)>.blob，
+	  <hash(名称)>.json 记录该 blob 当前的 ETag 与最近一次确认 ETag 仍有效的时间
+	- 先写临时文件再 os.replace，其他进程只会看到完整的文件
+	- 命中时返回只读 mmap，内容直接由页缓存提供，不读入进程内存
+	- 命中时更新数据文件的 mtime；写入后按 mtime 淘汰最久未使用的文件，使总大小不超过 max_bytes
+	- 只缓存匹配 TTL 规则前缀的 blob；不带 ETag 查找时，距上次确认不超过该前缀的 TTL 才算命中
+	"""
+
+	# 崩溃的 worker 遗留的临时文件超过该时间后在淘汰时清理
+	_STALE_TMP_SECONDS = 3600
+
+	def __init__(self, directory: str, max_bytes: int, max_item_bytes: int, ttl_rules: str):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.max_item_bytes = min(max_item_bytes, max_bytes)
+		self.rules = _parse_ttl_rules(ttl_rules)
+		self.enabled = bool(directory) and max_bytes > 0 and bool(self.rules)
+		self._ready = False
+		self._hits = 0
+		self._misses = 0
+		self._writes = 0
+		self._evictions = 0
+		self._lock = threading.Lock()
+
+	def ttl(self, blob_name: str) -> Optional[float]:
+		"""blob 所属前缀的 TTL（秒），不匹配任何规则时返回 None"""
+		for prefix, seconds in self.rules:
+			if blob_name.startswith(prefix):
+				return seconds
+		return None
+
+	def cacheable(self, blob_name: str, size: int = None) -> bool:
+		"""blob 是否可以缓存（匹配 TTL 规则，且给出 size 时不为空、不超过单个文件上限）"""
+		if not self.enabled or self.ttl(blob_name) is None:
+			return False
+		return size is None or 0 < size <= self.max_item_bytes
+
+	def get(self, blob_name: str, etag: str = None) -> Optional[mmap.mmap]:
+		"""
+		读取缓存，返回只读 mmap（调用方用完后 close），未命中返回 None
+
+		参数:
+			blob_name: blob 完整名称
+			etag: 已知的当前 ETag（可选）；给出时按 (名称, ETag) 精确匹配并刷新确认时间，
+			      未给出时使用记录的 ETag，且仅在 TTL 内视为命中
+		"""
+		if not self.cacheable(blob_name) or not self._ensure_directory():
+			return None
+
+		meta = self._read_meta(blob_name)
+		if etag is None:
+			if meta is None or time.time() - meta['validated_at'] > self.ttl(blob_name):
+				return self._miss()
+			data_file = meta['file']
+		else:
+			data_file = self._data_file(blob_name, etag)
+
+		content = self._open(data_file)
+		if content is None:
+			return self._miss()
+
+		if etag is not None and (meta is None or meta['file'] != data_file
+				or time.time() - meta['validated_at'] > self.ttl(blob_name) / 2):
+			self._write_meta(blob_name, etag, data_file)
+		with self._lock:
+			self._hits += 1
+		return content
+
+	def etag(self, blob_name: str) -> Optional[str]:
+		"""缓存中记录的 ETag（不论是否过期），可用于条件下载；没有记录时返回 None"""
+		if not self.cacheable(blob_name) or not self._ensure_directory():
+			return None
+		meta = self._read_meta(blob_name)
+		return meta['etag'] if meta else None
+
+	def put(self, blob_name: str, etag: str, write: Callable[[Any], Any]) -> bool:
+		"""
+		写入缓存
+
+		参数:
+			blob_name: blob 完整名称
+			etag: 内容对应的 ETag
+			write: 接收可写文件对象的函数，将内容写入其中（如 lambda f: f.write(data)）
+
+		返回:
+			bool: 是否已写入（blob 不可缓存时返回 False，不调用 write）；
+			写入过程中的异常（包括 write 抛出的）会在清理临时文件后继续抛出
+		"""
+		if not self.cacheable(blob_name) or not etag or not self._ensure_directory():
+			return False
+
+		data_file = self._data_file(blob_name, etag)
+		fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				write(f)
+			os.replace(tmp_path, os.path.join(self.directory, data_file))
+		except BaseException:
+			self._remove(tmp_path)
+			raise
+
+		# 同一 blob 只保留最新版本
+		previous = self._read_meta(blob_name)
+		self._write_meta(blob_name, etag, data_file)
+		if previous and previous['file'] != data_file:
+			self._remove(os.path.join(self.directory, previous['file']))
+
+		with self._lock:
+			self._writes += 1
+		self._evict()
+		return True
+
+	def stats(self) -> Dict[str, Any]:
+		"""命中与写入次数为本进程的统计，条目数与字节数为整个缓存目录的统计"""
+		entries, total = 0, 0
+		if self.enabled and self._ready:
+			for entry in self._scan():
+				entries += 1
+				total += entry[1]
+		with self._lock:
+			return {
+				'enabled': self.enabled,
+				'entries': entries,
+				'bytes': total,
+				'hits': self._hits,
+				'misses': self._misses,
+				'writes': self._writes,
+				'evictions': self._evictions,
+			}
+
+	def _ensure_directory(self) -> bool:
+		if self._ready:
+			return True
+		with self._lock:
+			if not self._ready and self.enabled:
+				try:
+					os.makedirs(self.directory, exist_ok=True)
+					self._ready = True
+				except OSError as e:
+					print(f"⚠️ 无法创建 Blob 磁盘缓存目录 {self.directory}: {e}，已停用磁盘缓存")
+					self.enabled = False
+		return self._ready
+
+	def _miss(self) -> None:
+		with self._lock:
+			self._misses += 1
+		return None
+
+	@staticmethod
+	def _digest(value: str) -> str:
+		return hashlib.sha256(value.encode('utf-8')).hexdigest()[:32]
+
+	def _data_file(self, blob_name: str, etag: str) -> str:
+		return f"{self._digest(blob_name)}-{self._digest(etag)}.blob"
+
+	def _meta_path(self, blob_name: str) -> str:
+		return os.path.join(self.directory, f"{self._digest(blob_name)}.json")
+
+	def _read_meta(self, blob_name: str) -> Optional[Dict]:
+		try:
+			with open(self._meta_path(blob_name), 'r', encoding='utf-8') as f:
+				meta = json.load(f)
+		except (OSError, ValueError):
+			return None
+		return meta if meta.get('blob_name') == blob_name else None
+
+	def _write_meta(self, blob_name: str, etag: str, data_file: str) -> None:
+		meta = {'blob_name': blob_name, 'etag': etag, 'file': data_file, 'validated_at': time.time()}
+		try:
+			fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				json.dump(meta, f, ensure_ascii=False)
+			os.replace(tmp_path, self._meta_path(blob_name))
+		except OSError as e:
+			print(f"⚠️ 写入 Blob 磁盘缓存记录失败: {blob_name}: {e}")
+
+	def _open(self, data_file: str) -> Optional[mmap.mmap]:
+		path = os.path.join(self.directory, data_file)
+		try:
+			with open(path, 'rb') as f:
+				if os.fstat(f.fileno()).st_size == 0:
+					return None
+				content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+			# mtime 作为跨进程共享的最近使用时间
+			os.utime(path)
+		except FileNotFoundError:
+			# 被其他进程淘汰
+			return None
+		except OSError as e:
+			print(f"⚠️ 读取 Blob 磁盘缓存失败: {path}: {e}")
+			return None
+		return content
+
+	def _scan(self) -> List[Tuple[float, int, str]]:
+		"""返回缓存目录中全部数据文件的 (mtime, 大小, 文件名)，顺带清理过期的临时文件"""
+		entries = []
+		now = time.time()
+		try:
+			with os.scandir(self.directory) as iterator:
+				for entry in iterator:
+					try:
+						stat = entry.stat()
+					except FileNotFoundError:
+						continue
+					if entry.name.endswith('.blob'):
+						entries.append((stat.st_mtime, stat.st_size, entry.name))
+					elif entry.name.endswith('.tmp') and now - stat.st_mtime > self._STALE_TMP_SECONDS:
+						self._remove(entry.path)
+		except OSError as e:
+			print(f"⚠️ 扫描 Blob 磁盘缓存目录失败: {e}")
+		return entries
+
+	def _evict(self) -> None:
+		"""按 mtime 从旧到新删除数据文件，直到总大小不超过 max_bytes"""
+		entries = self._scan()
+		total = sum(size for _, size, _ in entries)
+		if total <= self.max_bytes:
+			return
+		evicted = 0
+		for _, size, name in sorted(entries):
+			if total <= self.max_bytes:
+				break
+			if self._remove(os.path.join(self.directory, name)):
+				evicted += 1
+			total -= size
+			# 记录仍指向被淘汰的文件时一并删除
+			meta_path = os.path.join(self.directory, f"{name.split('-', 1)[0]}.json")
+			try:
+				with open(meta_path, 'r', encoding='utf-8') as f:
+					if json.load(f).get('file') == name:
+						self._remove(meta_path)
+			except (OSError, ValueError):
+				pass
+		with self._lock:
+			self._evictions += evicted
+
+	@staticmethod
+	def _remove(path: str) -> bool:
+		try:
+			os.remove(path)
+			return True
+		except FileNotFoundError:
+			return False
+		except OSError as e:
+			print(f"⚠️ 删除 Blob 磁盘缓存文件失败: {path}: {e}")
+			return False
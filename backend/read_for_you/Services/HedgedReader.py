@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Any, Callable, Dict, Optional
+from ..constants import (
+	BLOB_HEDGE_ENABLED,
+	BLOB_HEDGE_PERCENTILE,
+	BLOB_HEDGE_INITIAL_DELAY_MS,
+	BLOB_HEDGE_MIN_DELAY_MS,
+	BLOB_HEDGE_MAX_EXTRA_RATIO,
+	BLOB_HEDGE_WINDOW,
+	BLOB_HEDGE_MAX_WORKERS,
+	BLOB_HEDGE_FIRST_CHUNK_BYTES,
+	BLOB_READ_TIMEOUT_SECONDS,
+)
+
+
+class HedgedReader:
+	"""
+	对冲读取：降低 Blob 读取的长尾延迟
+
+	首个请求在阈值时间内没有返回时，再发出一个相同的请求，两者中先成功的结果胜出，另一个的结果被丢弃。
+	download_blob() 返回即已收到首个响应；客户端的 max_single_get_size 设为 BLOB_HEDGE_FIRST_CHUNK_BYTES，
+	首个响应只包含开头的一段数据，测得的延迟是首字节时间，对冲也只重复这一段，其余部分在返回后分块下载。
+
+	- 延迟从读取函数在线程池中真正开始执行时计时，不含排队时间
+	- 首个响应的大小不同，延迟分布也不同：按大小分档（SIZE_CLASSES）分别保留最近 BLOB_HEDGE_WINDOW 个样本，
+	  阈值取对应分档的 BLOB_HEDGE_PERCENTILE 分位数；样本不足时使用 BLOB_HEDGE_INITIAL_DELAY_MS，
+	  且不低于 BLOB_HEDGE_MIN_DELAY_MS。调用方不知道大小时，取样本充足的各分档阈值中的最大值
+	- 额外请求量用令牌桶限制：每个首个请求积累 BLOB_HEDGE_MAX_EXTRA_RATIO 个令牌，
+	  每个对冲请求消耗 1 个，长期对冲比例不超过该值
+	- 线程池繁忙、读取在阈值的 _QUEUE_WAIT_FACTOR 倍时间内仍未开始时，取消排队的请求，在调用线程中直接读取（不对冲）
+	- 等待结果不超过 BLOB_READ_TIMEOUT_SECONDS（读取函数应把同一超时传给 download_blob），超过时抛出 TimeoutError
+	- 每个存储账户一个实例（HedgedReader.get(name)），统计信息由 stats() / allStats() 提供
+	"""
+
+	_MIN_SAMPLES = 20
+	_QUEUE_WAIT_FACTOR = 4
+	_MAX_TOKENS = 10.0
+
+	# 首个响应大小的分档上限（字节），最后一档为其余大小
+	SIZE_CLASSES = (('<=256KB', 256 * 1024), ('<=1MB', 1024 * 1024), ('>1MB', None))
+
+	_instances = {}
+	_instances_lock = threading.Lock()
+	_executor = ThreadPoolExecutor(max_workers=BLOB_HEDGE_MAX_WORKERS, thread_name_prefix='blob-hedge')
+
+	def __init__(self, name: str):
+		self.name = name
+		self._latencies = {label: deque(maxlen=BLOB_HEDGE_WINDOW) for label, _ in self.SIZE_CLASSES}
+		self._tokens = self._MAX_TOKENS
+		self._requests = 0
+		self._hedged = 0
+		self._hedge_wins = 0
+		self._skipped = 0
+		self._bypassed = 0
+		self._lock = threading.Lock()
+
+	@classmethod
+	def get(cls, name: str) -> 'HedgedReader':
+		with cls._instances_lock:
+			if name not in cls._instances:
+				cls._instances[name] = cls(name)
+			return cls._instances[name]
+
+	@classmethod
+	def allStats(cls) -> Dict[str, Dict[str, Any]]:
+		with cls._instances_lock:
+			instances = list(cls._instances.values())
+		return {reader.name: reader.stats() for reader in instances}
+
+	@classmethod
+	def sizeClass(cls, size: int) -> str:
+		"""首个响应大小所属的分档（size 超过 BLOB_HEDGE_FIRST_CHUNK_BYTES 时按该值计）"""
+		size = min(size, BLOB_HEDGE_FIRST_CHUNK_BYTES)
+		for label, limit in cls.SIZE_CLASSES:
+			if limit is None or size <= limit:
+				return label
+
+	def threshold(self, size_hint: Optional[int] = None) -> float:
+		"""
+		当前的对冲阈值（秒）
+
+		参数:
+			size_hint: 预计读取的字节数（可选）；不知道时取样本充足的各分档阈值中的最大值
+		"""
+		if size_hint is not None:
+			return self._class_threshold(self.sizeClass(size_hint))
+		with self._lock:
+			sampled = [label for label, samples in self._latencies.items() if len(samples) >= self._MIN_SAMPLES]
+		if not sampled:
+			return max(BLOB_HEDGE_INITIAL_DELAY_MS, BLOB_HEDGE_MIN_DELAY_MS) / 1000
+		return max(self._class_threshold(label) for label in sampled)
+
+	def _class_threshold(self, size_class: str) -> float:
+		with self._lock:
+			samples = sorted(self._latencies[size_class])
+		if len(samples) < self._MIN_SAMPLES:
+			delay_ms = BLOB_HEDGE_INITIAL_DELAY_MS
+		else:
+			index = min(len(samples) - 1, int(len(samples) * BLOB_HEDGE_PERCENTILE / 100))
+			delay_ms = samples[index] * 1000
+		return max(delay_ms, BLOB_HEDGE_MIN_DELAY_MS) / 1000
+
+	def run(self, read: Callable[[], Any], label: str = '', size_hint: Optional[int] = None) -> Any:
+		"""
+		执行读取，必要时发出对冲请求
+
+		参数:
+			read: 无参数的读取函数（需可重复调用，如 lambda: blob_client.download_blob(...)）
+			label: 日志中显示的名称（如 blob 名称）
+			size_hint: 预计读取的字节数（可选，如区间长度或已知的 blob 大小），用于选择延迟分档
+
+		返回:
+			先成功的读取结果；两次读取都失败时抛出首个请求的异常，
+			BLOB_READ_TIMEOUT_SECONDS 内没有结果时抛出 TimeoutError
+		"""
+		if not BLOB_HEDGE_ENABLED:
+			return read()
+
+		with self._lock:
+			self._requests += 1
+			self._tokens = min(self._MAX_TOKENS, self._tokens + BLOB_HEDGE_MAX_EXTRA_RATIO)
+
+		delay = self.threshold(size_hint)
+		started = threading.Event()
+		start_time = []
+
+		def timed_read():
+			start_time.append(time.monotonic())
+			started.set()
+			result = read()
+			# 首个请求的延迟无论是否被对冲都计入样本，阈值才能反映真实的分布
+			self._record(result, time.monotonic() - start_time[0], size_hint)
+			return result
+
+		primary = self._executor.submit(timed_read)
+		# 线程池繁忙时读取尚未开始，排队时间不计入阈值；排队过久时改为在调用线程中读取
+		if not started.wait(delay * self._QUEUE_WAIT_FACTOR) and primary.cancel():
+			with self._lock:
+				self._bypassed += 1
+			print(f"⚠️ 对冲读取线程池繁忙，直接读取: {self.name} {label}")
+			return read()
+		started.wait()
+		deadline = start_time[0] + BLOB_READ_TIMEOUT_SECONDS
+		done, _ = wait([primary], timeout=max(0.0, start_time[0] + delay - time.monotonic()))
+		if done:
+			return primary.result()
+
+		with self._lock:
+			if self._tokens < 1:
+				self._skipped += 1
+				allow_hedge = False
+			else:
+				self._tokens -= 1
+				self._hedged += 1
+				allow_hedge = True
+		if not allow_hedge:
+			try:
+				return primary.result(timeout=max(0.0, deadline - time.monotonic()))
+			except FutureTimeoutError:
+				raise TimeoutError(f"Blob 读取超过 {BLOB_READ_TIMEOUT_SECONDS} 秒: {self.name} {label}")
+
+		print(f"⏱️ Blob 读取超过 {delay * 1000:.0f}ms，发出对冲请求: {self.name} {label}")
+		hedge = self._executor.submit(read)
+		pending = {primary, hedge}
+		while pending:
+			done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+			if not done:
+				raise TimeoutError(f"Blob 读取超过 {BLOB_READ_TIMEOUT_SECONDS} 秒: {self.name} {label}")
+			for future in done:
+				if future.exception() is None:
+					if future is hedge:
+						with self._lock:
+							self._hedge_wins += 1
+					return future.result()
+		return primary.result()
+
+	def _record(self, result: Any, latency: float, size_hint: Optional[int]) -> None:
+		# 按实际的首个响应大小分档（StorageStreamDownloader.size 为本次下载的总字节数）
+		size = getattr(result, 'size', None)
+		if not isinstance(size, int):
+			size = size_hint if size_hint is not None else BLOB_HEDGE_FIRST_CHUNK_BYTES
+		with self._lock:
+			self._latencies[self.sizeClass(size)].append(latency)
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			windows = {label: sorted(samples) for label, samples in self._latencies.items()}
+			requests, hedged, hedge_wins, skipped, bypassed = (
+				self._requests, self._hedged, self._hedge_wins, self._skipped, self._bypassed)
+
+		def percentile(samples, p):
+			return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000, 1) if samples else None
+
+		return {
+			'requests': requests,
+			'hedged': hedged,
+			'hedge_wins': hedge_wins,
+			'hedge_skipped_by_cap': skipped,
+			'queue_bypassed': bypassed,
+			'hedge_rate': round(hedged / requests, 4) if requests else 0.0,
+			'size_classes': {
+				label: {
+					'samples': len(samples),
+					'threshold_ms': round(self._class_threshold(label) * 1000, 1),
+					'p50_ms': percentile(samples, 50),
+					'p95_ms': percentile(samples, 95),
+					'p99_ms': percentile(samples, 99),
+				}
+				for label, samples in windows.items()
+			},
+		}
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+	"""
+	按字节数限制容量的线程安全 LRU 缓存
+
+	每个条目按调用方给出的 size 计入容量，超过 max_bytes 时淘汰最久未使用的条目；
+	单个条目超过 max_item_bytes 时不缓存，避免一个大文件挤掉全部热点数据。
+	"""
+
+	def __init__(self, max_bytes: int, max_item_bytes: int = None):
+		self.max_bytes = max_bytes
+		self.max_item_bytes = max_item_bytes or max_bytes
+		self._entries = OrderedDict()
+		self._bytes = 0
+		self._hits = 0
+		self._misses = 0
+		self._lock = threading.Lock()
+
+	def get(self, key: Hashable) -> Optional[Any]:
+		"""取出条目并标记为最近使用，不存在时返回 None"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self._misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self._hits += 1
+			return entry[0]
+
+	def put(self, key: Hashable, value: Any, size: int) -> bool:
+		"""写入条目，返回是否已缓存（超过单条上限或缓存已禁用时不缓存）"""
+		if size > self.max_item_bytes or size > self.max_bytes:
+			return False
+		with self._lock:
+			previous = self._entries.pop(key, None)
+			if previous is not None:
+				self._bytes -= previous[1]
+			self._entries[key] = (value, size)
+			self._bytes += size
+			while self._bytes > self.max_bytes:
+				_, (_, evicted_size) = self._entries.popitem(last=False)
+				self._bytes -= evicted_size
+			return True
+
+	def discard(self, key: Hashable) -> None:
+		with self._lock:
+			entry = self._entries.pop(key, None)
+			if entry is not None:
+				self._bytes -= entry[1]
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+			self._bytes = 0
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self._hits, 'misses': self._misses}
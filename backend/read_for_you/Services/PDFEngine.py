@@ -0,0 +1,187 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Type
+from PyPDF2 import PdfReader, PdfWriter
+from .PageRangeSet import PageRangeSet
+from ..constants import PDF_ENGINE
+
+# PyMuPDF 与 pikepdf 为可选依赖：未安装时对应引擎不可用
+try:
+	import fitz
+except ImportError:
+	fitz = None
+
+try:
+	import pikepdf
+except ImportError:
+	pikepdf = None
+
+
+class PDFEngine(ABC):
+	"""
+	PDF 引擎接口：打开文档、读取页数、提取页面、写出到流
+
+	PDFService 的裁剪与拆分通过引擎完成，由 PDF_ENGINE 选择具体实现（默认 pypdf2）。
+	文档对象由各引擎自行定义，只在同一引擎的方法之间传递。
+	"""
+
+	name = ''
+
+	@classmethod
+	def available(cls) -> bool:
+		return True
+
+	@abstractmethod
+	def open(self, file):
+		"""打开 PDF 文件对象，返回引擎自己的文档对象"""
+		raise NotImplementedError
+
+	@abstractmethod
+	def pageCount(self, document) -> int:
+		raise NotImplementedError
+
+	@abstractmethod
+	def isEncrypted(self, document) -> bool:
+		raise NotImplementedError
+
+	@abstractmethod
+	def extractPages(self, document, pages: PageRangeSet):
+		"""按页码区间（从 1 开始）提取页面，返回新的文档对象"""
+		raise NotImplementedError
+
+	@abstractmethod
+	def write(self, document, output):
+		"""将文档写入可写文件对象"""
+		raise NotImplementedError
+
+	def close(self, document):
+		pass
+
+	@staticmethod
+	def _source_path(file):
+		"""文件对象对应的磁盘路径（Django 已落盘的上传文件或普通文件），没有时返回 None"""
+		if hasattr(file, 'temporary_file_path'):
+			return file.temporary_file_path()
+		name = getattr(file, 'name', None)
+		if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name):
+			return name
+		return None
+
+
+class PyPDF2Engine(PDFEngine):
+	"""纯 Python 实现，无需额外依赖；对象按需从文件读取"""
+
+	name = 'pypdf2'
+
+	def open(self, file):
+		return PdfReader(file)
+
+	def pageCount(self, document) -> int:
+		return len(document.pages)
+
+	def isEncrypted(self, document) -> bool:
+		return document.is_encrypted
+
+	def extractPages(self, document, pages: PageRangeSet):
+		pdf_writer = PdfWriter()
+		for page_number in pages:
+			pdf_writer.add_page(document.pages[page_number - 1])
+		return pdf_writer
+
+	def write(self, document, output):
+		document.write(output)
+
+
+class PyMuPDFEngine(PDFEngine):
+	"""基于 MuPDF（C 实现），页面提取在大文件上明显快于 PyPDF2"""
+
+	name = 'pymupdf'
+
+	@classmethod
+	def available(cls) -> bool:
+		return fitz is not None
+
+	def open(self, file):
+		path = self._source_path(file)
+		if path:
+			return fitz.open(path)
+		file.seek(0)
+		return fitz.open(stream=file.read(), filetype='pdf')
+
+	def pageCount(self, document) -> int:
+		return document.page_count
+
+	def isEncrypted(self, document) -> bool:
+		return document.is_encrypted
+
+	def extractPages(self, document, pages: PageRangeSet):
+		extracted = fitz.open()
+		for start, end in pages.intervals:
+			extracted.insert_pdf(document, from_page=start - 1, to_page=end - 1)
+		return extracted
+
+	def write(self, document, output):
+		document.save(output, garbage=1, deflate=True)
+
+	def close(self, document):
+		document.close()
+
+
+class PikepdfEngine(PDFEngine):
+	"""基于 qpdf（C++ 实现），保留原文件结构，支持对象流"""
+
+	name = 'pikepdf'
+
+	@classmethod
+	def available(cls) -> bool:
+		return pikepdf is not None
+
+	def open(self, file):
+		path = self._source_path(file)
+		if path:
+			return pikepdf.open(path)
+		file.seek(0)
+		return pikepdf.open(file)
+
+	def pageCount(self, document) -> int:
+		return len(document.pages)
+
+	def isEncrypted(self, document) -> bool:
+		return document.is_encrypted
+
+	def extractPages(self, document, pages: PageRangeSet):
+		extracted = pikepdf.new()
+		for page_number in pages:
+			extracted.pages.append(document.pages[page_number - 1])
+		return extracted
+
+	def write(self, document, output):
+		document.save(output)
+
+	def close(self, document):
+		document.close()
+
+
+PDF_ENGINES: Dict[str, Type[PDFEngine]] = {
+	engine.name: engine for engine in (PyPDF2Engine, PyMuPDFEngine, PikepdfEngine)
+}
+
+_unavailable_reported = set()
+
+
+def getEngine(name: str = None) -> PDFEngine:
+	"""
+	按名称取得 PDF 引擎（默认为 PDF_ENGINE 设置）
+
+	名称未知时抛出 ValueError；引擎依赖未安装时回退到 pypdf2
+	"""
+	name = (name or PDF_ENGINE).lower()
+	if name not in PDF_ENGINES:
+		raise ValueError(f"未知的 PDF 引擎: {name}（可选: {', '.join(PDF_ENGINES)}）")
+	engine = PDF_ENGINES[name]
+	if not engine.available():
+		if name not in _unavailable_reported:
+			_unavailable_reported.add(name)
+			print(f"⚠️ PDF 引擎 {name} 的依赖未安装，使用 pypdf2")
+		engine = PyPDF2Engine
+	return engine()
@@ -1,45 +1,605 @@
+import hashlib
+import re
+import shutil
 from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+	ArrayObject, ByteStringObject, ContentStream, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject,
+	StreamObject, TextStringObject,
+)
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from .PDFEngine import getEngine
+from .PageRangeSet import PageRangeSet
+from ..constants import (
+	PDF_SPOOL_MAX_MEMORY,
+	PDF_OPTIMIZE_TARGET_DPI,
+	PDF_OPTIMIZE_JPEG_QUALITY,
+	TEXT_LAYER_MIN_CHARS,
+	TEXT_LAYER_MAX_IMAGE_COVERAGE,
+	BLANK_PAGE_MAX_IMAGE_COVERAGE,
+	BLANK_PAGE_MAX_INK_RATIO,
+)
+
+# Pillow 为可选依赖：未安装时 PDF 瘦身跳过图片下采样，空白页检测只识别不含大图的页面
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
 
 
 class PDFService:
 	"""PDF处理服务类"""
 
 	@staticmethod
-	def extractPDF(file, pageRange):
+	def extractPDF(file, pageRange, output=None, engine=None):
 		"""
 		根据页码范围提取PDF页面
 
 		参数:
 			file: 上传的PDF文件对象
 			pageRange: 页码范围字符串，格式如 "1-3" 或 "1,3,5" 或 "1-3,5,7-9"
+			output: 写入结果的可写文件对象（可选），默认写入新的 BytesIO
+			engine: PDF 引擎名称（可选），默认为 PDF_ENGINE 设置
 
 		返回:
-			BytesIO: 包含提取页面的PDF文件对象
+			BytesIO: 包含提取页面的PDF文件对象（传入 output 时返回 output）
 		"""
 		try:
 			# 读取上传的PDF文件
+			pdf_engine = getEngine(engine)
+			document = pdf_engine.open(file)
+			try:
+				total_pages = pdf_engine.pageCount(document)
+
+				# 解析页码范围（未指定时为整本），裁剪到实际页数
+				page_ranges = PDFService._parse_page_range(
+					pageRange, total_pages)
+
+				if output is None:
+					output = BytesIO()
+
+				# 请求整本或覆盖全部页面时直接复制原文件，不经引擎重写
+				if page_ranges.isFull(total_pages) and not pdf_engine.isEncrypted(document):
+					file.seek(0)
+					shutil.copyfileobj(file, output)
+					output.seek(0)
+					return output
+
+				# 提取指定页面并写入输出
+				extracted = pdf_engine.extractPages(document, page_ranges)
+				try:
+					pdf_engine.write(extracted, output)
+				finally:
+					pdf_engine.close(extracted)
+				output.seek(0)  # 重置指针到文件开头
+
+				return output
+			finally:
+				pdf_engine.close(document)
+
+		except ValueError:
+			# 页码范围无效或超出页数：保留原始类型与信息，由调用方作为参数错误返回
+			raise
+		except Exception as e:
+			raise Exception(f"PDF提取失败: {str(e)}")
+
+	@staticmethod
+	def extractPDFToFile(file, pageRange):
+		"""
+		根据页码范围提取PDF页面，结果写入临时文件，内存占用不随 PDF 大小增长
+
+		Django 已落盘的上传文件（TemporaryUploadedFile）直接按临时文件路径打开，
+		默认的 PyPDF2 引擎按需从磁盘读取对象；输出不超过 PDF_SPOOL_MAX_MEMORY 时留在内存，超过后自动落盘。
+
+		参数:
+			file: 上传的PDF文件对象
+			pageRange: 页码范围字符串
+
+		返回:
+			SpooledTemporaryFile: 包含提取页面的PDF文件对象，指针位于开头，使用完毕后需 close()
+		"""
+		output = SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY)
+		try:
+			if hasattr(file, 'temporary_file_path'):
+				with open(file.temporary_file_path(), 'rb') as source:
+					PDFService.extractPDF(source, pageRange, output)
+			else:
+				PDFService.extractPDF(file, pageRange, output)
+		except Exception:
+			output.close()
+			raise
+		output.seek(0)
+		return output
+
+	@staticmethod
+	def hashFile(file, chunk_size=1024 * 1024):
+		"""按块计算文件对象的 SHA-256，不整体读入内存；计算完成后指针回到开头"""
+		digest = hashlib.sha256()
+		file.seek(0)
+		for chunk in iter(lambda: file.read(chunk_size), b''):
+			digest.update(chunk)
+		file.seek(0)
+		return digest
+
+	@staticmethod
+	def optimizePDF(file, output, target_dpi=PDF_OPTIMIZE_TARGET_DPI, jpeg_quality=PDF_OPTIMIZE_JPEG_QUALITY):
+		"""
+		PDF 瘦身：下采样高分辨率图片、合并内容相同的图片与字体、压缩页面内容流
+
+		图片分辨率按图片铺满整页估算（扫描页即是如此）；图片实际显示得更小时估算值偏低，
+		只会少压缩而不会压缩过度。瘦身后反而变大时原样输出。
+
+		参数:
+			file: PDF文件对象
+			output: 写入结果的可写文件对象
+			target_dpi: 目标分辨率，高于该分辨率的图片会被下采样
+			jpeg_quality: 下采样后 JPEG 的质量（1-95）
+
+		返回:
+			dict: {'bytes_before': 原大小, 'bytes_after': 瘦身后大小,
+			       'images_downsampled': 下采样的图片数, 'objects_deduplicated': 合并的重复对象数}
+		"""
+		try:
+			file.seek(0, 2)
+			bytes_before = file.tell()
+			file.seek(0)
+			stats = {'bytes_before': bytes_before, 'bytes_after': bytes_before,
+			         'images_downsampled': 0, 'objects_deduplicated': 0}
+
 			pdf_reader = PdfReader(file)
+			if pdf_reader.is_encrypted:
+				file.seek(0)
+				shutil.copyfileobj(file, output)
+				return stats
+
 			pdf_writer = PdfWriter()
+			for page in pdf_reader.pages:
+				pdf_writer.add_page(page)
+
+			canonical = {}
+			replaced = set()
+			downsampled = set()
+			for page in pdf_writer.pages:
+				resources = page.get('/Resources')
+				if resources is None:
+					continue
+				resources = resources.get_object()
+				page_size = (float(page.mediabox.width), float(page.mediabox.height))
+
+				xobjects = resources.get('/XObject')
+				if xobjects is not None:
+					xobjects = xobjects.get_object()
+					for name in list(xobjects.keys()):
+						ref = xobjects.raw_get(name)
+						if not isinstance(ref, IndirectObject):
+							continue
+						image = ref.get_object()
+						if image.get('/Subtype') == '/Image' and ref.idnum not in downsampled:
+							downsampled.add(ref.idnum)
+							if PDFService._downsample_image(image, page_size, target_dpi, jpeg_quality):
+								stats['images_downsampled'] += 1
+						PDFService._dedup_reference(xobjects, name, canonical, replaced)
+
+				fonts = resources.get('/Font')
+				if fonts is not None:
+					for font in fonts.get_object().values():
+						for descriptor in PDFService._font_descriptors(font.get_object()):
+							for key in ('/FontFile', '/FontFile2', '/FontFile3'):
+								if isinstance(descriptor.raw_get(key) if key in descriptor else None, IndirectObject):
+									PDFService._dedup_reference(descriptor, key, canonical, replaced)
+
+				try:
+					page.compress_content_streams()
+				except Exception as e:
+					print(f"⚠️ 页面内容流压缩失败: {e}")
+
+			# 被合并掉且不再被引用的对象替换为 null，不再写入其内容
+			reachable = PDFService._reachable_objects(pdf_writer)
+			for idnum in replaced - reachable:
+				pdf_writer._objects[idnum - 1] = NullObject()
+			stats['objects_deduplicated'] = len(replaced - reachable)
+
+			start = output.tell()
+			pdf_writer.write(output)
+			stats['bytes_after'] = output.tell() - start
+			if stats['bytes_after'] >= bytes_before:
+				output.seek(start)
+				output.truncate()
+				file.seek(0)
+				shutil.copyfileobj(file, output)
+				stats.update(bytes_after=bytes_before, images_downsampled=0, objects_deduplicated=0)
+			return stats
 
-			# 解析页码范围
-			page_indices = PDFService._parse_page_range(
-				pageRange, len(pdf_reader.pages))
+		except Exception as e:
+			raise Exception(f"PDF瘦身失败: {str(e)}")
 
-			# 提取指定页面
-			for page_index in page_indices:
-				if 0 <= page_index < len(pdf_reader.pages):
-					pdf_writer.add_page(pdf_reader.pages[page_index])
+	@staticmethod
+	def _downsample_image(image, page_size, target_dpi, jpeg_quality):
+		"""将分辨率高于 target_dpi 的 8 位灰度/RGB 图片重新编码为较小的 JPEG，返回是否替换"""
+		if any(key in image for key in ('/SMask', '/Mask')):
+			return False
+
+		width, height = int(image['/Width']), int(image['/Height'])
+		page_width, page_height = page_size
+		if page_width <= 0 or page_height <= 0:
+			return False
+		dpi = max(width * 72 / page_width, height * 72 / page_height)
+		if dpi <= target_dpi:
+			return False
+
+		picture = PDFService._decode_image(image)
+		if picture is None:
+			return False
+
+		scale = target_dpi / dpi
+		picture = picture.resize(
+			(max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+		encoded = BytesIO()
+		picture.save(encoded, format='JPEG', quality=jpeg_quality, optimize=True)
+		data = encoded.getvalue()
+		if len(data) >= len(image._data):
+			return False
+
+		image._data = data
+		if hasattr(image, 'decoded_self'):
+			image.decoded_self = None
+		image[NameObject('/Filter')] = NameObject('/DCTDecode')
+		image[NameObject('/Width')] = NumberObject(picture.width)
+		image[NameObject('/Height')] = NumberObject(picture.height)
+		if '/DecodeParms' in image:
+			del image['/DecodeParms']
+		return True
 
-			# 将提取的页面写入BytesIO对象
-			output = BytesIO()
-			pdf_writer.write(output)
-			output.seek(0)  # 重置指针到文件开头
+	@staticmethod
+	def _decode_image(image):
+		"""
+		将 8 位灰度/RGB 的图片 XObject（DCT 或 Flate 编码）解码为 Pillow 图片
+
+		返回:
+			PIL.Image（模式为 L 或 RGB）；未安装 Pillow 或不支持的图片格式返回 None
+		"""
+		if Image is None:
+			return None
+		if image.get('/ImageMask') or '/Decode' in image or image.get('/BitsPerComponent', 8) != 8:
+			return None
+		color_space = image.get('/ColorSpace')
+		mode = {'/DeviceRGB': 'RGB', '/DeviceGray': 'L'}.get(color_space.get_object() if color_space is not None else None)
+		if mode is None:
+			return None
+
+		filters = image.get('/Filter')
+		filters = [] if filters is None else list(filters) if isinstance(filters, ArrayObject) else [filters]
+		if filters == ['/DCTDecode']:
+			return Image.open(BytesIO(image._data)).convert(mode)
+		if filters in ([], ['/FlateDecode']):
+			return Image.frombytes(mode, (int(image['/Width']), int(image['/Height'])), image.get_data())
+		return None
+
+	@staticmethod
+	def _stream_key(obj):
+		"""内容相同的流对象得到相同的键（流数据 + 除 /Length 外的字典项）"""
+		digest = hashlib.sha256(getattr(obj, '_data', b'') or b'')
+		for key in sorted(k for k in obj.keys() if k != '/Length'):
+			digest.update(f"{key}={obj.raw_get(key)!r};".encode('utf-8'))
+		return digest.hexdigest()
+
+	@staticmethod
+	def _dedup_reference(container, key, canonical, replaced):
+		"""若 container[key] 与之前见过的对象内容相同，则改为引用之前的对象"""
+		ref = container.raw_get(key)
+		canonical_ref = canonical.setdefault(PDFService._stream_key(ref.get_object()), ref)
+		if canonical_ref.idnum != ref.idnum:
+			container[NameObject(key)] = canonical_ref
+			replaced.add(ref.idnum)
+
+	@staticmethod
+	def _font_descriptors(font):
+		"""字体（含 Type0 的后代字体）的 /FontDescriptor 字典"""
+		fonts = [font] + [descendant.get_object() for descendant in font.get('/DescendantFonts', [])]
+		return [f['/FontDescriptor'].get_object() for f in fonts if '/FontDescriptor' in f]
+
+	@staticmethod
+	def _reachable_objects(pdf_writer):
+		"""从文档根对象出发可以访问到的间接对象编号"""
+		reachable = set()
+		stack = [pdf_writer._root_object, pdf_writer._info]
+		while stack:
+			obj = stack.pop()
+			if isinstance(obj, IndirectObject):
+				if obj.pdf is not pdf_writer or obj.idnum in reachable:
+					continue
+				reachable.add(obj.idnum)
+				obj = obj.get_object()
+			if isinstance(obj, DictionaryObject):
+				stack.extend(obj.raw_get(key) for key in obj.keys())
+			elif isinstance(obj, ArrayObject):
+				stack.extend(obj)
+		return reachable
+
+	@staticmethod
+	def analyzePages(file, hash_pages=True, detect_text=True, detect_blank=True):
+		"""
+		逐页计算内容摘要并分类，只解析一次 PDF
 
-			return output
+		分类决定哪些页面需要交给识别 API：
+		- blank: 空白或近乎空白的页面（没有绘制文字、路径与表单，图片都很小或颜色近乎均匀，如扫描的空白背页）
+		- text: 原生数字页面（自带可用文字层），同时满足：
+		  PyPDF2 提取出的可见字符不少于 TEXT_LAYER_MIN_CHARS，且几乎没有乱码（缺少 ToUnicode 的字体会提取出乱码）；
+		  页面上图片覆盖的面积比例不超过 TEXT_LAYER_MAX_IMAGE_COVERAGE（扫描页通常是一整页图片加一层隐藏文字）
+		- scanned: 其余页面（两项检测均未启用时所有页面都是 scanned）
+		单页分类出错时按 scanned 处理；摘要计算出错时抛出异常
+
+		参数:
+			file: PDF文件对象
+			hash_pages: 是否计算页面摘要（页面缓存的键），不计算时 hash 为 None
+			detect_text: 是否识别原生数字页面
+			detect_blank: 是否识别空白页面
 
+		返回:
+			list: 按页顺序排列，{'hash': 'xxx', 'type': 'blank' | 'text' | 'scanned'}，text 页面另有 'paragraphs'
+		"""
+		try:
+			pdf_reader = PdfReader(file)
 		except Exception as e:
-			raise Exception(f"PDF提取失败: {str(e)}")
+			raise Exception(f"PDF页面分析失败: {str(e)}")
+
+		pages = []
+		memo = {}
+		for page_number, page in enumerate(pdf_reader.pages, start=1):
+			try:
+				page_hash = PDFService._hash_page(page, memo) if hash_pages else None
+			except Exception as e:
+				raise Exception(f"PDF页面摘要计算失败（第 {page_number} 页）: {str(e)}")
+			try:
+				page_type = PDFService._classify_page(page, detect_text, detect_blank)
+			except Exception as e:
+				print(f"⚠️ 第 {page_number} 页分类失败: {e}，交给识别 API")
+				page_type = {'type': 'scanned'}
+			pages.append({'hash': page_hash, **page_type})
+		return pages
+
+	@staticmethod
+	def _classify_page(page, detect_text, detect_blank):
+		if not (detect_text or detect_blank):
+			return {'type': 'scanned'}
+		stats = PDFService._page_content_stats(page)
+		if detect_blank and PDFService._is_blank_page(stats):
+			return {'type': 'blank'}
+		if detect_text and stats['text_operators']:
+			image_coverage = min(1.0, sum(image['coverage'] for image in stats['images']))
+			text = page.extract_text()
+			if image_coverage <= TEXT_LAYER_MAX_IMAGE_COVERAGE and PDFService._is_usable_text(text, TEXT_LAYER_MIN_CHARS):
+				return {'type': 'text', 'paragraphs': PDFService._split_paragraphs(text)}
+		return {'type': 'scanned'}
+
+	@staticmethod
+	def _is_blank_page(stats):
+		if stats['text_operators'] or stats['paths'] or stats['forms']:
+			return False
+		for image in stats['images']:
+			if image['coverage'] <= BLANK_PAGE_MAX_IMAGE_COVERAGE:
+				continue
+			picture = PDFService._decode_image(image['image']) if image['image'] is not None else None
+			if picture is None or not PDFService._is_uniform(picture):
+				return False
+		return True
+
+	@staticmethod
+	def _is_uniform(picture):
+		"""
+		图片颜色是否近乎均匀（空白扫描页）
+
+		去掉四周 5% 的边缘（扫描阴影）并缩小到 1024 像素以内（零星噪点被平均掉），
+		与灰度中位数相差超过 64 的像素视为墨迹，墨迹比例不超过 BLANK_PAGE_MAX_INK_RATIO 视为均匀
+		"""
+		gray = picture.convert('L')
+		margin_x, margin_y = gray.width // 20, gray.height // 20
+		gray = gray.crop((margin_x, margin_y, gray.width - margin_x, gray.height - margin_y))
+		gray.thumbnail((1024, 1024))
+		histogram = gray.histogram()
+		total = sum(histogram)
+		if not total:
+			return True
+		counted, median = 0, 0
+		for median, count in enumerate(histogram):
+			counted += count
+			if counted * 2 >= total:
+				break
+		ink = sum(count for value, count in enumerate(histogram) if abs(value - median) > 64)
+		return ink <= total * BLANK_PAGE_MAX_INK_RATIO
+
+	@staticmethod
+	def _is_usable_text(text, min_chars):
+		visible = [char for char in text if not char.isspace()]
+		if len(visible) < min_chars:
+			return False
+		garbled = sum(1 for char in visible if char == '\ufffd' or not char.isprintable())
+		return garbled <= len(visible) * 0.05
+
+	@staticmethod
+	def _split_paragraphs(text):
+		"""
+		将提取的文字整理为段落：空行分段；短行且以句末标点结尾时也视为段落结束。
+		行之间按中日韩文字直接相连、其他文字以空格相连，行尾连字符会被去除
+		"""
+		paragraphs = []
+		for block in re.split(r'\n\s*\n', text):
+			lines = [line.strip() for line in block.split('\n') if line.strip()]
+			if not lines:
+				continue
+			max_length = max(len(line) for line in lines)
+			current = ''
+			for line in lines:
+				if current.endswith('-') and line[:1].islower():
+					current = current[:-1] + line
+				elif current and not (PDFService._is_cjk(current[-1]) and PDFService._is_cjk(line[0])):
+					current = f"{current} {line}"
+				else:
+					current += line
+				if len(line) < max_length * 0.6 and line[-1] in '.!?。！？:：':
+					paragraphs.append(current)
+					current = ''
+			if current:
+				paragraphs.append(current)
+		return paragraphs
+
+	@staticmethod
+	def _is_cjk(char):
+		return '\u2e80' <= char <= '\u9fff' or '\uf900' <= char <= '\ufaff' or '\uff00' <= char <= '\uffef'
+
+	@staticmethod
+	def _page_content_stats(page):
+		"""
+		分析页面内容流
+
+		返回:
+			{
+				'text_operators': 绘制文字的操作符个数,
+				'paths': 绘制路径（描边、填充、渐变）的操作符个数,
+				'forms': 引用的表单 XObject 个数,
+				'images': [{'coverage': 图片面积占页面面积的比例, 'image': 图片 XObject（内嵌图片为 None）}, ...]
+			}
+		"""
+		stats = {'text_operators': 0, 'paths': 0, 'forms': 0, 'images': []}
+		contents = page.get_contents()
+		if contents is None:
+			return stats
+		if not isinstance(contents, ContentStream):
+			contents = ContentStream(contents, page.pdf)
+
+		page_area = abs(float(page.mediabox.width) * float(page.mediabox.height)) or 1.0
+		resources = page.get('/Resources')
+		xobjects = resources.get_object().get('/XObject') if resources is not None else None
+		xobjects = xobjects.get_object() if xobjects is not None else {}
+
+		ctm = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+		saved = []
+		for operands, operator in contents.operations:
+			if operator == b'q':
+				saved.append(ctm)
+			elif operator == b'Q':
+				ctm = saved.pop() if saved else ctm
+			elif operator == b'cm':
+				a, b, c, d, e, f = (float(value) for value in operands)
+				A, B, C, D, E, F = ctm
+				ctm = (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D,
+				       e * A + f * C + E, e * B + f * D + F)
+			elif operator in (b'Tj', b'TJ', b"'", b'"'):
+				stats['text_operators'] += 1
+			elif operator in (b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*', b'sh'):
+				stats['paths'] += 1
+			elif operator in (b'Do', b'INLINE IMAGE'):
+				image = None
+				if operator == b'Do':
+					xobject = xobjects.get(operands[0])
+					xobject = xobject.get_object() if xobject is not None else None
+					if xobject is None or xobject.get('/Subtype') != '/Image':
+						stats['forms'] += 1
+						continue
+					image = xobject
+				# 图片绘制在单位正方形上，面积即当前变换矩阵的行列式
+				coverage = abs(ctm[0] * ctm[3] - ctm[1] * ctm[2]) / page_area
+				stats['images'].append({'coverage': coverage, 'image': image})
+		return stats
+
+	@staticmethod
+	def splitPDF(file, shard_size):
+		"""
+		将PDF按固定页数拆分为多个分片
+
+		参数:
+			file: PDF文件对象
+			shard_size: 每个分片的页数
+
+		返回:
+			list: [(分片PDF的 bytes, 分片页数), ...]
+		"""
+		try:
+			pdf_engine = getEngine()
+			document = pdf_engine.open(file)
+			try:
+				total_pages = pdf_engine.pageCount(document)
+				shards = []
+				for start in range(1, total_pages + 1, shard_size):
+					end = min(start + shard_size - 1, total_pages)
+					shard = pdf_engine.extractPages(document, PageRangeSet([(start, end)]))
+					output = BytesIO()
+					try:
+						pdf_engine.write(shard, output)
+					finally:
+						pdf_engine.close(shard)
+					shards.append((output.getvalue(), end - start + 1))
+				return shards
+			finally:
+				pdf_engine.close(document)
+
+		except Exception as e:
+			raise Exception(f"PDF拆分失败: {str(e)}")
+
+	@staticmethod
+	def _hash_page(page, memo):
+		"""
+		计算单页的内容摘要（页面缓存的键）
+
+		只对决定页面外观的部分取 SHA-256：解码后的内容流、Resources（递归展开间接对象，
+		流对象取原始数据与字典，不解码图片）以及 MediaBox / CropBox / Rotate。
+		摘要不含对象编号，同一页无论来自整本还是裁剪后的 PDF 都得到相同的摘要，且无需重新写出页面。
+		摘要固定使用 PyPDF2 计算，不随 PDF_ENGINE 改变
+
+		参数:
+			page: PyPDF2 页面对象
+			memo: 同一文档内共享的间接对象摘要缓存（dict），多页共用的字体、图片只计算一次
+		"""
+		digest = hashlib.sha256(b'page-v2')
+		contents = page.get('/Contents')
+		streams = contents if isinstance(contents, ArrayObject) else ([contents] if contents is not None else [])
+		for stream in streams:
+			digest.update(stream.get_object().get_data())
+		for key in ('/MediaBox', '/CropBox', '/Rotate'):
+			digest.update(key.encode() + PDFService._object_digest(page.raw_get(key) if key in page else NullObject(), memo, set()))
+		resources = page.raw_get('/Resources') if '/Resources' in page else DictionaryObject()
+		digest.update(b'/Resources' + PDFService._object_digest(resources, memo, set()))
+		return digest.hexdigest()
+
+	@staticmethod
+	def _object_digest(obj, memo, active):
+		"""PDF 对象的结构摘要：间接引用替换为被引用对象的摘要，跳过指回父节点的 /Parent"""
+		if isinstance(obj, IndirectObject):
+			key = (obj.idnum, obj.generation)
+			if key in memo:
+				return memo[key]
+			if key in active:
+				# 循环引用（极少见）：以固定标记代替，不影响同一结构得到相同摘要
+				return b'cycle'
+			active.add(key)
+			value = PDFService._object_digest(obj.get_object(), memo, active)
+			active.discard(key)
+			memo[key] = value
+			return value
+
+		digest = hashlib.sha256()
+		if isinstance(obj, StreamObject):
+			digest.update(b'stream')
+			for key in sorted(obj.keys()):
+				if key != '/Length':
+					digest.update(key.encode() + PDFService._object_digest(obj.raw_get(key), memo, active))
+			digest.update(obj._data)
+		elif isinstance(obj, DictionaryObject):
+			digest.update(b'dict')
+			for key in sorted(obj.keys()):
+				if key != '/Parent':
+					digest.update(key.encode() + PDFService._object_digest(obj.raw_get(key), memo, active))
+		elif isinstance(obj, ArrayObject):
+			digest.update(b'array')
+			for item in obj:
+				digest.update(PDFService._object_digest(item, memo, active))
+		elif isinstance(obj, TextStringObject):
+			digest.update(b'string' + obj.original_bytes)
+		elif isinstance(obj, ByteStringObject):
+			digest.update(b'string' + bytes(obj))
+		else:
+			digest.update(type(obj).__name__.encode() + str(obj).encode())
+		return digest.digest()
 
 	@staticmethod
 	def normalizePageRange(pageRange):
@@ -56,38 +616,26 @@ class PDFService:
 			return ""
 
 		try:
-			# 解析所有页码
-			page_numbers = set()
-			ranges = pageRange.split(',')
-
-			for r in ranges:
-				r = r.strip()
-				if '-' in r:
-					# 处理范围，如 "3-6"
-					start, end = r.split('-')
-					start = int(start.strip())
-					end = int(end.strip())
-					page_numbers.update(range(start, end + 1))
-				else:
-					# 处理单个页码，如 "5"
-					page_num = int(r.strip())
-					page_numbers.add(page_num)
+			return str(PageRangeSet.parse(pageRange).normalized())
 
-			if not page_numbers:
-				return ""
-
-			# 排序页码
-			sorted_pages = sorted(list(page_numbers))
-			min_page = sorted_pages[0]
+		except Exception as e:
+			raise Exception(f"页码范围转换失败: {str(e)}")
 
-			# 平移页码，使最小页码变为1
-			normalized_pages = [p - min_page + 1 for p in sorted_pages]
+	@staticmethod
+	def countPages(pageRange):
+		"""
+		统计页码范围字符串包含的页数
 
-			# 将页码列表转换回范围字符串
-			return PDFService._pages_to_range_string(normalized_pages)
+		参数:
+			pageRange: 页码范围字符串，如 "1-3,5"
 
-		except Exception as e:
-			raise Exception(f"页码范围转换失败: {str(e)}")
+		返回:
+			int: 页数，未指定范围或无法解析时返回 0（表示页数未知）
+		"""
+		try:
+			return len(PageRangeSet.parse(pageRange))
+		except ValueError:
+			return 0
 
 	@staticmethod
 	def _pages_to_range_string(pages):
@@ -100,67 +648,26 @@ class PDFService:
 		返回:
 			str: 范围字符串，如 "1-3,5,7-9"
 		"""
-		if not pages:
-			return ""
-
-		ranges = []
-		start = pages[0]
-		end = pages[0]
-
-		for i in range(1, len(pages)):
-			if pages[i] == end + 1:
-				# 连续页码，扩展范围
-				end = pages[i]
-			else:
-				# 不连续，保存当前范围并开始新范围
-				if start == end:
-					ranges.append(str(start))
-				else:
-					ranges.append(f"{start}-{end}")
-				start = pages[i]
-				end = pages[i]
-
-		# 添加最后一个范围
-		if start == end:
-			ranges.append(str(start))
-		else:
-			ranges.append(f"{start}-{end}")
-
-		return ','.join(ranges)
+		return str(PageRangeSet.fromPages(pages))
 
 	@staticmethod
 	def _parse_page_range(pageRange, total_pages):
 		"""
-		解析页码范围字符串
+		解析页码范围字符串，并裁剪到 PDF 实际页数
 
 		参数:
 			pageRange: 页码范围字符串，如 "1-3" 或 "1,3,5" 或 "1-3,5,7-9"
 			total_pages: PDF总页数
 
 		返回:
-			list: 页码索引列表（从0开始）
+			PageRangeSet: 页码区间集合（从1开始），未指定范围时覆盖所有页面；
+			格式无效或范围完全超出 PDF 页数时抛出 ValueError
 		"""
 		if not pageRange:
 			# 如果没有指定范围，返回所有页面
-			return list(range(total_pages))
-
-		page_indices = set()
-		ranges = pageRange.split(',')
-
-		for r in ranges:
-			r = r.strip()
-			if '-' in r:
-				# 处理范围，如 "1-3"
-				start, end = r.split('-')
-				start = int(start.strip())
-				end = int(end.strip())
-				# 转换为0-based索引
-				page_indices.update(range(start - 1, end))
-			else:
-				# 处理单个页码，如 "5"
-				page_num = int(r.strip())
-				# 转换为0-based索引
-				page_indices.add(page_num - 1)
+			return PageRangeSet.full(total_pages)
 
-		# 返回排序后的页码列表
-		return sorted(list(page_indices))
+		page_ranges = PageRangeSet.parse(pageRange).clamp(total_pages)
+		if not page_ranges:
+			raise ValueError(f"页码范围超出 PDF 页数（共 {total_pages} 页）: '{pageRange}'")
+		return page_ranges
@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import threading
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+from typing import List, Tuple
+from .AzureBlobService import AzureBlobService
+from .BlobFile import BlobFile
+from .PDFService import PDFService
+from ..constants import (
+	PDF_WORKER_ENABLED,
+	PDF_WORKER_MAX_PROCESSES,
+	PDF_WORKER_TIMEOUT_SECONDS,
+	PDF_WORKER_MEMORY_MB,
+)
+
+
+def _run_job(conn, job, args, memory_bytes):
+	"""子进程入口：设置内存上限后执行任务，通过管道返回 ('ok', 结果)、('invalid', 参数错误信息) 或 ('error', 错误信息)"""
+	try:
+		if memory_bytes:
+			resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+		conn.send(('ok', job(*args)))
+	except ValueError as e:
+		conn.send(('invalid', str(e)))
+	except MemoryError:
+		conn.send(('error', f"超出内存限制 {memory_bytes // (1024 * 1024)} MB"))
+	except BaseException as e:
+		conn.send(('error', str(e)))
+	finally:
+		conn.close()
+
+
+def _extract_job(source_path, page_range, output_path):
+	with open(source_path, 'rb') as source, open(output_path, 'wb') as output:
+		PDFService.extractPDF(source, page_range, output)
+
+
+def _extract_blob_job(blob_name, size, page_range, output_path):
+	with BlobFile.open(AzureBlobService(), blob_name, size) as source, open(output_path, 'wb') as output:
+		PDFService.extractPDF(source, page_range, output)
+
+
+def _optimize_job(source_path, output_path):
+	with open(source_path, 'rb') as source, open(output_path, 'wb') as output:
+		return PDFService.optimizePDF(source, output)
+
+
+def _analyze_pages_job(source_path, hash_pages, detect_text, detect_blank):
+	with open(source_path, 'rb') as source:
+		return PDFService.analyzePages(source, hash_pages, detect_text, detect_blank)
+
+
+def _write_shards(source, shard_size, output_dir):
+	shard_files = []
+	for index, (shard_data, shard_pages) in enumerate(PDFService.splitPDF(source, shard_size)):
+		shard_path = os.path.join(output_dir, f"shard_{index}.pdf")
+		with open(shard_path, 'wb') as shard_file:
+			shard_file.write(shard_data)
+		shard_files.append((shard_path, shard_pages))
+	return shard_files
+
+
+def _split_job(source_path, shard_size, output_dir):
+	with open(source_path, 'rb') as source:
+		return _write_shards(source, shard_size, output_dir)
+
+
+class PDFWorkerService:
+	"""
+	在独立的工作进程中执行 CPU 密集的 PDF 处理（裁剪、瘦身、逐页摘要与分类、拆分）
+
+	PyPDF2 是纯 Python 实现，在请求线程中执行会长时间占用 GIL，拖慢同一进程中的其他请求。
+	每个任务在单独的子进程中运行，同时运行的子进程数不超过 PDF_WORKER_MAX_PROCESSES；
+	输入输出通过临时文件路径传递，不在进程间传输 PDF 内容；存储在 Blob Storage 中的文件（BlobFile）只传递 blob 名称，
+	由工作进程按需读取。
+	任务超过 PDF_WORKER_TIMEOUT_SECONDS 会被终止，内存超过 PDF_WORKER_MEMORY_MB 会失败，均以异常形式报告。
+	PDF_WORKER_ENABLED 为 false 时直接在当前线程中执行。
+	"""
+
+	_slots = threading.BoundedSemaphore(PDF_WORKER_MAX_PROCESSES)
+	_context = None
+
+	@classmethod
+	def _get_context(cls):
+		if cls._context is None:
+			# forkserver：子进程由干净的服务进程派生，不继承 Web 进程中的线程与连接
+			cls._context = multiprocessing.get_context('forkserver')
+			cls._context.set_forkserver_preload(['PyPDF2'])
+		return cls._context
+
+	@classmethod
+	def run(cls, job, *args, timeout=PDF_WORKER_TIMEOUT_SECONDS, memory_mb=PDF_WORKER_MEMORY_MB):
+		"""
+		在子进程中执行任务并返回结果
+
+		参数:
+			job: 模块级函数（需可被子进程导入）
+			timeout: 超时时间（秒），超时后终止子进程
+			memory_mb: 子进程地址空间上限（MB），0 表示不限制
+
+		返回:
+			任务函数的返回值；任务抛出 ValueError（如页码范围无效）时抛出同样信息的 ValueError，
+			其他失败、超时或进程异常退出时抛出 Exception
+		"""
+		context = cls._get_context()
+		with cls._slots:
+			parent_conn, child_conn = context.Pipe(duplex=False)
+			process = context.Process(
+				target=_run_job, args=(child_conn, job, args, memory_mb * 1024 * 1024), daemon=True)
+			process.start()
+			child_conn.close()
+			try:
+				if not parent_conn.poll(timeout):
+					process.kill()
+					raise Exception(f"PDF处理超时（超过 {timeout} 秒），已终止")
+				try:
+					status, payload = parent_conn.recv()
+				except EOFError:
+					process.join()
+					raise Exception(f"PDF处理进程异常退出（exitcode={process.exitcode}）")
+			finally:
+				parent_conn.close()
+				process.join()
+
+		if status == 'invalid':
+			raise ValueError(payload)
+		if status != 'ok':
+			raise Exception(f"PDF处理失败: {payload}")
+		return payload
+
+	@staticmethod
+	@contextmanager
+	def _source_path(file):
+		"""
+		取得文件对象对应的磁盘路径：已落盘的上传文件与具名临时文件直接使用原路径，
+		其他文件对象按块复制到临时文件
+		"""
+		if hasattr(file, 'temporary_file_path'):
+			yield file.temporary_file_path()
+			return
+		name = getattr(file, 'name', None)
+		if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name):
+			file.flush()
+			yield name
+			return
+		with NamedTemporaryFile(suffix='.pdf') as copy:
+			file.seek(0)
+			shutil.copyfileobj(file, copy)
+			copy.flush()
+			file.seek(0)
+			yield copy.name
+
+	@staticmethod
+	def extractPDF(file, pageRange):
+		"""
+		在工作进程中按页码范围裁剪 PDF
+
+		file 为 BlobFile.open() 返回的文件对象时，工作进程直接从 Blob Storage 读取用到的部分，不经当前进程下载
+
+		返回:
+			文件对象（临时文件），指针位于开头，使用完毕后需 close()
+		"""
+		if not PDF_WORKER_ENABLED:
+			return PDFService.extractPDFToFile(file, pageRange)
+
+		output = NamedTemporaryFile(suffix='.pdf')
+		try:
+			blob_file = getattr(file, 'raw', None)
+			if isinstance(blob_file, BlobFile):
+				PDFWorkerService.run(_extract_blob_job, blob_file.blob_name, blob_file.size, pageRange, output.name)
+			else:
+				with PDFWorkerService._source_path(file) as source_path:
+					PDFWorkerService.run(_extract_job, source_path, pageRange, output.name)
+		except Exception:
+			output.close()
+			raise
+		output.seek(0)
+		return output
+
+	@staticmethod
+	def optimizePDF(file):
+		"""
+		在工作进程中执行 PDF 瘦身（同 PDFService.optimizePDF）
+
+		返回:
+			(文件对象（临时文件，指针位于开头，使用完毕后需 close()）, 瘦身统计 dict)
+		"""
+		output = NamedTemporaryFile(suffix='.pdf')
+		try:
+			if PDF_WORKER_ENABLED:
+				with PDFWorkerService._source_path(file) as source_path:
+					stats = PDFWorkerService.run(_optimize_job, source_path, output.name)
+			else:
+				stats = PDFService.optimizePDF(file, output)
+				output.flush()
+		except Exception:
+			output.close()
+			raise
+		output.seek(0)
+		return output, stats
+
+	@staticmethod
+	def analyzePages(file, hash_pages=True, detect_text=True, detect_blank=True):
+		"""在工作进程中逐页计算摘要并分类（同 PDFService.analyzePages，只解析一次 PDF）"""
+		if not PDF_WORKER_ENABLED:
+			file.seek(0)
+			return PDFService.analyzePages(file, hash_pages, detect_text, detect_blank)
+
+		with PDFWorkerService._source_path(file) as source_path:
+			return PDFWorkerService.run(_analyze_pages_job, source_path, hash_pages, detect_text, detect_blank)
+
+	@staticmethod
+	def splitPDF(file, shard_size, output_dir) -> List[Tuple[str, int]]:
+		"""
+		在工作进程中将 PDF 按固定页数拆分，分片写入 output_dir
+
+		返回:
+			list: [(分片文件路径, 分片页数), ...]
+		"""
+		if not PDF_WORKER_ENABLED:
+			file.seek(0)
+			return _write_shards(file, shard_size, output_dir)
+
+		with PDFWorkerService._source_path(file) as source_path:
+			return PDFWorkerService.run(_split_job, source_path, shard_size, output_dir)
+
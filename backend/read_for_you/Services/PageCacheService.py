@@ -0,0 +1,158 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+from .AzureBlobService import AzureBlobService
+from .PageRangeSet import PageRangeSet
+from .ResultService import ResultService
+from ..constants import PAGE_CACHE_ENABLED, PAGE_CACHE_LOOKUP_CONCURRENCY
+
+
+class PageCacheService:
+	"""
+	按页缓存识别结果
+
+	缓存键为单页 PDF 内容摘要 + 识别语言，每页的识别结果存放在
+	ocr_page_cache/<language>/<page_hash>.json。
+	提交识别时生成一份识别计划（plan.json），记录每一页来自缓存、本地文字层还是本次识别，
+	识别完成后按计划合并结果，并把新识别的页面写入缓存。
+	"""
+
+	CACHE_PREFIX = 'ocr_page_cache'
+	PLAN_FILE_NAME = 'plan.json'
+
+	def __init__(self, blob_service: AzureBlobService = None):
+		self.blob_service = blob_service or AzureBlobService()
+
+	@staticmethod
+	def _cache_blob_name(page_hash: str, language: str) -> str:
+		return f"{PageCacheService.CACHE_PREFIX}/{language or 'default'}/{page_hash}.json"
+
+	def lookup(self, page_hashes: List[str], language: str) -> Dict[str, Dict[str, Any]]:
+		"""
+		并发查询页面缓存
+
+		返回:
+			dict: page_hash -> 页面条目，只包含命中的页面
+		"""
+		if not PAGE_CACHE_ENABLED or not page_hashes:
+			return {}
+
+		def fetch(page_hash):
+			try:
+				data = self.blob_service.downloadBlob(self._cache_blob_name(page_hash, language))
+				return page_hash, json.loads(data.decode('utf-8'))
+			except FileNotFoundError:
+				return page_hash, None
+			except Exception as e:
+				print(f"⚠️ 页面缓存读取失败: {page_hash} - {e}")
+				return page_hash, None
+
+		unique_hashes = list(dict.fromkeys(page_hashes))
+		with ThreadPoolExecutor(max_workers=PAGE_CACHE_LOOKUP_CONCURRENCY) as executor:
+			results = executor.map(fetch, unique_hashes)
+		return {page_hash: page for page_hash, page in results if page is not None}
+
+	def store(self, pages: Dict[str, Dict[str, Any]], language: str):
+		"""将页面条目写入缓存（page_hash -> 页面条目）"""
+		if not PAGE_CACHE_ENABLED:
+			return
+
+		def upload(item):
+			page_hash, page = item
+			blob_name = self._cache_blob_name(page_hash, language)
+			prefix, file_name = blob_name.rsplit('/', 1)
+			page_file = BytesIO(json.dumps(page, ensure_ascii=False).encode('utf-8'))
+			page_file.name = file_name
+			self.blob_service.uploadFile(prefix, page_file)
+
+		with ThreadPoolExecutor(max_workers=PAGE_CACHE_LOOKUP_CONCURRENCY) as executor:
+			list(executor.map(upload, pages.items()))
+
+	@staticmethod
+	def buildPlan(page_hashes: List[str], cached: Dict[str, Dict[str, Any]], language: str,
+	              local_pages: Optional[List[Optional[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+		"""
+		生成识别计划
+
+		参数:
+			local_pages: 按页顺序排列，无需识别的页面为 {'source': 'text' | 'blank', 'entry': 本地生成的页面条目}，其余为 None（可选）
+
+		返回:
+			{
+				'language': 'xx',
+				'pages': [
+					{'hash': 'xxx', 'source': 'cache', 'entry': {...}},  # 来自缓存
+					{'hash': 'zzz', 'source': 'text', 'entry': {...}},   # 原生数字页面，直接提取文字层
+					{'hash': 'www', 'source': 'blank', 'entry': {...}},  # 空白页，不发送给识别 API
+					{'hash': 'yyy', 'source': 'ocr'},                      # 需要识别
+					...
+				]
+			}
+		"""
+		pages = []
+		for index, page_hash in enumerate(page_hashes):
+			local_page = local_pages[index] if local_pages else None
+			if page_hash in cached:
+				pages.append({'hash': page_hash, 'source': 'cache', 'entry': cached[page_hash]})
+			elif local_page is not None:
+				pages.append({'hash': page_hash, 'source': local_page['source'], 'entry': local_page['entry']})
+			else:
+				pages.append({'hash': page_hash, 'source': 'ocr'})
+		return {'language': language, 'pages': pages}
+
+	@staticmethod
+	def ocrPageRanges(plan: Dict[str, Any]) -> PageRangeSet:
+		"""计划中需要识别的页码区间（从 1 开始，相对于裁剪后的 PDF）"""
+		return PageRangeSet.fromPages(
+			index for index, page in enumerate(plan['pages'], start=1) if page['source'] == 'ocr')
+
+	def savePlan(self, prefix: str, plan: Dict[str, Any]) -> bool:
+		"""将识别计划保存到结果目录"""
+		plan_file = BytesIO(json.dumps(plan, ensure_ascii=False).encode('utf-8'))
+		plan_file.name = self.PLAN_FILE_NAME
+		return self.blob_service.uploadFile(prefix, plan_file)
+
+	def loadPlan(self, prefix: str) -> Optional[Dict[str, Any]]:
+		"""读取结果目录中的识别计划，不存在时返回 None"""
+		try:
+			data = self.blob_service.downloadBlob(f"{prefix.rstrip('/')}/{self.PLAN_FILE_NAME}")
+			return json.loads(data.decode('utf-8'))
+		except FileNotFoundError:
+			return None
+
+	def applyPlan(self, plan: Dict[str, Any], ocr_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+		"""
+		按识别计划合并缓存页面、本地生成的页面与本次识别的页面，并将新识别的页面写入缓存
+
+		参数:
+			plan: 识别计划
+			ocr_result: 本次识别结果（只包含计划中 source 为 ocr 的页面）；全部命中缓存时为 None
+
+		返回:
+			dict: 合并后的完整识别结果
+		"""
+		ocr_pages = {page.get('pageNumber'): page for page in ResultService.splitPages(ocr_result)}
+		merged_pages = []
+		fresh_pages = {}
+		ocr_index = 0
+		for page in plan['pages']:
+			if page['source'] != 'ocr':
+				merged_pages.append(page['entry'])
+				continue
+			ocr_index += 1
+			if ocr_index not in ocr_pages:
+				# 识别结果缺少该页时保留空白页占位，但不写入缓存
+				merged_pages.append(ResultService.emptyPage())
+				continue
+			entry = dict(ocr_pages[ocr_index], pageNumber=1)
+			merged_pages.append(entry)
+			if page['hash']:
+				fresh_pages[page['hash']] = entry
+
+		try:
+			self.store(fresh_pages, plan.get('language', ''))
+		except Exception as e:
+			print(f"⚠️ 页面缓存写入失败: {e}")
+
+		return ResultService.mergePages(merged_pages, base=ocr_result)
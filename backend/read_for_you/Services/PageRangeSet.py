@@ -0,0 +1,108 @@
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+
+class PageRangeSet:
+	"""
+	页码区间集合（页码从 1 开始）
+
+	内部只保存排序、合并后的闭区间列表，如 "1-3,5,7-9" -> [(1, 3), (5, 5), (7, 9)]。
+	解析、裁剪、平移与序列化的开销只与区间个数有关，与区间覆盖的页数无关，
+	"1-1000000" 这样的输入不会展开成百万个页码。
+	"""
+
+	_TOKEN_PATTERN = re.compile(r'^(\d+)(?:\s*-\s*(\d+))?$')
+
+	def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+		self._intervals = self._merge(intervals)
+
+	@staticmethod
+	def _merge(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+		merged = []
+		for start, end in sorted(intervals):
+			if merged and start <= merged[-1][1] + 1:
+				merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+			else:
+				merged.append((start, end))
+		return merged
+
+	@classmethod
+	def parse(cls, pageRange: str) -> 'PageRangeSet':
+		"""
+		解析页码范围字符串，如 "3-6"、"5,7,9"、"1-3,5,7-9"
+
+		参数:
+			pageRange: 页码范围字符串；为空时返回空集合（调用方通常将其视为整本）
+
+		返回:
+			PageRangeSet；格式无效、页码小于 1 或起始页大于结束页时抛出 ValueError
+		"""
+		intervals = []
+		for token in (pageRange or '').split(','):
+			token = token.strip()
+			if not token:
+				continue
+			match = cls._TOKEN_PATTERN.match(token)
+			if not match:
+				raise ValueError(f"无效的页码范围: '{token}'")
+			start = int(match.group(1))
+			end = int(match.group(2)) if match.group(2) else start
+			if start < 1:
+				raise ValueError(f"页码必须从 1 开始: '{token}'")
+			if end < start:
+				raise ValueError(f"结束页码小于起始页码: '{token}'")
+			intervals.append((start, end))
+		return cls(intervals)
+
+	@classmethod
+	def fromPages(cls, pages: Iterable[int]) -> 'PageRangeSet':
+		"""由页码列表构建（列表无需排序或去重）"""
+		return cls((page, page) for page in pages)
+
+	@classmethod
+	def full(cls, total_pages: int) -> 'PageRangeSet':
+		"""覆盖 1 到 total_pages 的全部页面"""
+		return cls([(1, total_pages)] if total_pages > 0 else [])
+
+	@property
+	def intervals(self) -> List[Tuple[int, int]]:
+		return list(self._intervals)
+
+	def clamp(self, total_pages: int) -> 'PageRangeSet':
+		"""裁剪到文档实际页数范围内"""
+		return PageRangeSet(
+			(start, min(end, total_pages)) for start, end in self._intervals if start <= total_pages)
+
+	def normalized(self) -> 'PageRangeSet':
+		"""整体平移，使最小页码为 1（保留区间之间的间隔）"""
+		if not self._intervals:
+			return PageRangeSet()
+		offset = self._intervals[0][0] - 1
+		return PageRangeSet((start - offset, end - offset) for start, end in self._intervals)
+
+	def isFull(self, total_pages: int) -> bool:
+		"""是否恰好覆盖 1 到 total_pages 的全部页面"""
+		return total_pages > 0 and self._intervals == [(1, total_pages)]
+
+	def __len__(self) -> int:
+		return sum(end - start + 1 for start, end in self._intervals)
+
+	def __bool__(self) -> bool:
+		return bool(self._intervals)
+
+	def __iter__(self) -> Iterator[int]:
+		for start, end in self._intervals:
+			yield from range(start, end + 1)
+
+	def __contains__(self, page: int) -> bool:
+		return any(start <= page <= end for start, end in self._intervals)
+
+	def __eq__(self, other) -> bool:
+		return isinstance(other, PageRangeSet) and self._intervals == other._intervals
+
+	def __str__(self) -> str:
+		return ','.join(
+			str(start) if start == end else f"{start}-{end}" for start, end in self._intervals)
+
+	def __repr__(self) -> str:
+		return f"PageRangeSet('{self}')"
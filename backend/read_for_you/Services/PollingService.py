@@ -0,0 +1,393 @@
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from .PDFService import PDFService
+from .PageCacheService import PageCacheService
+from .ProcessingService import ProcessingService
+from .RecognitionServices import RecognitionServices
+from .ResultService import ResultService
+from .SqlService import SqlService
+from ..constants import (
+	RECOGNITION_POLLER_IN_PROCESS,
+	RECOGNITION_POLLER_TICK_SECONDS,
+	RECOGNITION_POLLER_MAX_CONCURRENCY,
+	RECOGNITION_POLL_MIN_SECONDS,
+	RECOGNITION_POLL_MAX_SECONDS,
+	RECOGNITION_SECONDS_PER_PAGE,
+	RECOGNITION_TASK_TIMEOUT_SECONDS,
+	RECOGNITION_POLLER_LEASE_BATCH,
+	RECOGNITION_POLLER_LEASE_SECONDS,
+	RECOGNITION_SHARD_CONCURRENCY,
+)
+
+class TaskEventHub:
+	"""
+	识别任务进度事件中心（进程内）
+
+	轮询器在任务状态变化时发布事件，SSE 连接在这里等待新事件。
+	每个任务只保留最新一条事件，阶段依次为:
+		queued -> running -> uploading -> completed / error
+	"""
+
+	TERMINAL_STAGES = ('completed', 'error')
+	# 终态事件保留时长（秒），超时后清理
+	RETENTION_SECONDS = 600
+
+	_instance = None
+	_instance_lock = threading.Lock()
+
+	def __init__(self):
+		self._cond = threading.Condition()
+		self._seq = 0
+		# request_id -> (seq, event)
+		self._latest: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+	@classmethod
+	def instance(cls) -> 'TaskEventHub':
+		"""获取进程内唯一的事件中心实例"""
+		with cls._instance_lock:
+			if cls._instance is None:
+				cls._instance = cls()
+			return cls._instance
+
+	def publish(self, request_id: str, stage: str, **extra):
+		"""发布任务阶段变化，与上一条阶段相同时忽略"""
+		with self._cond:
+			latest = self._latest.get(request_id)
+			if latest and latest[1]['stage'] == stage:
+				return
+			self._seq += 1
+			event = {'requestId': request_id, 'stage': stage, 'time': time.time(), **extra}
+			self._latest[request_id] = (self._seq, event)
+			self._prune()
+			self._cond.notify_all()
+
+	def latest(self, request_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+		"""获取任务的最新事件，没有时返回 None"""
+		with self._cond:
+			return self._latest.get(request_id)
+
+	def wait(self, request_id: str, after_seq: int, timeout: float) -> Optional[Tuple[int, Dict[str, Any]]]:
+		"""
+		等待任务出现序号大于 after_seq 的事件
+
+		返回:
+			(seq, event)，超时返回 None
+		"""
+		deadline = time.time() + timeout
+		with self._cond:
+			while True:
+				latest = self._latest.get(request_id)
+				if latest and latest[0] > after_seq:
+					return latest
+				remaining = deadline - time.time()
+				if remaining <= 0:
+					return None
+				self._cond.wait(remaining)
+
+	def _prune(self):
+		expire_before = time.time() - self.RETENTION_SECONDS
+		for request_id, (_, event) in list(self._latest.items()):
+			if event['stage'] in self.TERMINAL_STAGES and event['time'] < expire_before:
+				del self._latest[request_id]
+
+
+class RecognitionPoller:
+	"""
+	识别任务后台轮询器
+
+	一个进程内只有一个轮询线程，统一负责 Tasks 表中所有 Running 状态的任务：
+	按各任务自己的退避间隔调用 checkStatus，出站请求数量受线程池大小限制。
+	任务状态保存在数据库中，进程重启后会自动接管仍在 Running 的任务。
+
+	多个节点（或多个 worker 进程）同时运行时，每个轮询器通过 Tasks 表上的租约
+	（leaseOwner / leaseExpiry）认领互不重叠的一批任务，并在每个 tick 续租；
+	节点崩溃后其租约过期，任务会被其他节点接管。
+	"""
+
+	_instance = None
+	_instance_lock = threading.Lock()
+
+	# 停止时等待轮询线程结束当前 tick 的最长秒数
+	_STOP_JOIN_SECONDS = 10
+
+	def __init__(self):
+		# 租约持有者 ID：主机名 + 进程号 + 随机后缀
+		self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self.tick_seconds = RECOGNITION_POLLER_TICK_SECONDS
+		self.executor = ThreadPoolExecutor(
+			max_workers=RECOGNITION_POLLER_MAX_CONCURRENCY,
+			thread_name_prefix='recognition-poll')
+		# request_id -> 下一次允许轮询的时间戳
+		self.next_poll_at: Dict[str, float] = {}
+		# 正在轮询中的 request_id，避免同一任务被并发轮询
+		self.in_flight = set()
+		# 分片任务：request_id -> 分片列表，以及已完成分片的识别结果
+		self.shard_executor = ThreadPoolExecutor(
+			max_workers=RECOGNITION_SHARD_CONCURRENCY,
+			thread_name_prefix='recognition-shard-poll')
+		self.shards: Dict[str, List[Dict[str, Any]]] = {}
+		self.shard_results: Dict[str, Dict[int, Any]] = {}
+		self._lock = threading.Lock()
+		self._stop_event = threading.Event()
+		self._thread = None
+		# 本节点当前持有的任务数（最近一次认领的结果）
+		self.held = 0
+		# 空闲时（不持有任务且上次认领为空）跳过认领事务的间隔，以及下一次认领的时间戳
+		self.idle_seconds = 0.0
+		self.next_claim_at = 0.0
+		# 进程正常退出时释放租约，其他节点无需等待租约过期
+		atexit.register(self.stop)
+
+	@classmethod
+	def instance(cls) -> 'RecognitionPoller':
+		"""获取进程内唯一的轮询器实例"""
+		with cls._instance_lock:
+			if cls._instance is None:
+				cls._instance = cls()
+			return cls._instance
+
+	@classmethod
+	def ensureStarted(cls):
+		"""在允许进程内轮询时启动后台线程（可重复调用）"""
+		if RECOGNITION_POLLER_IN_PROCESS:
+			cls.instance().start()
+
+	def start(self):
+		"""启动后台轮询线程"""
+		with self._lock:
+			if self._thread and self._thread.is_alive():
+				return
+			self._stop_event.clear()
+			self._thread = threading.Thread(
+				target=self.run_forever, name='recognition-poller', daemon=True)
+			self._thread.start()
+			print("✅ 识别任务轮询器已启动")
+
+	def isRunning(self) -> bool:
+		"""本进程的后台轮询线程是否在运行"""
+		return self._thread is not None and self._thread.is_alive()
+
+	def pollNow(self, request_id: str) -> bool:
+		"""
+		在调用方线程中立即轮询单个任务（本进程没有运行轮询线程时，由阻塞模式的识别请求使用）
+
+		只在任务没有被其他轮询节点持有租约时认领并轮询，上游要求的重试间隔未到时跳过
+
+		返回:
+			bool: 本次是否轮询了该任务
+		"""
+		with self._lock:
+			if request_id in self.in_flight or time.time() < self.next_poll_at.get(request_id, 0):
+				return False
+		task_result = SqlService().acquire_task_lease(request_id, self.owner, RECOGNITION_POLLER_LEASE_SECONDS)
+		if not task_result['data']:
+			return False
+		with self._lock:
+			if request_id in self.in_flight:
+				return False
+			self.in_flight.add(request_id)
+		self._poll_task(task_result['data'])
+		return True
+
+	def stop(self):
+		"""停止后台轮询线程，等待当前 tick 结束后释放持有的租约（可重复调用）"""
+		self._stop_event.set()
+		thread = self._thread
+		if thread and thread.is_alive() and thread is not threading.current_thread():
+			thread.join(timeout=self._STOP_JOIN_SECONDS)
+			if thread.is_alive():
+				print(f"⚠️ 识别任务轮询器未在 {self._STOP_JOIN_SECONDS} 秒内停止，仍释放租约")
+
+		with self._lock:
+			held, self.held = self.held, 0
+		if held:
+			SqlService().release_task_leases(self.owner)
+
+	def run_forever(self):
+		"""轮询主循环，每个 tick 检查一次到期的任务"""
+		while not self._stop_event.is_set():
+			try:
+				self.tick()
+			except Exception as e:
+				print(f"❌ RecognitionPoller.tick Error: {e}")
+			self._stop_event.wait(self.tick_seconds)
+
+	def tick(self):
+		"""
+		续租并认领一批 Running 任务，将到期的任务提交到线程池轮询
+
+		本节点不持有任务且上次认领为空时，不必每个 tick 都执行认领事务：
+		空闲间隔从 tick_seconds 起逐次加倍，最长 RECOGNITION_POLL_MIN_SECONDS，空闲节点认领新任务的延迟不超过该值
+		"""
+		now = time.time()
+		if now < self.next_claim_at:
+			return
+
+		tasks_result = SqlService().acquire_task_leases(
+			self.owner, RECOGNITION_POLLER_LEASE_BATCH, RECOGNITION_POLLER_LEASE_SECONDS)
+		if not tasks_result['success']:
+			return
+
+		running_ids = set()
+		with self._lock:
+			self.held = len(tasks_result['data'])
+			if self.held:
+				self.idle_seconds = 0.0
+				self.next_claim_at = 0.0
+			else:
+				self.idle_seconds = min(max(self.idle_seconds * 2, self.tick_seconds), RECOGNITION_POLL_MIN_SECONDS)
+				self.next_claim_at = now + self.idle_seconds
+
+			for task in tasks_result['data']:
+				request_id = task['requestId']
+				running_ids.add(request_id)
+				if request_id in self.in_flight:
+					continue
+				if now < self.next_poll_at.get(request_id, 0):
+					continue
+				self.in_flight.add(request_id)
+				self.executor.submit(self._poll_task, task)
+
+			# 清理已经不再由本节点持有的任务的调度信息
+			for request_id in list(self.next_poll_at):
+				if request_id not in running_ids and request_id not in self.in_flight:
+					del self.next_poll_at[request_id]
+					self.shards.pop(request_id, None)
+					self.shard_results.pop(request_id, None)
+
+	def _poll_task(self, task: Dict[str, Any]):
+		"""轮询单个任务，并根据结果完成收尾或安排下一次轮询"""
+		request_id = task['requestId']
+		elapsed = float(task.get('elapsedSeconds') or 0)
+		events = TaskEventHub.instance()
+		try:
+			if elapsed > RECOGNITION_TASK_TIMEOUT_SECONDS:
+				SqlService().update_task_status(request_id, 'timeout', self.owner)
+				events.publish(request_id, 'error', error_msg='识别超时')
+				self._forget(request_id)
+				return
+
+			shards = self._shards_for(request_id)
+			if shards:
+				status_result = self._check_shards(request_id, shards)
+			else:
+				status_result = RecognitionServices.checkStatus(request_id)
+			status = status_result.get('status')
+
+			if status == 'success':
+				events.publish(request_id, 'uploading')
+				if ProcessingService.completeRecognition(request_id, status_result.get('result'), self.owner):
+					events.publish(request_id, 'completed')
+					self._forget(request_id)
+				else:
+					# 上传或状态更新失败，稍后重试；租约已被其他节点接管时该任务会在下一个 tick 被清理
+					self._schedule(request_id, RECOGNITION_POLL_MIN_SECONDS)
+			elif status in ('Running', 'retry'):
+				if status == 'retry':
+					# 查询状态暂时失败（网络、上游 5xx 或无效响应）：任务可能仍在运行，按退避间隔重试，超时后才放弃
+					print(f"⚠️ 查询识别状态失败，稍后重试: {request_id} - {status_result.get('error_message')}")
+				else:
+					events.publish(request_id, 'running')
+				page_count = PDFService.countPages(task.get('pageRange', ''))
+				if shards:
+					# 分片并发识别，预计耗时按单个分片的页数估算
+					page_count = max(shard['pages'] for shard in shards)
+				delay = self.computePollDelay(elapsed, page_count, status_result.get('retry_after', 0))
+				self._schedule(request_id, delay)
+			else:
+				error_msg = status_result.get('error_message') or f'未知状态: {status}'
+				SqlService().update_task_status(request_id, 'error', self.owner)
+				events.publish(request_id, 'error', error_msg=error_msg)
+				print(f"⚠️ 识别任务出错: {request_id} - {error_msg}")
+				self._forget(request_id)
+
+		except Exception as e:
+			print(f"❌ RecognitionPoller._poll_task Error: {e}")
+			self._schedule(request_id, RECOGNITION_POLL_MAX_SECONDS)
+		finally:
+			with self._lock:
+				self.in_flight.discard(request_id)
+
+	def _shards_for(self, request_id: str) -> List[Dict[str, Any]]:
+		"""获取分片任务的分片列表（从识别计划读取并缓存），普通任务返回空列表"""
+		if not ProcessingService.isLocalRequestId(request_id):
+			return []
+		with self._lock:
+			if request_id in self.shards:
+				return self.shards[request_id]
+		plan = PageCacheService().loadPlan(ProcessingService.getResultPrefix(request_id)) or {}
+		shards = plan.get('shards') or []
+		with self._lock:
+			self.shards[request_id] = shards
+		return shards
+
+	def _check_shards(self, request_id: str, shards: List[Dict[str, Any]]) -> Dict[str, Any]:
+		"""
+		并发轮询尚未完成的分片，全部完成后拼接为一份识别结果
+
+		返回:
+			与 RecognitionServices.checkStatus 相同格式的状态字典
+		"""
+		with self._lock:
+			done = self.shard_results.setdefault(request_id, {})
+			pending = [index for index in range(len(shards)) if index not in done]
+
+		def check(index):
+			return index, RecognitionServices.checkStatus(shards[index]['requestId'])
+
+		retry_after = 0
+		for index, status_result in self.shard_executor.map(check, pending):
+			status = status_result.get('status')
+			if status == 'success':
+				done[index] = status_result.get('result')
+			elif status in ('Running', 'retry'):
+				retry_after = max(retry_after, status_result.get('retry_after', 0))
+			else:
+				error_msg = status_result.get('error_message') or f'未知状态: {status}'
+				return {'status': 'error', 'error_message': f'分片 {index + 1}/{len(shards)} 识别出错: {error_msg}'}
+
+		if len(done) < len(shards):
+			return {'status': 'Running', 'retry_after': retry_after}
+
+		results = [done[index] for index in range(len(shards))]
+		return {'status': 'success', 'result': ResultService.stitchShards(results, [shard['pages'] for shard in shards])}
+
+	def _schedule(self, request_id: str, delay: float):
+		with self._lock:
+			self.next_poll_at[request_id] = time.time() + delay
+
+	def _forget(self, request_id: str):
+		with self._lock:
+			self.next_poll_at.pop(request_id, None)
+			self.shards.pop(request_id, None)
+			self.shard_results.pop(request_id, None)
+
+	@staticmethod
+	def computePollDelay(elapsed: float, page_count: int, retry_after: float = 0) -> float:
+		"""
+		计算下一次轮询前的等待秒数
+
+		参数:
+			elapsed: 任务已运行秒数
+			page_count: 任务页数（0 表示未知）
+			retry_after: 上游返回的 Retry-After 秒数
+
+		返回:
+			float: 介于最小与最大轮询间隔之间的等待秒数
+		"""
+		expected = max(page_count, 1) * RECOGNITION_SECONDS_PER_PAGE
+		if elapsed < expected:
+			# 预计尚未完成：每次等待剩余预计时间的一半
+			delay = (expected - elapsed) / 2
+		else:
+			# 超出预计时间：按超出部分线性退避
+			delay = RECOGNITION_POLL_MIN_SECONDS + (elapsed - expected) * 0.2
+
+		delay = max(delay, retry_after)
+		return min(max(delay, RECOGNITION_POLL_MIN_SECONDS), RECOGNITION_POLL_MAX_SECONDS)
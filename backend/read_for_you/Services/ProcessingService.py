@@ -1,7 +1,31 @@
 import asyncio
 import base64
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from urllib.parse import urlencode
+from django.core.files import File
+from django.urls import reverse
 from .PDFService import PDFService
+from .PDFWorkerService import PDFWorkerService
 from .RecognitionServices import RecognitionServices
+from .AzureBlobService import AzureBlobService
+from .SqlService import SqlService
+from .PageCacheService import PageCacheService
+from .PageRangeSet import PageRangeSet
+from .ResultService import ResultService
+from ..constants import (
+    RECOGNITION_SHARD_PAGES,
+    RECOGNITION_SHARD_CONCURRENCY,
+    BATCH_RECOGNITION_CONCURRENCY,
+    PDF_OPTIMIZE_ENABLED,
+    TEXT_LAYER_ENABLED,
+    BLANK_PAGE_PRUNING_ENABLED,
+    PAGE_CACHE_ENABLED,
+    BLOB_DOWNLOAD_MODE,
+)
 
 
 class ProcessingService:
@@ -49,4 +73,380 @@ class ProcessingService:
             'status': 'success',
             'result': api_response.text,
             'pdf': pdf_data_url  # 返回 base64 编码的 PDF
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def getResultPrefix(request_id: str) -> str:
+        """根据 request_id 的最后一段随机字符串得到结果在 Blob 中的目录前缀"""
+        request_id_suffix = request_id.rstrip('/').split('/')[-1]
+        return f"results_of_users/{request_id_suffix}"
+
+    @staticmethod
+    def computeContentDigest(pdf_file, normalized_page_range: str, language: str) -> str:
+        """
+        计算识别内容摘要：裁剪后的 PDF 内容 + 规范化页码范围 + 语言
+        相同摘要的识别结果可以直接复用（pdf_file 为文件对象，按块读取）
+        """
+        digest = PDFService.hashFile(pdf_file)
+        digest.update(b'\0' + normalized_page_range.encode('utf-8'))
+        digest.update(b'\0' + language.encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def newLocalRequestId() -> str:
+        """为不对应单个识别 API 请求的任务（分片识别、全部命中页面缓存）生成 request_id"""
+        return f"/local/analyzeResults/{uuid.uuid4()}"
+
+    @staticmethod
+    def isLocalRequestId(request_id: str) -> bool:
+        """是否为本地生成的 request_id（分片任务或全部命中缓存的任务）"""
+        return request_id.startswith('/local/')
+
+    @staticmethod
+    def submitRecognition(file, page_range, language, user_id, book_name):
+        """
+        提交识别任务，不等待识别完成
+
+        1. 调用 PDFService.extractPDF 裁剪 PDF
+        2. 按内容摘要查找已完成的相同识别任务，命中时直接复用其结果
+        3. 按页查询识别结果缓存，并直接提取原生数字页面的文字层，只把其余页面发送给识别 API
+        4. 调用异步API拿到request_id（所有页面都无需识别时直接生成结果）
+           需要识别的页数超过 RECOGNITION_SHARD_PAGES 时拆分为多个分片并发提交，
+           任务使用本地 request_id，分片的 request_id 记录在识别计划中
+        5. 将裁剪后的 PDF 与识别计划上传到 results_of_users/<id>/
+        6. 插入 Tasks 表记录，状态为 Running
+
+        返回:
+            {'success': True/False, 'request_id': 'xxx', 'pdf_file': 裁剪后的 PDF 临时文件, 'completed': True/False, 'error_msg': ''}
+            completed 为 True 表示任务已直接完成，无需等待轮询；pdf_file 使用完毕后需 close()
+        """
+        submission = ProcessingService._prepareSubmission(
+            file, page_range, language, AzureBlobService(), SqlService())
+        if not submission['success']:
+            return submission
+
+        insert_result = SqlService().insert_task(
+            user_id=user_id,
+            request_id=submission['request_id'],
+            book_name=book_name,
+            page_range=str(PageRangeSet.parse(page_range)),
+            status='Completed' if submission['completed'] else 'Running',
+            content_digest=submission['content_digest']
+        )
+        if not insert_result['success']:
+            print(f"⚠️ 数据库插入失败: {insert_result['error_msg']}")
+
+        return submission
+
+    @staticmethod
+    def submitRecognitionBatch(documents, language, user_id):
+        """
+        批量提交多个文档的识别任务
+
+        各文档以有限并发流水线处理：前一个文档上传识别时，后一个文档已在裁剪 PDF；
+        共用同一个 Blob 客户端，所有 Tasks 记录一次性批量插入。识别状态由后台轮询器统一轮询。
+
+        参数:
+            documents: [{'file': 上传的PDF文件对象, 'page_range': '1-3', 'book_name': 'xxx'}, ...]
+            language: 识别语言参数
+            user_id: 用户 ID
+
+        返回:
+            list: 与 documents 顺序一致的提交结果，格式同 submitRecognition（不含 pdf_file）
+        """
+        blob_service = AzureBlobService()
+        sql_service = SqlService()
+
+        def prepare(document):
+            try:
+                submission = ProcessingService._prepareSubmission(
+                    document['file'], document['page_range'], language, blob_service, sql_service)
+            except Exception as e:
+                print(f"❌ submitRecognitionBatch Error: {document['book_name']} - {e}")
+                return {'success': False, 'request_id': '', 'completed': False,
+                        'content_digest': '', 'error_msg': str(e)}
+            # 批量提交不返回 PDF，立即释放临时文件
+            pdf_file = submission.pop('pdf_file')
+            if pdf_file:
+                pdf_file.close()
+            return submission
+
+        with ThreadPoolExecutor(max_workers=BATCH_RECOGNITION_CONCURRENCY) as executor:
+            submissions = list(executor.map(prepare, documents))
+
+        rows = [{
+            'user_id': user_id,
+            'request_id': submission['request_id'],
+            'book_name': document['book_name'],
+            'page_range': str(PageRangeSet.parse(document['page_range'])),
+            'status': 'Completed' if submission['completed'] else 'Running',
+            'content_digest': submission['content_digest'],
+        } for document, submission in zip(documents, submissions) if submission['success']]
+
+        if rows:
+            insert_result = sql_service.insert_tasks(rows)
+            if not insert_result['success']:
+                print(f"⚠️ 数据库批量插入失败: {insert_result['error_msg']}")
+
+        return submissions
+
+    @staticmethod
+    def _prepareSubmission(file, page_range, language, blob_service, sql_service):
+        """
+        提交识别任务的准备工作（不插入 Tasks 记录）：裁剪 PDF、复用结果或调用识别 API、上传 PDF 与识别计划
+
+        返回:
+            {'success': True/False, 'request_id': 'xxx', 'pdf_file': 裁剪后的 PDF 临时文件, 'completed': True/False,
+             'content_digest': 'xxx', 'error_msg': ''}；页码范围无效或完全超出 PDF 页数时 success 为 False，pdf_file 为 None
+        """
+        # 使用 PDFService 裁剪 PDF，结果写入临时文件，后续摘要、识别 API 与 Blob 上传都从该文件流式读取
+        try:
+            pdf_file = PDFWorkerService.extractPDF(file, page_range)
+        except ValueError as e:
+            # 如 6 页的文档请求 "10-20"：裁剪后没有页面，不提交空任务
+            return {'success': False, 'request_id': '', 'pdf_file': None, 'completed': False,
+                    'content_digest': '', 'error_msg': str(e)}
+        try:
+            if PDF_OPTIMIZE_ENABLED:
+                pdf_file = ProcessingService._optimizePDF(pdf_file)
+            submission = ProcessingService._prepareExtracted(
+                pdf_file, page_range, language, blob_service, sql_service)
+        except Exception:
+            pdf_file.close()
+            raise
+        pdf_file.seek(0)
+        return submission
+
+    @staticmethod
+    def _optimizePDF(pdf_file):
+        """PDF 瘦身，返回瘦身后的临时文件（原文件被关闭）；瘦身失败时沿用原文件"""
+        try:
+            optimized_file, stats = PDFWorkerService.optimizePDF(pdf_file)
+        except Exception as e:
+            print(f"⚠️ {e}，使用原文件继续")
+            pdf_file.seek(0)
+            return pdf_file
+        pdf_file.close()
+        print(f"✅ PDF 瘦身: {stats['bytes_before']} -> {stats['bytes_after']} 字节"
+              f"（下采样 {stats['images_downsampled']} 张图片，合并 {stats['objects_deduplicated']} 个重复对象）")
+        return optimized_file
+
+    @staticmethod
+    def _analyzePages(pdf_file):
+        """
+        在一个工作进程任务中逐页计算摘要并分类，找出无需识别的页面：
+        原生数字页面直接提取文字层，空白页以空白页面条目占位
+
+        返回:
+            (page_hashes, local_pages)：
+            page_hashes 为按页顺序排列的页面摘要（未启用页面缓存时不计算摘要，均为 None）；
+            local_pages 按页顺序排列，无需识别的页面为 {'source': 'text' | 'blank', 'entry': 页面条目}，
+            其余为 None；文字层与空白页检测均未启用时为 None
+        """
+        try:
+            pages = PDFWorkerService.analyzePages(
+                pdf_file, PAGE_CACHE_ENABLED, TEXT_LAYER_ENABLED, BLANK_PAGE_PRUNING_ENABLED)
+        finally:
+            pdf_file.seek(0)
+
+        page_hashes = [page['hash'] for page in pages]
+        if not (TEXT_LAYER_ENABLED or BLANK_PAGE_PRUNING_ENABLED):
+            return page_hashes, None
+
+        local_pages = []
+        for page in pages:
+            if page['type'] == 'text':
+                local_pages.append({'source': 'text', 'entry': ResultService.textPage(page['paragraphs'])})
+            elif page['type'] == 'blank':
+                local_pages.append({'source': 'blank', 'entry': ResultService.emptyPage()})
+            else:
+                local_pages.append(None)
+        return page_hashes, local_pages
+
+    @staticmethod
+    def _prepareExtracted(pdf_file, page_range, language, blob_service, sql_service):
+        """_prepareSubmission 中 PDF 裁剪之后的步骤"""
+
+        # 将页码范围转换为从1开始（用于传给识别 API）
+        normalized_page_range = ''
+        if page_range:
+            normalized_page_range = PDFService.normalizePageRange(page_range)
+
+        content_digest = ProcessingService.computeContentDigest(pdf_file, normalized_page_range, language)
+
+        # 相同内容已识别完成：为当前用户插入一条指向同一结果的记录
+        existing = sql_service.find_completed_task_by_digest(content_digest)['data']
+        if existing:
+            request_id = existing['requestId']
+            print(f"✅ 复用已有识别结果: {request_id}")
+            return {'success': True, 'request_id': request_id, 'pdf_file': pdf_file, 'completed': True,
+                    'content_digest': content_digest, 'error_msg': ''}
+
+        # 按页查询缓存，生成识别计划
+        page_cache = PageCacheService(blob_service)
+        page_hashes, local_pages = ProcessingService._analyzePages(pdf_file)
+        plan = PageCacheService.buildPlan(
+            page_hashes, page_cache.lookup(page_hashes, language), language, local_pages)
+        plan['prunedPages'] = sum(1 for page in plan['pages'] if page['source'] == 'blank')
+        if plan['prunedPages']:
+            print(f"✅ 跳过空白页 {plan['prunedPages']} 页")
+        ocr_pages = PageCacheService.ocrPageRanges(plan)
+
+        if not ocr_pages:
+            # 全部命中缓存、均为原生数字页面或空白页：直接生成结果
+            request_id = ProcessingService.newLocalRequestId()
+            ProcessingService._uploadResultPDF(blob_service, request_id, pdf_file)
+            if not ProcessingService._uploadResultJson(blob_service, request_id, page_cache.applyPlan(plan, None)):
+                return {'success': False, 'request_id': '', 'pdf_file': pdf_file, 'completed': False,
+                        'content_digest': content_digest, 'error_msg': '识别结果上传失败'}
+            print(f"✅ 全部 {len(page_hashes)} 页无需识别（页面缓存、文字层或空白页）: {request_id}")
+            return {'success': True, 'request_id': request_id, 'pdf_file': pdf_file, 'completed': True,
+                    'content_digest': content_digest, 'error_msg': ''}
+
+        if len(ocr_pages) < len(page_hashes):
+            # 部分页面无需识别：只识别其余页面
+            ocr_file = PDFWorkerService.extractPDF(
+                pdf_file, str(ocr_pages))
+            pdf_file.seek(0)
+            print(f"✅ 无需识别 {len(page_hashes) - len(ocr_pages)}/{len(page_hashes)} 页（页面缓存、文字层或空白页）")
+        else:
+            ocr_file = pdf_file
+
+        # 调用异步识别 API 获取 request_id（页数较多时分片并发提交）
+        try:
+            if RECOGNITION_SHARD_PAGES and len(ocr_pages) > RECOGNITION_SHARD_PAGES:
+                shards = ProcessingService._submitShards(ocr_file, language)
+                if not shards:
+                    return {'success': False, 'request_id': '', 'pdf_file': pdf_file, 'completed': False,
+                            'content_digest': content_digest, 'error_msg': '调用异步识别 API 失败'}
+                request_id = ProcessingService.newLocalRequestId()
+                plan['shards'] = shards
+            else:
+                request_id = RecognitionServices.callAsyncRecognitionAPI(ocr_file, f"1-{len(ocr_pages)}", language)
+                if not request_id:
+                    return {'success': False, 'request_id': '', 'pdf_file': pdf_file, 'completed': False,
+                            'content_digest': content_digest, 'error_msg': '调用异步识别 API 失败'}
+        finally:
+            if ocr_file is not pdf_file:
+                ocr_file.close()
+            pdf_file.seek(0)
+
+        # 提前上传 PDF 与识别计划，识别完成时只需按计划合并并上传结果 JSON
+        ProcessingService._uploadResultPDF(blob_service, request_id, pdf_file)
+        page_cache.savePlan(ProcessingService.getResultPrefix(request_id), plan)
+
+        return {'success': True, 'request_id': request_id, 'pdf_file': pdf_file, 'completed': False,
+                'content_digest': content_digest, 'error_msg': ''}
+
+    @staticmethod
+    def _submitShards(ocr_file, language: str):
+        """
+        将待识别的 PDF 拆分为分片，并以有限并发提交给异步识别 API
+
+        返回:
+            list: [{'requestId': 'xxx', 'pages': 分片页数}, ...]；任一分片提交失败时返回空列表
+        """
+        def submit(shard):
+            shard_path, shard_pages = shard
+            with open(shard_path, 'rb') as shard_file:
+                return RecognitionServices.callAsyncRecognitionAPI(shard_file, f"1-{shard_pages}", language)
+
+        with TemporaryDirectory() as shard_dir:
+            shard_files = PDFWorkerService.splitPDF(ocr_file, RECOGNITION_SHARD_PAGES, shard_dir)
+            with ThreadPoolExecutor(max_workers=RECOGNITION_SHARD_CONCURRENCY) as executor:
+                shard_ids = list(executor.map(submit, shard_files))
+
+        if not all(shard_ids):
+            return []
+        print(f"✅ 已分 {len(shard_ids)} 个分片提交识别")
+        return [{'requestId': shard_id, 'pages': shard_pages}
+                for shard_id, (_, shard_pages) in zip(shard_ids, shard_files)]
+
+    @staticmethod
+    def completeRecognition(request_id: str, result_data, lease_owner: str = None) -> bool:
+        """
+        识别完成后的收尾工作：按识别计划合并缓存页面，上传结果 JSON，并将任务状态更新为 Completed
+
+        参数:
+            request_id: 异步识别请求 ID
+            result_data: 识别结果
+            lease_owner: 持有该任务租约的轮询节点 ID
+
+        返回:
+            bool: 结果 JSON 已上传且任务状态已更新为 Completed 时返回 True；
+            上传失败、数据库更新失败或租约已被其他节点接管（未更新任何行）时返回 False
+        """
+        blob_service = AzureBlobService()
+        page_cache = PageCacheService(blob_service)
+        plan = page_cache.loadPlan(ProcessingService.getResultPrefix(request_id))
+        if plan:
+            result_data = page_cache.applyPlan(plan, result_data)
+
+        if not ProcessingService._uploadResultJson(blob_service, request_id, result_data):
+            return False
+        update_result = SqlService().update_task_status(request_id, 'Completed', lease_owner)
+        if not update_result['success'] or not update_result['affected']:
+            print(f"⚠️ 任务状态未更新为 Completed（数据库错误或租约已失效）: {request_id}")
+            return False
+        return True
+
+    @staticmethod
+    def _uploadResultPDF(blob_service, request_id: str, pdf_file) -> bool:
+        pdf_file.seek(0)
+        return blob_service.uploadFile(ProcessingService.getResultPrefix(request_id), File(pdf_file, name="result.pdf"))
+
+    @staticmethod
+    def _uploadResultJson(blob_service, request_id: str, result_data) -> bool:
+        result_json_bytes = json.dumps(result_data, ensure_ascii=False, indent=2).encode('utf-8')
+        json_file = BytesIO(result_json_bytes)
+        json_file.name = "result.json"
+        return blob_service.uploadFile(ProcessingService.getResultPrefix(request_id), json_file)
+
+    @staticmethod
+    def getResultPdfBlobName(request_id: str) -> str:
+        return f"{ProcessingService.getResultPrefix(request_id)}/result.pdf"
+
+    @staticmethod
+    def getResultJsonBlobName(request_id: str) -> str:
+        return f"{ProcessingService.getResultPrefix(request_id)}/result.json"
+
+    @staticmethod
+    def getResultPdfUrl(request_id: str, blob_service=None) -> str:
+        """
+        结果 PDF 的下载地址：sas 模式为短期 SAS URL，
+        其他模式为后端的 getResultPDF（支持 Range 请求，redirect 模式下重定向到 SAS URL）
+        """
+        if BLOB_DOWNLOAD_MODE == 'sas':
+            return (blob_service or AzureBlobService()).getReadUrl(ProcessingService.getResultPdfBlobName(request_id))
+        return f"{reverse('getResultPDF')}?{urlencode({'requestId': request_id})}"
+
+    @staticmethod
+    def loadResult(request_id: str):
+        """
+        读取已完成任务的识别结果，PDF 只返回下载地址
+
+        proxy 模式下结果 JSON 直接内嵌；sas 与 redirect 模式下只返回结果 JSON 的下载地址，
+        由浏览器直接从 Blob Storage 下载
+
+        返回:
+            proxy:  {'status': 'success', 'result': <识别结果>, 'pdfUrl': '/getResultPDF?requestId=...'}
+            sas:    {'status': 'success', 'resultUrl': 'https://...?<sas>', 'pdfUrl': 'https://...?<sas>'}
+            redirect: {'status': 'success', 'resultUrl': '/getResultJSON?requestId=...', 'pdfUrl': '/getResultPDF?requestId=...'}
+        """
+        blob_service = AzureBlobService()
+        result = {'status': 'success', 'pdfUrl': ProcessingService.getResultPdfUrl(request_id, blob_service)}
+        if BLOB_DOWNLOAD_MODE == 'sas':
+            result['resultUrl'] = blob_service.getReadUrl(ProcessingService.getResultJsonBlobName(request_id))
+        elif BLOB_DOWNLOAD_MODE == 'redirect':
+            result['resultUrl'] = f"{reverse('getResultJSON')}?{urlencode({'requestId': request_id})}"
+        else:
+            result['result'] = ProcessingService.loadResultJson(request_id, blob_service)
+        return result
+
+    @staticmethod
+    def loadResultJson(request_id: str, blob_service=None):
+        """从 Azure Blob Storage 读取已完成任务的结果 JSON"""
+        blob_service = blob_service or AzureBlobService()
+        # 结果目录下还有 plan.json，按完整文件名下载
+        json_data = blob_service.downloadBlob(ProcessingService.getResultJsonBlobName(request_id))
+        return json.loads(json_data.decode('utf-8'))
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Any, Dict
+from typing import IO, Any, Dict, Union
 from django.conf import settings
 import requests
 import asyncio
@@ -8,7 +8,7 @@ from ..constants import RECOGNITION_BASE_URL, ASYNC_API_URL
 
 
 class RecognitionServices:
-	def callAsyncRecognitionAPI(file_data: bytes, normalized_page_range: str = '', language: str = '') -> requests.Response:
+	def callAsyncRecognitionAPI(file_data: Union[bytes, IO[bytes]], normalized_page_range: str = '', language: str = '') -> requests.Response:
 		api_url = RECOGNITION_BASE_URL + ASYNC_API_URL
 		if language:
 			api_url = f"{api_url}?language={language}"
@@ -18,6 +18,7 @@ class RecognitionServices:
 			'X-Page-Index-Range': normalized_page_range,
 		}
 		
+		# 传入文件对象时 requests 按块流式发送请求体
 		response = requests.post(api_url, data=file_data, headers=headers, timeout=3600)
 
 		if response.status_code == 202:
@@ -27,24 +28,38 @@ class RecognitionServices:
 			return ""
 
 	# Check the state of async task and get the result if successful.
+	# 网络错误、上游 5xx/429 与无效 JSON 视为暂时性失败，返回 status "retry"（上游任务可能仍在运行，由调用方稍后重试）
 	@staticmethod
 	def checkStatus(request_id: str) -> Dict[str, Any]:
 		try:
 			resp = requests.get(RECOGNITION_BASE_URL + request_id, timeout=10)
 		except Exception as ex:  # network or DNS errors
-			return {"status": "error", "error_message": f"request failed: {ex}"}
+			return {"status": "retry", "error_message": f"request failed: {ex}", "retry_after": 0}
+
+		if resp.status_code >= 500 or resp.status_code == 429:
+			return {"status": "retry", "error_message": f"upstream HTTP {resp.status_code}",
+				"retry_after": RecognitionServices._parse_retry_after(resp)}
 
 		try:
 			payload = resp.json()
-		except json.JSONDecodeError:
-			return {"status": "error", "error_message": "invalid JSON in upstream response"}
+		except ValueError:
+			return {"status": "retry", "error_message": "invalid JSON in upstream response", "retry_after": 0}
 
 		status= payload.get("status")
 		if status == "Running":
-			return {"status": status}
+			return {"status": status, "retry_after": RecognitionServices._parse_retry_after(resp)}
 		if status == "error":
 			err_msg = payload.get("error_message")
 			return {"status": "error", "error_message": err_msg}
 		if status == "Completed":
 			result = payload["result"]
-			return {"status": "success", "result": result}
\ No newline at end of file
+			return {"status": "success", "result": result}
+		return {"status": status}
+
+	@staticmethod
+	def _parse_retry_after(resp) -> float:
+		"""读取上游响应中的 Retry-After（秒），缺失或无法解析时返回 0"""
+		try:
+			return max(float(resp.headers.get("Retry-After", 0)), 0)
+		except (TypeError, ValueError):
+			return 0
\ No newline at end of file
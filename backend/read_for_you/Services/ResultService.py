@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional
+
+
+class ResultService:
+	"""识别结果 JSON 处理类：按页拆分与合并"""
+
+	@staticmethod
+	def splitPages(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+		"""
+		将识别结果按页拆分，并按 pageNumber 排序
+
+		参数:
+			result: 识别结果，格式如 {"pages": [{"pageNumber": 1, "elements": [...]}, ...], ...}
+
+		返回:
+			list: 页面条目列表
+		"""
+		if not isinstance(result, dict):
+			return []
+		pages = result.get('pages') or []
+		return sorted(pages, key=lambda page: page.get('pageNumber', 0))
+
+	@staticmethod
+	def emptyPage(page_number: int = 1) -> Dict[str, Any]:
+		"""生成一个不含任何元素的页面条目"""
+		return {'pageNumber': page_number, 'elements': []}
+
+	@staticmethod
+	def textPage(paragraphs: List[str], page_number: int = 1) -> Dict[str, Any]:
+		"""由段落文字生成与识别结果格式相同的页面条目"""
+		return {
+			'pageNumber': page_number,
+			'elements': [{
+				'type': 'paragraph',
+				'sequence': sequence,
+				'continueFromPrevious': False,
+				'properties': {'content': content},
+			} for sequence, content in enumerate(paragraphs)],
+		}
+
+	@staticmethod
+	def mergePages(pages: List[Dict[str, Any]], base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+		"""
+		按给定顺序合并页面条目，并将 pageNumber 重新编号为从 1 开始的连续页码
+
+		参数:
+			pages: 已按最终顺序排列的页面条目
+			base: 提供其他顶层字段的识别结果（可选）
+
+		返回:
+			dict: 合并后的识别结果
+		"""
+		merged = {key: value for key, value in (base or {}).items() if key != 'pages'}
+		merged['pages'] = []
+		for index, page in enumerate(pages, start=1):
+			page = dict(page)
+			page['pageNumber'] = index
+			merged['pages'].append(page)
+		return merged
+
+	@staticmethod
+	def stitchShards(results: List[Dict[str, Any]], shard_sizes: List[int]) -> Dict[str, Any]:
+		"""
+		按顺序拼接分片识别结果，修正页码
+
+		参数:
+			results: 各分片的识别结果，每个分片内页码从 1 开始
+			shard_sizes: 各分片的页数
+
+		返回:
+			dict: 与整体一次识别格式相同的识别结果（缺失的页面不补位，保持原页码）
+		"""
+		# 顶层字段取自第一个有效的分片结果
+		base = next((result for result in results if isinstance(result, dict)), {})
+		stitched = {key: value for key, value in base.items() if key != 'pages'}
+		stitched['pages'] = []
+		offset = 0
+		for result, size in zip(results, shard_sizes):
+			for page in ResultService.splitPages(result):
+				page_number = page.get('pageNumber', 0)
+				if 1 <= page_number <= size:
+					stitched['pages'].append(dict(page, pageNumber=offset + page_number))
+			offset += size
+		return stitched
@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+	__slots__ = ('done', 'result', 'error', 'waiters')
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+		self.waiters = 0
+
+
+class SingleFlight:
+	"""
+	合并并发的相同请求（single-flight）
+
+	同一时刻以相同 key 调用 do() 的多个线程中，只有第一个真正执行 fn，
+	其余线程等待它完成并得到同一个结果（或同一个异常）。fn 完成后 key 即被移除，
+	之后的调用会重新执行，不充当缓存。
+	"""
+
+	def __init__(self):
+		self._calls = {}
+		self._lock = threading.Lock()
+		self._executed = 0
+		self._coalesced = 0
+
+	def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+				self._executed += 1
+			else:
+				call.waiters += 1
+				self._coalesced += 1
+		if not leader:
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return call.result
+
+		try:
+			call.result = fn()
+			return call.result
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return {'executed': self._executed, 'coalesced': self._coalesced, 'in_flight': len(self._calls)}
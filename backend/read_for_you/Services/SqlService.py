@@ -88,7 +88,7 @@ class SqlService:
 			if connection:
 				connection.close()
 
-	def insert_task(self, user_id: str, request_id: str, book_name: str, page_range: str, status: str = 'pending') -> Dict[str, Any]:
+	def insert_task(self, user_id: str, request_id: str, book_name: str, page_range: str, status: str = 'pending', content_digest: str = None) -> Dict[str, Any]:
 		"""
 		插入一条新的任务记录
 
@@ -98,6 +98,7 @@ class SqlService:
 			book_name: 书籍名称
 			page_range: 页码范围
 			status: 任务状态，默认 'pending'
+			content_digest: 识别内容摘要（PDF 内容 + 页码范围 + 语言），用于复用识别结果
 
 		返回:
 			{'success': True/False, 'id': 插入的记录ID, 'error_msg': ''}
@@ -107,10 +108,10 @@ class SqlService:
 			connection = self._get_connection()
 			with connection.cursor() as cursor:
 				sql = """
-					INSERT INTO Tasks (userId, requestId, dateTime, bookName, pageRange, status)
-					VALUES (%s, %s, NOW(), %s, %s, %s)
+					INSERT INTO Tasks (userId, requestId, dateTime, bookName, pageRange, status, contentDigest)
+					VALUES (%s, %s, NOW(), %s, %s, %s, %s)
 				"""
-				cursor.execute(sql, (user_id, request_id, book_name, page_range, status))
+				cursor.execute(sql, (user_id, request_id, book_name, page_range, status, content_digest))
 				connection.commit()
 				return {
 					'success': True,
@@ -130,26 +131,77 @@ class SqlService:
 			if connection:
 				connection.close()
 
-	def update_task_status(self, request_id: str, status: str) -> Dict[str, Any]:
+	def insert_tasks(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+		"""
+		批量插入任务记录（单个连接、单次提交）
+
+		参数:
+			rows: [{'user_id', 'request_id', 'book_name', 'page_range', 'status', 'content_digest'}, ...]
+
+		返回:
+			{'success': True/False, 'affected': 插入的行数, 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				sql = """
+					INSERT INTO Tasks (userId, requestId, dateTime, bookName, pageRange, status, contentDigest)
+					VALUES (%s, %s, NOW(), %s, %s, %s, %s)
+				"""
+				affected = cursor.executemany(sql, [
+					(row['user_id'], row['request_id'], row['book_name'], row['page_range'],
+					 row.get('status', 'pending'), row.get('content_digest'))
+					for row in rows
+				])
+				connection.commit()
+				return {
+					'success': True,
+					'affected': affected,
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			print(f"❌ SqlService.insert_tasks Error: {e}")
+			return {
+				'success': False,
+				'affected': 0,
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
+
+	def update_task_status(self, request_id: str, status: str, lease_owner: str = None) -> Dict[str, Any]:
 		"""
 		更新任务状态
 
 		参数:
 			request_id: 异步识别请求 ID
 			status: 新状态
+			lease_owner: 轮询节点 ID；指定时只在该节点仍持有租约时更新，并同时释放租约
 
 		返回:
-			{'success': True/False, 'error_msg': ''}
+			{'success': True/False, 'affected': 更新的行数, 'error_msg': ''}
 		"""
 		connection = None
 		try:
 			connection = self._get_connection()
 			with connection.cursor() as cursor:
-				sql = "UPDATE Tasks SET status = %s WHERE requestId = %s"
-				cursor.execute(sql, (status, request_id))
+				if lease_owner:
+					sql = """
+						UPDATE Tasks SET status = %s, leaseOwner = NULL, leaseExpiry = NULL
+						WHERE requestId = %s AND leaseOwner = %s
+					"""
+					cursor.execute(sql, (status, request_id, lease_owner))
+				else:
+					sql = "UPDATE Tasks SET status = %s WHERE requestId = %s"
+					cursor.execute(sql, (status, request_id))
 				connection.commit()
 				return {
 					'success': True,
+					'affected': cursor.rowcount,
 					'error_msg': ''
 				}
 
@@ -157,9 +209,262 @@ class SqlService:
 			print(f"❌ SqlService.update_task_status Error: {e}")
 			return {
 				'success': False,
+				'affected': 0,
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
+
+	def get_task_by_request_id(self, request_id: str, user_id: str = None) -> Dict[str, Any]:
+		"""
+		根据 requestId 查询单条任务记录
+
+		参数:
+			request_id: 异步识别请求 ID
+			user_id: 用户 ID；指定时只查询该用户的记录（复用的识别结果会被多个用户共享）
+
+		返回:
+			{'success': True/False, 'data': 任务行（不存在时为 None）, 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				if user_id:
+					sql = "SELECT * FROM Tasks WHERE requestId = %s AND userId = %s ORDER BY id DESC LIMIT 1"
+					cursor.execute(sql, (request_id, user_id))
+				else:
+					sql = "SELECT * FROM Tasks WHERE requestId = %s ORDER BY id DESC LIMIT 1"
+					cursor.execute(sql, (request_id,))
+				row = cursor.fetchone()
+
+				if row and row.get('dateTime'):
+					row['dateTime'] = row['dateTime'].strftime(
+						'%Y-%m-%d %H:%M:%S')
+
+				return {
+					'success': True,
+					'data': row,
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			print(f"❌ SqlService.get_task_by_request_id Error: {e}")
+			return {
+				'success': False,
+				'data': None,
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
+
+
+	def find_completed_task_by_digest(self, content_digest: str) -> Dict[str, Any]:
+		"""
+		根据识别内容摘要查找已完成的任务
+
+		参数:
+			content_digest: 识别内容摘要
+
+		返回:
+			{'success': True/False, 'data': 任务行（不存在时为 None）, 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				sql = """
+					SELECT id, requestId, pageRange, status FROM Tasks
+					WHERE contentDigest = %s AND status = 'Completed'
+					ORDER BY id DESC LIMIT 1
+				"""
+				cursor.execute(sql, (content_digest,))
+				return {
+					'success': True,
+					'data': cursor.fetchone(),
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			print(f"❌ SqlService.find_completed_task_by_digest Error: {e}")
+			return {
+				'success': False,
+				'data': None,
 				'error_msg': str(e)
 			}
 
 		finally:
 			if connection:
-				connection.close()
\ No newline at end of file
+				connection.close()
+
+	def acquire_task_leases(self, owner: str, batch_size: int, lease_seconds: int) -> Dict[str, Any]:
+		"""
+		为轮询节点续租并认领一批 Running 任务
+
+		在同一个事务中：
+		1. 续租 owner 已持有的租约
+		2. 使用 SELECT ... FOR UPDATE SKIP LOCKED 认领未被持有或租约已过期的任务，
+		   多个节点并发认领时不会互相阻塞，也不会认领到同一行（SKIP LOCKED 需要 MySQL 8.0 及以上版本）
+		3. 返回 owner 当前持有的全部任务（附带 elapsedSeconds）
+
+		参数:
+			owner: 轮询节点 ID
+			batch_size: 单个节点最多同时持有的任务数
+			lease_seconds: 租约时长（秒）
+
+		返回:
+			{'success': True/False, 'count': 行数, 'data': [任务行], 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				connection.begin()
+
+				cursor.execute("""
+					UPDATE Tasks SET leaseExpiry = NOW() + INTERVAL %s SECOND
+					WHERE leaseOwner = %s AND status = 'Running'
+				""", (lease_seconds, owner))
+				# rowcount 不统计值未变化的行，这里单独计数
+				cursor.execute(
+					"SELECT COUNT(*) AS held FROM Tasks WHERE leaseOwner = %s AND status = 'Running'",
+					(owner,))
+				held = cursor.fetchone()['held']
+
+				capacity = batch_size - held
+				if capacity > 0:
+					cursor.execute("""
+						SELECT id FROM Tasks
+						WHERE status = 'Running'
+							AND (leaseOwner IS NULL OR leaseExpiry IS NULL OR leaseExpiry < NOW())
+						ORDER BY dateTime ASC
+						LIMIT %s
+						FOR UPDATE SKIP LOCKED
+					""", (capacity,))
+					ids = [row['id'] for row in cursor.fetchall()]
+					if ids:
+						placeholders = ', '.join(['%s'] * len(ids))
+						cursor.execute(f"""
+							UPDATE Tasks SET leaseOwner = %s, leaseExpiry = NOW() + INTERVAL %s SECOND
+							WHERE id IN ({placeholders})
+						""", (owner, lease_seconds, *ids))
+
+				cursor.execute("""
+					SELECT id, userId, requestId, bookName, pageRange, status,
+						TIMESTAMPDIFF(SECOND, dateTime, NOW()) AS elapsedSeconds
+					FROM Tasks WHERE leaseOwner = %s AND status = 'Running'
+					ORDER BY dateTime ASC
+				""", (owner,))
+				rows = cursor.fetchall()
+				connection.commit()
+
+				return {
+					'success': True,
+					'count': len(rows),
+					'data': rows,
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			if connection:
+				connection.rollback()
+			print(f"❌ SqlService.acquire_task_leases Error: {e}")
+			return {
+				'success': False,
+				'count': 0,
+				'data': [],
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
+
+	def acquire_task_lease(self, request_id: str, owner: str, lease_seconds: int) -> Dict[str, Any]:
+		"""
+		认领（或续租）单个 Running 任务的租约，任务已被其他节点持有且租约未过期时不认领
+
+		参数:
+			request_id: 任务的 request_id
+			owner: 轮询节点 ID
+			lease_seconds: 租约时长（秒）
+
+		返回:
+			{'success': True/False, 'data': 任务行（附带 elapsedSeconds），未认领时为 None, 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				cursor.execute("""
+					UPDATE Tasks SET leaseOwner = %s, leaseExpiry = NOW() + INTERVAL %s SECOND
+					WHERE requestId = %s AND status = 'Running'
+						AND (leaseOwner IS NULL OR leaseOwner = %s OR leaseExpiry IS NULL OR leaseExpiry < NOW())
+				""", (owner, lease_seconds, request_id, owner))
+				# rowcount 不统计值未变化的行，按持有者重新查询
+				cursor.execute("""
+					SELECT id, userId, requestId, bookName, pageRange, status,
+						TIMESTAMPDIFF(SECOND, dateTime, NOW()) AS elapsedSeconds
+					FROM Tasks WHERE requestId = %s AND leaseOwner = %s AND status = 'Running'
+					ORDER BY id DESC LIMIT 1
+				""", (request_id, owner))
+				row = cursor.fetchone()
+				connection.commit()
+				return {
+					'success': True,
+					'data': row,
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			if connection:
+				connection.rollback()
+			print(f"❌ SqlService.acquire_task_lease Error: {e}")
+			return {
+				'success': False,
+				'data': None,
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
+
+	def release_task_leases(self, owner: str) -> Dict[str, Any]:
+		"""
+		释放轮询节点持有的全部租约，使其他节点可以立即接管
+
+		参数:
+			owner: 轮询节点 ID
+
+		返回:
+			{'success': True/False, 'affected': 释放的行数, 'error_msg': ''}
+		"""
+		connection = None
+		try:
+			connection = self._get_connection()
+			with connection.cursor() as cursor:
+				sql = "UPDATE Tasks SET leaseOwner = NULL, leaseExpiry = NULL WHERE leaseOwner = %s"
+				cursor.execute(sql, (owner,))
+				connection.commit()
+				return {
+					'success': True,
+					'affected': cursor.rowcount,
+					'error_msg': ''
+				}
+
+		except Exception as e:
+			print(f"❌ SqlService.release_task_leases Error: {e}")
+			return {
+				'success': False,
+				'affected': 0,
+				'error_msg': str(e)
+			}
+
+		finally:
+			if connection:
+				connection.close()
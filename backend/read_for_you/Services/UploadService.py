@@ -0,0 +1,103 @@
+import io
+import re
+import uuid
+from typing import Any, Dict, List
+from .AzureBlobService import AzureBlobService
+from .BlobFile import BlobFile
+from ..constants import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_CHUNKS
+
+
+class UploadService:
+	"""
+	分块续传上传
+
+	客户端把文件切成固定大小的分块，每个分块直接暂存为块 blob 的未提交块
+	（uploads/<userId>/<uploadId>），全部上传后按顺序提交块列表。
+	上传进度完全由 Blob Storage 中已暂存的块决定，不需要额外的数据库记录，
+	重试时只需补传缺失的分块；未提交的块会在 7 天后由 Azure 自动清理。
+	"""
+
+	UPLOAD_PREFIX = 'uploads'
+	_UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+	def __init__(self, blob_service: AzureBlobService = None):
+		self.blob_service = blob_service or AzureBlobService()
+
+	@staticmethod
+	def newUploadId() -> str:
+		return uuid.uuid4().hex
+
+	@staticmethod
+	def _blob_name(user_id: str, upload_id: str) -> str:
+		if not UploadService._UPLOAD_ID_PATTERN.match(upload_id or ''):
+			raise ValueError('uploadId 无效')
+		if not user_id or '/' in user_id or '..' in user_id:
+			raise ValueError('用户 ID 无效')
+		return f"{UploadService.UPLOAD_PREFIX}/{user_id}/{upload_id}.pdf"
+
+	@staticmethod
+	def _block_id(index: int) -> str:
+		# 同一 blob 的所有块 ID 长度必须一致
+		return f"{index:08d}"
+
+	def stageChunk(self, user_id: str, upload_id: str, index: int, data: bytes) -> Dict[str, Any]:
+		"""
+		暂存一个分块（重复上传同一序号的分块会覆盖之前的内容）
+
+		返回:
+			{'success': True/False, 'error_msg': ''}
+		"""
+		if not 0 <= index < UPLOAD_MAX_CHUNKS:
+			return {'success': False, 'error_msg': f'分块序号超出范围 (0-{UPLOAD_MAX_CHUNKS - 1})'}
+		if not data:
+			return {'success': False, 'error_msg': '分块内容为空'}
+		if len(data) > UPLOAD_CHUNK_SIZE:
+			return {'success': False, 'error_msg': f'分块大小超过 {UPLOAD_CHUNK_SIZE} 字节'}
+
+		self.blob_service.stageBlock(self._blob_name(user_id, upload_id), self._block_id(index), data)
+		return {'success': True, 'error_msg': ''}
+
+	def receivedChunks(self, user_id: str, upload_id: str) -> List[int]:
+		"""已暂存的分块序号（升序）"""
+		_, block_ids = self.blob_service.getBlockIds(self._blob_name(user_id, upload_id))
+		return sorted(int(block_id) for block_id in block_ids if block_id.isdigit())
+
+	def commit(self, user_id: str, upload_id: str, total_chunks: int) -> Dict[str, Any]:
+		"""
+		按顺序提交全部分块
+
+		返回:
+			{'success': True/False, 'blob_name': 'xxx', 'missing': [缺失的分块序号], 'error_msg': ''}
+		"""
+		blob_name = self._blob_name(user_id, upload_id)
+		if not 0 < total_chunks <= UPLOAD_MAX_CHUNKS:
+			return {'success': False, 'blob_name': blob_name, 'missing': [], 'error_msg': 'totalChunks 无效'}
+
+		block_ids = [self._block_id(index) for index in range(total_chunks)]
+		committed, uncommitted = self.blob_service.getBlockIds(blob_name)
+		if not uncommitted and committed == block_ids:
+			# 之前已提交过（例如提交后识别失败，客户端重试）
+			return {'success': True, 'blob_name': blob_name, 'missing': [], 'error_msg': ''}
+
+		received = set(uncommitted)
+		missing = [index for index, block_id in enumerate(block_ids) if block_id not in received]
+		if missing:
+			return {'success': False, 'blob_name': blob_name, 'missing': missing, 'error_msg': '存在未上传的分块'}
+
+		self.blob_service.commitBlocks(blob_name, block_ids, content_type='application/pdf')
+		print(f"✅ 分块上传完成: {blob_name} ({total_chunks} 块)")
+		return {'success': True, 'blob_name': blob_name, 'missing': [], 'error_msg': ''}
+
+	def open(self, user_id: str, upload_id: str, file_name: str = '') -> io.BufferedReader:
+		"""
+		打开已提交的上传文件，不下载到本地：读取时按需从 Blob Storage 分块获取（见 BlobFile），
+		PDF 工作进程裁剪时直接按 blob 名称读取用到的部分
+
+		返回:
+			只读文件对象，指针位于文件开头，name 为原始文件名；文件不存在时抛出 FileNotFoundError
+		"""
+		return BlobFile.open(self.blob_service, self._blob_name(user_id, upload_id), name=file_name or f"{upload_id}.pdf")
+
+	def discard(self, user_id: str, upload_id: str) -> bool:
+		"""删除已提交的上传文件"""
+		return self.blob_service.deleteBlob(self._blob_name(user_id, upload_id))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -24,4 +25,102 @@ MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
 MYSQL_PORT = int(os.getenv('MYSQL_PORT', '3306'))
 MYSQL_USER = os.getenv('MYSQL_USER', 'root')
 MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
-MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'readforyou')
\ No newline at end of file
+MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'readforyou')
+
+# 识别任务后台轮询
+RECOGNITION_POLLER_IN_PROCESS = os.getenv('RECOGNITION_POLLER_IN_PROCESS', 'true').lower() == 'true'
+RECOGNITION_POLLER_TICK_SECONDS = float(os.getenv('RECOGNITION_POLLER_TICK_SECONDS', '1'))
+RECOGNITION_POLLER_MAX_CONCURRENCY = int(os.getenv('RECOGNITION_POLLER_MAX_CONCURRENCY', '8'))
+RECOGNITION_POLL_MIN_SECONDS = float(os.getenv('RECOGNITION_POLL_MIN_SECONDS', '2'))
+RECOGNITION_POLL_MAX_SECONDS = float(os.getenv('RECOGNITION_POLL_MAX_SECONDS', '60'))
+RECOGNITION_SECONDS_PER_PAGE = float(os.getenv('RECOGNITION_SECONDS_PER_PAGE', '3'))
+RECOGNITION_TASK_TIMEOUT_SECONDS = int(os.getenv('RECOGNITION_TASK_TIMEOUT_SECONDS', '3600'))
+RECOGNITION_POLLER_LEASE_BATCH = int(os.getenv('RECOGNITION_POLLER_LEASE_BATCH', '200'))
+RECOGNITION_POLLER_LEASE_SECONDS = int(os.getenv('RECOGNITION_POLLER_LEASE_SECONDS', '30'))
+RECOGNITION_EVENTS_KEEPALIVE_SECONDS = float(os.getenv('RECOGNITION_EVENTS_KEEPALIVE_SECONDS', '15'))
+# 每个 SSE 响应最长保持时间（秒）：同步 worker 不会被一个任务长期占用，到期后结束响应，由 EventSource 自动重连
+RECOGNITION_EVENTS_STREAM_SECONDS = float(os.getenv('RECOGNITION_EVENTS_STREAM_SECONDS', '25'))
+RECOGNITION_EVENTS_RETRY_MS = int(os.getenv('RECOGNITION_EVENTS_RETRY_MS', '1000'))
+
+# 按页缓存识别结果
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_CACHE_LOOKUP_CONCURRENCY = int(os.getenv('PAGE_CACHE_LOOKUP_CONCURRENCY', '16'))
+
+
+# 大页码范围分片识别
+RECOGNITION_SHARD_PAGES = int(os.getenv('RECOGNITION_SHARD_PAGES', '50'))
+RECOGNITION_SHARD_CONCURRENCY = int(os.getenv('RECOGNITION_SHARD_CONCURRENCY', '4'))
+
+# 多文档批量识别
+BATCH_RECOGNITION_MAX_FILES = int(os.getenv('BATCH_RECOGNITION_MAX_FILES', '20'))
+BATCH_RECOGNITION_CONCURRENCY = int(os.getenv('BATCH_RECOGNITION_CONCURRENCY', '3'))
+
+# 分块续传上传
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+UPLOAD_MAX_CHUNKS = int(os.getenv('UPLOAD_MAX_CHUNKS', '5000'))
+
+# PDF 引擎：pypdf2（默认）、pymupdf、pikepdf，可用 scripts/benchmark_pdf_engines.py 对比
+PDF_ENGINE = os.getenv('PDF_ENGINE', 'pypdf2')
+
+# PDF 裁剪结果在内存中最多缓存的字节数，超过后写入临时文件
+PDF_SPOOL_MAX_MEMORY = int(os.getenv('PDF_SPOOL_MAX_MEMORY', str(8 * 1024 * 1024)))
+
+# PDF 处理工作进程
+PDF_WORKER_ENABLED = os.getenv('PDF_WORKER_ENABLED', 'true').lower() == 'true'
+PDF_WORKER_MAX_PROCESSES = int(os.getenv('PDF_WORKER_MAX_PROCESSES', str(os.cpu_count() or 2)))
+PDF_WORKER_TIMEOUT_SECONDS = float(os.getenv('PDF_WORKER_TIMEOUT_SECONDS', '300'))
+PDF_WORKER_MEMORY_MB = int(os.getenv('PDF_WORKER_MEMORY_MB', '2048'))
+
+# PDF 瘦身（下采样图片、合并重复资源、压缩内容流）
+PDF_OPTIMIZE_ENABLED = os.getenv('PDF_OPTIMIZE_ENABLED', 'false').lower() == 'true'
+PDF_OPTIMIZE_TARGET_DPI = int(os.getenv('PDF_OPTIMIZE_TARGET_DPI', '150'))
+PDF_OPTIMIZE_JPEG_QUALITY = int(os.getenv('PDF_OPTIMIZE_JPEG_QUALITY', '75'))
+
+# 原生数字页面直接提取文字层，跳过识别
+TEXT_LAYER_ENABLED = os.getenv('TEXT_LAYER_ENABLED', 'true').lower() == 'true'
+TEXT_LAYER_MIN_CHARS = int(os.getenv('TEXT_LAYER_MIN_CHARS', '50'))
+TEXT_LAYER_MAX_IMAGE_COVERAGE = float(os.getenv('TEXT_LAYER_MAX_IMAGE_COVERAGE', '0.5'))
+
+# 空白页剪除：不发送给识别 API，结果中以空白页占位
+BLANK_PAGE_PRUNING_ENABLED = os.getenv('BLANK_PAGE_PRUNING_ENABLED', 'true').lower() == 'true'
+BLANK_PAGE_MAX_IMAGE_COVERAGE = float(os.getenv('BLANK_PAGE_MAX_IMAGE_COVERAGE', '0.01'))
+BLANK_PAGE_MAX_INK_RATIO = float(os.getenv('BLANK_PAGE_MAX_INK_RATIO', '0.00001'))
+
+# PDF 与结果 JSON 的下载方式：proxy（经由后端转发）、sas（返回短期只读 SAS URL）、redirect（后端 302 重定向到 SAS URL）
+BLOB_DOWNLOAD_MODE = os.getenv('BLOB_DOWNLOAD_MODE', 'proxy').lower()
+BLOB_SAS_EXPIRY_MINUTES = int(os.getenv('BLOB_SAS_EXPIRY_MINUTES', '15'))
+
+# 页面图片：进程内 LRU 缓存容量与浏览器缓存时间
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+IMAGE_CACHE_MAX_ITEM_BYTES = int(os.getenv('IMAGE_CACHE_MAX_ITEM_BYTES', str(4 * 1024 * 1024)))
+# LRU 缓存条目超过该时间（秒）后，下次命中时用缓存的 ETag 向 Blob Storage 确认版本（未变化时只续期）
+IMAGE_CACHE_TTL_SECONDS = int(os.getenv('IMAGE_CACHE_TTL_SECONDS', '300'))
+IMAGE_HTTP_MAX_AGE_SECONDS = int(os.getenv('IMAGE_HTTP_MAX_AGE_SECONDS', str(30 * 24 * 3600)))
+IMAGE_BATCH_MAX_URLS = int(os.getenv('IMAGE_BATCH_MAX_URLS', '200'))
+IMAGE_BATCH_CONCURRENCY = int(os.getenv('IMAGE_BATCH_CONCURRENCY', '8'))
+
+# Blob 对冲读取：首个请求超过延迟分位数仍未返回时再发一个相同请求，先返回者胜出
+BLOB_HEDGE_ENABLED = os.getenv('BLOB_HEDGE_ENABLED', 'true').lower() == 'true'
+BLOB_HEDGE_PERCENTILE = float(os.getenv('BLOB_HEDGE_PERCENTILE', '95'))
+BLOB_HEDGE_INITIAL_DELAY_MS = float(os.getenv('BLOB_HEDGE_INITIAL_DELAY_MS', '500'))
+BLOB_HEDGE_MIN_DELAY_MS = float(os.getenv('BLOB_HEDGE_MIN_DELAY_MS', '50'))
+BLOB_HEDGE_MAX_EXTRA_RATIO = float(os.getenv('BLOB_HEDGE_MAX_EXTRA_RATIO', '0.05'))
+BLOB_HEDGE_WINDOW = int(os.getenv('BLOB_HEDGE_WINDOW', '1000'))
+BLOB_HEDGE_MAX_WORKERS = int(os.getenv('BLOB_HEDGE_MAX_WORKERS', '64'))
+# 首个响应（download_blob() 返回时已收到的数据）的大小上限：延迟只反映首字节时间而不是整个下载，其余部分分块并发下载
+BLOB_HEDGE_FIRST_CHUNK_BYTES = int(os.getenv('BLOB_HEDGE_FIRST_CHUNK_BYTES', str(4 * 1024 * 1024)))
+# 单次 Blob 读取请求的超时（秒）：传给 download_blob(timeout=...)，也是对冲读取等待结果的期限
+BLOB_READ_TIMEOUT_SECONDS = int(os.getenv('BLOB_READ_TIMEOUT_SECONDS', '60'))
+
+# Blob 磁盘缓存：同一节点的 worker 进程共享，按 blob 名称与 ETag 缓存，超过容量时淘汰最久未使用的文件
+# TTL 规则为 "前缀=秒数" 列表，只缓存匹配的前缀；未知 ETag 时，距上次确认不超过 TTL 的缓存直接使用
+BLOB_DISK_CACHE_ENABLED = os.getenv('BLOB_DISK_CACHE_ENABLED', 'true').lower() == 'true'
+BLOB_DISK_CACHE_DIR = os.getenv('BLOB_DISK_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'read_for_you_blob_cache'))
+BLOB_DISK_CACHE_MAX_BYTES = int(os.getenv('BLOB_DISK_CACHE_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+BLOB_DISK_CACHE_MAX_ITEM_BYTES = int(os.getenv('BLOB_DISK_CACHE_MAX_ITEM_BYTES', str(256 * 1024 * 1024)))
+BLOB_DISK_CACHE_TTL_RULES = os.getenv('BLOB_DISK_CACHE_TTL_RULES', 'zbooksnap/=86400,results_of_users/=600')
+# 磁盘缓存未命中时在后台整体下载写入缓存，每个进程同时进行的后台下载数
+BLOB_DISK_CACHE_FILL_CONCURRENCY = int(os.getenv('BLOB_DISK_CACHE_FILL_CONCURRENCY', '2'))
+
+# Blob 名称索引：由书籍列表（metadata/books_list.json）生成，超过该时间后重新加载
+BLOB_NAME_INDEX_TTL_SECONDS = int(os.getenv('BLOB_NAME_INDEX_TTL_SECONDS', '3600'))
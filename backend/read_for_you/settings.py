@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -67,6 +68,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "https://readforyou.xyz",
 ]
+# pdf.js 跨域按 Range 分段读取 PDF 时需要发送 Range 请求头并读取以下响应头
+CORS_ALLOW_HEADERS = list(default_headers) + ["range"]
+CORS_EXPOSE_HEADERS = ["Accept-Ranges", "Content-Range", "Content-Length"]
 
 
 ROOT_URLCONF = "read_for_you.urls"
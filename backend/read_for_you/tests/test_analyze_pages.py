@@ -0,0 +1,168 @@
+import zlib
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from read_for_you.Services import PDFService as pdf_module
+from read_for_you.Services.PDFService import PDFService
+
+
+SENTENCE = 'The quick brown fox jumps over the lazy dog.'
+
+
+def _image(writer, width, height, data):
+	image = DecodedStreamObject()
+	image.set_data(zlib.compress(data))
+	image.update({
+		NameObject('/Type'): NameObject('/XObject'),
+		NameObject('/Subtype'): NameObject('/Image'),
+		NameObject('/Width'): NumberObject(width),
+		NameObject('/Height'): NumberObject(height),
+		NameObject('/ColorSpace'): NameObject('/DeviceGray'),
+		NameObject('/BitsPerComponent'): NumberObject(8),
+		NameObject('/Filter'): NameObject('/FlateDecode'),
+	})
+	return writer._add_object(image)
+
+
+def _text(*lines):
+	"""逐行绘制文字的内容流"""
+	shown = ' '.join(f'({line}) Tj T*' for line in lines)
+	return f'BT /F1 10 Tf 12 TL 20 180 Td {shown} ET'
+
+
+def _pdf(*pages):
+	"""pages 为 (内容流, 图片 (宽, 高, 像素) 或 None)，页面大小 200x200pt"""
+	writer = PdfWriter()
+	for contents, image in pages:
+		writer.add_blank_page(width=200, height=200)
+		page = writer.pages[-1]
+		if contents:
+			stream = DecodedStreamObject()
+			stream.set_data(contents.encode())
+			page[NameObject('/Contents')] = writer._add_object(stream)
+		resources = DictionaryObject({NameObject('/Font'): DictionaryObject({NameObject('/F1'): DictionaryObject({
+			NameObject('/Type'): NameObject('/Font'),
+			NameObject('/Subtype'): NameObject('/Type1'),
+			NameObject('/BaseFont'): NameObject('/Helvetica'),
+		})})})
+		if image:
+			resources[NameObject('/XObject')] = DictionaryObject({NameObject('/Im1'): _image(writer, *image)})
+		page[NameObject('/Resources')] = resources
+	output = BytesIO()
+	writer.write(output)
+	output.seek(0)
+	return output
+
+
+def _types(file, **kwargs):
+	return [page['type'] for page in PDFService.analyzePages(file, hash_pages=False, **kwargs)]
+
+
+def test_native_text_page_is_extracted():
+	pages = PDFService.analyzePages(_pdf((_text(SENTENCE, SENTENCE), None)))
+
+	assert pages[0]['type'] == 'text'
+	assert pages[0]['paragraphs'] == [f'{SENTENCE} {SENTENCE}']
+	assert len(pages[0]['hash']) == 64
+
+
+def test_short_text_page_is_scanned():
+	assert _types(_pdf((_text('Page 3'), None))) == ['scanned']
+
+
+def test_text_over_full_page_image_is_scanned():
+	# 扫描页：一整页图片加一层隐藏文字
+	contents = f'q 200 0 0 200 0 0 cm /Im1 Do Q 3 Tr {_text(SENTENCE, SENTENCE)}'
+	assert _types(_pdf((contents, (10, 10, bytes(100))))) == ['scanned']
+
+
+def test_text_with_small_image_is_text():
+	contents = f'q 50 0 0 50 0 0 cm /Im1 Do Q {_text(SENTENCE, SENTENCE)}'
+	assert _types(_pdf((contents, (10, 10, bytes(100))))) == ['text']
+
+
+def test_text_detection_disabled():
+	file = _pdf((_text(SENTENCE, SENTENCE), None))
+	assert _types(file, detect_text=False) == ['scanned']
+	assert _types(file, detect_text=False, detect_blank=False) == ['scanned']
+
+
+def test_min_chars_threshold(monkeypatch):
+	monkeypatch.setattr(pdf_module, 'TEXT_LAYER_MIN_CHARS', 5)
+	assert _types(_pdf((_text('Page 3'), None))) == ['text']
+
+
+@pytest.mark.parametrize('text, usable', [
+	('a' * 50, True),
+	('a ' * 49, False),
+	('a' * 95 + '�' * 5, True),
+	('a' * 94 + '�' * 6, False),
+	('a' * 90 + '\x01' * 10, False),
+])
+def test_is_usable_text(text, usable):
+	assert PDFService._is_usable_text(text, 50) is usable
+
+
+@pytest.mark.parametrize('text, paragraphs', [
+	('first line\nsecond line', ['first line second line']),
+	('first\n\nsecond', ['first', 'second']),
+	('a long line that wraps to the\nend.\nNew paragraph here', ['a long line that wraps to the end.', 'New paragraph here']),
+	('hyphen-\nated word', ['hyphenated word']),
+	('Well-\nKnown', ['Well- Known']),
+	('中文第一行\n中文第二行', ['中文第一行中文第二行']),
+	('一段很长很长很长的中文\n结束。\n下一段', ['一段很长很长很长的中文结束。', '下一段']),
+	('  \n\n  ', []),
+])
+def test_split_paragraphs(text, paragraphs):
+	assert PDFService._split_paragraphs(text) == paragraphs
+
+
+def _scan(ink_rows=0, size=100):
+	"""铺满整页的白色扫描图片，顶部 ink_rows 行画黑"""
+	pixels = bytearray(b'\xff' * size * size)
+	margin = size // 10
+	for row in range(margin, margin + ink_rows):
+		pixels[row * size:(row + 1) * size] = bytes(size)
+	return ('q 200 0 0 200 0 0 cm /Im1 Do Q', (size, size, bytes(pixels)))
+
+
+@pytest.mark.parametrize('page', [
+	('', None),
+	('q Q', None),
+	# 很小的图片（如扫描仪的标记）不影响判断
+	('q 2 0 0 2 0 0 cm /Im1 Do Q', (10, 10, bytes(100))),
+	_scan(),
+	# 四周的扫描阴影不影响判断
+	('q 200 0 0 200 0 0 cm /Im1 Do Q', (100, 100, b'\xff' * 9700 + bytes(300))),
+])
+def test_blank_pages(page):
+	assert _types(_pdf(page)) == ['blank']
+
+
+@pytest.mark.parametrize('page', [
+	('0 0 m 100 100 l S', None),
+	('20 20 100 100 re f', None),
+	_scan(ink_rows=10),
+	('q 200 0 0 200 0 0 cm /Im1 Do Q', (10, 10, bytes(range(0, 250, 25)) * 10)),
+])
+def test_pages_with_content_are_not_blank(page):
+	assert _types(_pdf(page)) == ['scanned']
+
+
+def test_blank_detection_disabled():
+	assert _types(_pdf(('', None)), detect_blank=False) == ['scanned']
+	# 空白检测优先于文字检测
+	assert _types(_pdf(('', None), (_text(SENTENCE, SENTENCE), None))) == ['blank', 'text']
+
+
+def test_is_uniform_ignores_edges():
+	from PIL import Image
+
+	picture = Image.new('L', (200, 200), 255)
+	picture.paste(0, (0, 0, 200, 9))
+	assert PDFService._is_uniform(picture)
+	picture.paste(0, (0, 0, 200, 40))
+	assert not PDFService._is_uniform(picture)
@@ -0,0 +1,145 @@
+import io
+import json
+import threading
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.Services import ProcessingService as processing
+from read_for_you.Services.PollingService import TaskEventHub
+from read_for_you.Services.ProcessingService import ProcessingService
+
+
+class _FakeSqlService:
+	def __init__(self):
+		self.inserted = []
+
+	def insert_tasks(self, rows):
+		self.inserted.append(rows)
+		return {'success': True, 'affected': len(rows), 'error_msg': ''}
+
+
+@pytest.fixture
+def batch(monkeypatch):
+	sql_service = _FakeSqlService()
+	blob_services = []
+	opened = []
+
+	def prepare(file, page_range, language, blob_service, sql):
+		blob_services.append(blob_service)
+		assert sql is sql_service
+		if file == 'broken':
+			raise RuntimeError('bad pdf')
+		if file == 'empty':
+			return {'success': False, 'request_id': '', 'pdf_file': None, 'completed': False,
+			        'content_digest': '', 'error_msg': 'out of range'}
+		pdf_file = io.BytesIO(b'%PDF')
+		opened.append(pdf_file)
+		return {'success': True, 'request_id': f'/r/{file}', 'pdf_file': pdf_file, 'completed': file == 'cached',
+		        'content_digest': f'digest-{file}', 'error_msg': ''}
+
+	monkeypatch.setattr(processing, 'SqlService', lambda: sql_service)
+	monkeypatch.setattr(processing, 'AzureBlobService', lambda: object())
+	monkeypatch.setattr(ProcessingService, '_prepareSubmission', staticmethod(prepare))
+	return sql_service, blob_services, opened
+
+
+def _documents(*files):
+	return [{'file': file, 'page_range': '2-3', 'book_name': f'book-{file}'} for file in files]
+
+
+def test_batch_keeps_order_and_inserts_successes_once(batch):
+	sql_service, blob_services, opened = batch
+
+	submissions = ProcessingService.submitRecognitionBatch(
+		_documents('a', 'broken', 'cached', 'empty'), 'en', 'user-1')
+
+	assert [submission['request_id'] for submission in submissions] == ['/r/a', '', '/r/cached', '']
+	assert [submission['success'] for submission in submissions] == [True, False, True, False]
+	assert submissions[1]['error_msg'] == 'bad pdf'
+	assert all('pdf_file' not in submission for submission in submissions if submission['success'])
+	assert all(pdf_file.closed for pdf_file in opened)
+	# 所有文档共用同一个 Blob 客户端
+	assert len(set(map(id, blob_services))) == 1
+	assert sql_service.inserted == [[
+		{'user_id': 'user-1', 'request_id': '/r/a', 'book_name': 'book-a', 'page_range': '2-3',
+		 'status': 'Running', 'content_digest': 'digest-a'},
+		{'user_id': 'user-1', 'request_id': '/r/cached', 'book_name': 'book-cached', 'page_range': '2-3',
+		 'status': 'Completed', 'content_digest': 'digest-cached'},
+	]]
+
+
+def test_batch_without_successes_skips_insert(batch):
+	sql_service, _, _ = batch
+	ProcessingService.submitRecognitionBatch(_documents('broken', 'empty'), 'en', 'user-1')
+	assert sql_service.inserted == []
+
+
+def test_batch_prepares_documents_concurrently(batch, monkeypatch):
+	monkeypatch.setattr(processing, 'BATCH_RECOGNITION_CONCURRENCY', 2)
+	barrier = threading.Barrier(2, timeout=5)
+
+	def prepare(file, page_range, language, blob_service, sql):
+		barrier.wait()
+		return {'success': True, 'request_id': f'/r/{file}', 'pdf_file': None, 'completed': False,
+		        'content_digest': '', 'error_msg': ''}
+
+	monkeypatch.setattr(ProcessingService, '_prepareSubmission', staticmethod(prepare))
+	submissions = ProcessingService.submitRecognitionBatch(_documents('a', 'b'), 'en', 'user-1')
+	assert [submission['request_id'] for submission in submissions] == ['/r/a', '/r/b']
+
+
+def _post(files, page_ranges=(), user_id='user-1'):
+	data = {'file': [SimpleUploadedFile(name, b'%PDF', content_type='application/pdf') for name in files]}
+	if page_ranges:
+		data['pageNum'] = list(page_ranges)
+	request = RequestFactory().post('/submitRecognitionBatch', data)
+	if user_id:
+		request.COOKIES['rfy_uuid'] = user_id
+	return json.loads(views.submitRecognitionBatch(request).content)
+
+
+def test_batch_view_maps_submission_status(monkeypatch):
+	hub = TaskEventHub()
+	monkeypatch.setattr(TaskEventHub, 'instance', classmethod(lambda cls: hub))
+	received = []
+
+	def submit(documents, language, user_id):
+		received.extend((document['file'].name, document['page_range'], document['book_name']) for document in documents)
+		return [
+			{'success': True, 'request_id': '/r/1', 'completed': False, 'content_digest': '', 'error_msg': ''},
+			{'success': True, 'request_id': '/r/2', 'completed': True, 'content_digest': '', 'error_msg': ''},
+			{'success': False, 'request_id': '', 'completed': False, 'content_digest': '', 'error_msg': 'bad pdf'},
+		]
+
+	monkeypatch.setattr(views.ProcessingService, 'submitRecognitionBatch', staticmethod(submit))
+	payload = _post(['a.pdf', 'b.pdf', 'c.pdf'], ['1-2', '3', ''])
+
+	assert payload['status'] == 'success'
+	assert received == [('a.pdf', '1-2', 'a.pdf'), ('b.pdf', '3', 'b.pdf'), ('c.pdf', '', 'c.pdf')]
+	assert payload['data']['tasks'] == [
+		{'fileName': 'a.pdf', 'requestId': '/r/1', 'status': 'Running', 'error_msg': ''},
+		{'fileName': 'b.pdf', 'requestId': '/r/2', 'status': 'Completed', 'error_msg': ''},
+		{'fileName': 'c.pdf', 'requestId': '', 'status': 'Failed', 'error_msg': 'bad pdf'},
+	]
+	# 只有仍在识别的任务发布 queued 事件
+	assert hub.latest('/r/1')[1]['stage'] == 'queued'
+	assert hub.latest('/r/2') is None
+
+
+@pytest.mark.parametrize('files, page_ranges, user_id, error', [
+	(['a.pdf'], (), '', '未找到用户 ID'),
+	([], (), 'user-1', '缺少文件参数'),
+	(['a.pdf', 'b.pdf'], ['1'], 'user-1', 'pageNum 数量与文件数量不一致'),
+])
+def test_batch_view_rejects_invalid_requests(files, page_ranges, user_id, error):
+	payload = _post(files, page_ranges, user_id)
+	assert payload['status'] == 'failed'
+	assert payload['error_msg'] == error
+
+
+def test_batch_view_limits_file_count(monkeypatch):
+	monkeypatch.setattr(views, 'BATCH_RECOGNITION_MAX_FILES', 1)
+	assert _post(['a.pdf', 'b.pdf'])['error_msg'] == '单次最多提交 1 个文件'
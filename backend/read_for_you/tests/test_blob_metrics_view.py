@@ -0,0 +1,30 @@
+import json
+
+from django.test import RequestFactory
+
+from read_for_you import views
+
+
+def _request(cookie=None):
+	request = RequestFactory().get('/getBlobMetrics')
+	if cookie:
+		request.COOKIES['rfy_uuid'] = cookie
+	return request
+
+
+def test_metrics_require_user(monkeypatch):
+	monkeypatch.setattr(views.settings, 'DEBUG', False)
+	response = views.getBlobMetrics(_request())
+	assert response.status_code == 403
+
+
+def test_metrics_for_user(monkeypatch):
+	monkeypatch.setattr(views.settings, 'DEBUG', False)
+	response = views.getBlobMetrics(_request('user-1'))
+	assert response.status_code == 200
+	assert set(json.loads(response.content)) == {'hedging', 'single_flight', 'image_cache', 'disk_cache', 'name_index'}
+
+
+def test_metrics_open_in_debug(monkeypatch):
+	monkeypatch.setattr(views.settings, 'DEBUG', True)
+	assert views.getBlobMetrics(_request()).status_code == 200
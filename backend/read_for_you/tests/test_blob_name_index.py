@@ -0,0 +1,176 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.Services.AzureBlobService import AzureBlobService
+from read_for_you.Services.BlobNameIndex import BlobNameIndex
+
+
+BOOKS = [
+	{'book_prefix': 'zbooksnap/1/', 'all_files': ['old.pdf', 'second.pdf', 'cover.jpg']},
+	{'book_prefix': 'zbooksnap/2', 'pdf_file': 'book.pdf', 'cover_file': 'cover.png'},
+	{'book_prefix': '', 'all_files': ['ignored.pdf']},
+]
+
+
+def test_load_books_keeps_first_file_per_type():
+	index = BlobNameIndex(ttl=60)
+	assert index.needsRefresh()
+	assert index.loadBooks(BOOKS) == 4
+	assert not index.needsRefresh()
+
+	assert index.resolve('zbooksnap/1/', 'PDF') == 'zbooksnap/1/old.pdf'
+	assert index.resolve('zbooksnap/1/', 'jpg') == 'zbooksnap/1/cover.jpg'
+	assert index.resolve('zbooksnap/2', 'png') == 'zbooksnap/2/cover.png'
+	assert index.resolve('zbooksnap/3/', 'pdf') is None
+	assert index.stats() == {'entries': 4, 'hits': 3, 'misses': 1}
+
+
+def test_results_use_fixed_layout():
+	index = BlobNameIndex(ttl=60)
+	assert index.resolve('results_of_users/abc/', 'pdf') == 'results_of_users/abc/result.pdf'
+	assert index.resolve('results_of_users/abc', 'json') == 'results_of_users/abc/result.json'
+	assert index.resolve('results_of_users/abc/', 'txt') is None
+	assert index.resolve('results_of_users/abc/sub/', 'pdf') is None
+
+
+def test_reload_drops_listed_entries_and_discard_removes_one():
+	index = BlobNameIndex(ttl=60)
+	index.loadBooks(BOOKS)
+	index.add('other/', 'txt', 'other/a.txt')
+	index.discard('zbooksnap/1/', 'pdf')
+	assert index.resolve('zbooksnap/1/', 'pdf') is None
+	assert index.resolve('other/', 'TXT') == 'other/a.txt'
+
+	index.loadBooks(BOOKS)
+	assert index.resolve('other/', 'txt') is None
+	assert index.resolve('zbooksnap/1/', 'pdf') == 'zbooksnap/1/old.pdf'
+
+
+def test_expired_index_needs_refresh():
+	index = BlobNameIndex(ttl=-1)
+	index.loadBooks(BOOKS)
+	assert index.needsRefresh()
+
+
+class _FakeContainer:
+	def __init__(self, blobs):
+		self.blobs = blobs
+		self.list_calls = 0
+
+	def list_blobs(self, name_starts_with=''):
+		self.list_calls += 1
+		return [SimpleNamespace(name=name) for name in sorted(self.blobs) if name.startswith(name_starts_with)]
+
+
+class _FakeBlobClient:
+	def __init__(self, container, blob_name):
+		self.container = container
+		self.blob_name = blob_name
+
+	def get_blob_properties(self):
+		if self.blob_name not in self.container.blobs:
+			raise ResourceNotFoundError('not found')
+		return SimpleNamespace(
+			size=len(self.container.blobs[self.blob_name]),
+			etag='"0x1"',
+			content_settings=SimpleNamespace(content_type='application/pdf'),
+			last_modified=None,
+		)
+
+
+class _FakeServiceClient:
+	def __init__(self, container):
+		self.container = container
+
+	def get_container_client(self, container_name):
+		return self.container
+
+	def get_blob_client(self, container=None, blob=None):
+		return _FakeBlobClient(self.container, blob)
+
+
+@pytest.fixture
+def container():
+	# books_list.json 仍指向 old.pdf，但 blob 已被改名为 new.pdf
+	return _FakeContainer({'zbooksnap/1/cover.jpg': b'jpg', 'zbooksnap/1/new.pdf': b'%PDF-1.4'})
+
+
+@pytest.fixture
+def blob_service(monkeypatch, container):
+	index = BlobNameIndex(ttl=3600)
+	index.loadBooks(BOOKS)
+	monkeypatch.setattr(AzureBlobService, '_name_index', index)
+	service = AzureBlobService.__new__(AzureBlobService)
+	service.blob_service_client = _FakeServiceClient(container)
+	service.container_name = 'books'
+	service.getReadUrl = lambda blob_name: f'https://sas.example/{blob_name}'
+	return service
+
+
+def test_find_returns_index_hit_without_verification(blob_service, container):
+	assert blob_service.findBlobName('zbooksnap/1/', 'pdf') == 'zbooksnap/1/old.pdf'
+	assert container.list_calls == 0
+
+
+def test_verified_find_falls_back_to_listing_for_stale_entry(blob_service, container):
+	assert blob_service.findBlobName('zbooksnap/1/', 'pdf', verify=True) == 'zbooksnap/1/new.pdf'
+	assert container.list_calls == 1
+	# 列举结果记入索引，之后不再列举
+	assert blob_service.findBlobName('zbooksnap/1/', 'pdf', verify=True) == 'zbooksnap/1/new.pdf'
+	assert container.list_calls == 1
+
+
+def test_verified_find_keeps_existing_entry(blob_service, container):
+	assert blob_service.findBlobName('zbooksnap/1/', 'jpg', verify=True) == 'zbooksnap/1/cover.jpg'
+	assert container.list_calls == 0
+
+
+def test_refind_raises_when_listing_finds_nothing(blob_service):
+	with pytest.raises(FileNotFoundError):
+		blob_service.refindBlobName('zbooksnap/2', 'pdf')
+
+
+@pytest.mark.parametrize('mode', ['sas', 'redirect'])
+def test_storaged_data_url_skips_stale_entry(monkeypatch, blob_service, mode):
+	monkeypatch.setattr(views, 'BLOB_DOWNLOAD_MODE', mode)
+	monkeypatch.setattr(views, 'AzureBlobService', lambda: blob_service)
+
+	request = RequestFactory().get('/getStoragedData', {'prefix': 'zbooksnap/1/', 'type': 'pdf'})
+	response = views.getStoragedData(request)
+
+	assert response.status_code == 200
+	url = json.loads(response.content)['url']
+	if mode == 'sas':
+		assert url == 'https://sas.example/zbooksnap/1/new.pdf'
+	else:
+		assert url.startswith('/') and 'zbooksnap%2F1%2F' in url
+
+
+def test_storaged_file_redirect_skips_stale_entry(monkeypatch, blob_service):
+	monkeypatch.setattr(views, 'BLOB_DOWNLOAD_MODE', 'redirect')
+	monkeypatch.setattr(views, 'AzureBlobService', lambda: blob_service)
+
+	request = RequestFactory().get('/getStoragedFile', {'prefix': 'zbooksnap/1/', 'type': 'pdf'})
+	response = views.getStoragedFile(request)
+
+	assert response.status_code == 302
+	assert response['Location'] == 'https://sas.example/zbooksnap/1/new.pdf'
+
+
+def test_storaged_file_proxy_skips_stale_entry(monkeypatch, blob_service):
+	monkeypatch.setattr(views, 'BLOB_DOWNLOAD_MODE', 'proxy')
+	monkeypatch.setattr(views, 'AzureBlobService', lambda: blob_service)
+	blob_service.openCachedBlob = lambda blob_name, etag, size: None
+	blob_service.iterBlob = lambda blob_name, offset=None, length=None: iter([b'%PDF-1.4'])
+
+	request = RequestFactory().get('/getStoragedFile', {'prefix': 'zbooksnap/1/', 'type': 'pdf'})
+	response = views.getStoragedFile(request)
+
+	assert response.status_code == 200
+	assert b''.join(response.streaming_content) == b'%PDF-1.4'
+	assert 'new.pdf' in response['Content-Disposition']
@@ -0,0 +1,75 @@
+from io import BytesIO
+
+import pytest
+
+from read_for_you.Services import ProcessingService as processing
+from read_for_you.Services.ProcessingService import ProcessingService
+
+
+def _digest(content=b'%PDF-1.4 pages', page_range='1-3', language='en'):
+	pdf_file = BytesIO(content)
+	digest = ProcessingService.computeContentDigest(pdf_file, page_range, language)
+	assert pdf_file.tell() == 0
+	return digest
+
+
+def test_digest_depends_on_content_range_and_language():
+	digest = _digest()
+	assert digest == _digest()
+	assert len({digest, _digest(content=b'%PDF-1.4 other'), _digest(page_range='1-4'), _digest(language='zh')}) == 4
+
+
+def test_digest_fields_are_separated():
+	assert _digest(page_range='1-3', language='0') != _digest(page_range='1-30', language='')
+
+
+class _FakeSqlService:
+	def __init__(self, existing=None):
+		self.existing = existing
+		self.lookups = []
+		self.inserted = []
+
+	def find_completed_task_by_digest(self, content_digest):
+		self.lookups.append(content_digest)
+		return {'success': True, 'data': self.existing, 'error_msg': ''}
+
+	def insert_task(self, **row):
+		self.inserted.append(row)
+		return {'success': True, 'id': 1, 'error_msg': ''}
+
+
+def _fail(*args, **kwargs):
+	raise AssertionError('复用结果时不应识别')
+
+
+def test_completed_digest_is_reused_without_recognition(monkeypatch):
+	monkeypatch.setattr(ProcessingService, '_analyzePages', staticmethod(_fail))
+	monkeypatch.setattr(processing.RecognitionServices, 'callAsyncRecognitionAPI', staticmethod(_fail))
+	sql_service = _FakeSqlService({'id': 3, 'requestId': '/api/analyzeResults/done', 'status': 'Completed'})
+	pdf_file = BytesIO(b'%PDF-1.4 pages')
+
+	submission = ProcessingService._prepareExtracted(pdf_file, '2-4', 'en', object(), sql_service)
+
+	assert submission == {
+		'success': True, 'request_id': '/api/analyzeResults/done', 'pdf_file': pdf_file, 'completed': True,
+		'content_digest': ProcessingService.computeContentDigest(BytesIO(b'%PDF-1.4 pages'), '1-3', 'en'),
+		'error_msg': '',
+	}
+	assert sql_service.lookups == [submission['content_digest']]
+
+
+def test_reused_submission_is_recorded_as_completed(monkeypatch):
+	sql_service = _FakeSqlService()
+	monkeypatch.setattr(processing, 'SqlService', lambda: sql_service)
+	monkeypatch.setattr(processing, 'AzureBlobService', lambda: object())
+	monkeypatch.setattr(ProcessingService, '_prepareSubmission', staticmethod(
+		lambda *args: {'success': True, 'request_id': '/api/analyzeResults/done', 'pdf_file': None,
+		               'completed': True, 'content_digest': 'abc', 'error_msg': ''}))
+
+	result = ProcessingService.submitRecognition(object(), '2-4', 'en', 'user-1', 'book')
+
+	assert result['completed']
+	assert sql_service.inserted == [{
+		'user_id': 'user-1', 'request_id': '/api/analyzeResults/done', 'book_name': 'book',
+		'page_range': '2-4', 'status': 'Completed', 'content_digest': 'abc',
+	}]
@@ -0,0 +1,145 @@
+import json
+import os
+import time
+
+import pytest
+
+from read_for_you.Services.DiskBlobCache import DiskBlobCache, _parse_ttl_rules
+
+
+def _cache(directory, max_bytes=1024, max_item_bytes=1024, rules='books/=60,results/=10'):
+	return DiskBlobCache(str(directory), max_bytes, max_item_bytes, rules)
+
+
+def _put(cache, blob_name, etag, data):
+	return cache.put(blob_name, etag, lambda f: f.write(data))
+
+
+def _read(cache, blob_name, etag=None):
+	content = cache.get(blob_name, etag)
+	if content is None:
+		return None
+	with content:
+		return content[:]
+
+
+def _set_mtime(cache, blob_name, etag, mtime):
+	os.utime(os.path.join(cache.directory, cache._data_file(blob_name, etag)), (mtime, mtime))
+
+
+def test_parse_ttl_rules_prefers_longest_prefix():
+	assert _parse_ttl_rules('a/=1, a/b/=2,bad,c/=x') == [('a/b/', 2.0), ('a/', 1.0)]
+
+
+def test_put_and_get(tmp_path):
+	cache = _cache(tmp_path)
+	assert _put(cache, 'books/1.pdf', '"e1"', b'hello')
+	assert _read(cache, 'books/1.pdf') == b'hello'
+	assert _read(cache, 'books/1.pdf', '"e1"') == b'hello'
+	assert _read(cache, 'books/1.pdf', '"e2"') is None
+	assert cache.etag('books/1.pdf') == '"e1"'
+
+
+def test_only_matching_prefixes_and_sizes_are_cacheable(tmp_path):
+	cache = _cache(tmp_path, max_item_bytes=10)
+	assert not _put(cache, 'other/1.pdf', '"e1"', b'hello')
+	assert _read(cache, 'other/1.pdf') is None
+	assert cache.cacheable('books/1.pdf', 10)
+	assert not cache.cacheable('books/1.pdf', 11)
+	assert not cache.cacheable('books/1.pdf', 0)
+	assert not _put(cache, 'books/1.pdf', '', b'hello')
+
+
+def test_lookup_without_etag_expires_after_ttl(tmp_path):
+	cache = _cache(tmp_path)
+	_put(cache, 'results/1.json', '"e1"', b'{}')
+	meta_path = cache._meta_path('results/1.json')
+	with open(meta_path, 'r', encoding='utf-8') as f:
+		meta = json.load(f)
+	meta['validated_at'] -= 11
+	with open(meta_path, 'w', encoding='utf-8') as f:
+		json.dump(meta, f)
+
+	assert _read(cache, 'results/1.json') is None
+	# 已知 ETag 时仍可命中，并刷新确认时间
+	assert _read(cache, 'results/1.json', '"e1"') == b'{}'
+	assert _read(cache, 'results/1.json') == b'{}'
+
+
+def test_new_etag_replaces_previous_version(tmp_path):
+	cache = _cache(tmp_path)
+	_put(cache, 'books/1.pdf', '"e1"', b'old')
+	_put(cache, 'books/1.pdf', '"e2"', b'new')
+	assert _read(cache, 'books/1.pdf') == b'new'
+	assert _read(cache, 'books/1.pdf', '"e1"') is None
+	assert len([name for name in os.listdir(tmp_path) if name.endswith('.blob')]) == 1
+
+
+def test_failed_write_leaves_no_files(tmp_path):
+	cache = _cache(tmp_path)
+
+	def write(f):
+		f.write(b'partial')
+		raise OSError('disk full')
+
+	with pytest.raises(OSError):
+		cache.put('books/1.pdf', '"e1"', write)
+	assert os.listdir(tmp_path) == []
+	assert _read(cache, 'books/1.pdf', '"e1"') is None
+
+
+def test_empty_data_file_is_a_miss(tmp_path):
+	cache = _cache(tmp_path)
+	_put(cache, 'books/1.pdf', '"e1"', b'')
+	assert cache.get('books/1.pdf', '"e1"') is None
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+	cache = _cache(tmp_path, max_bytes=250, max_item_bytes=100)
+	now = time.time()
+	_put(cache, 'books/a.pdf', '"a"', b'a' * 100)
+	_put(cache, 'books/b.pdf', '"b"', b'b' * 100)
+	_set_mtime(cache, 'books/a.pdf', '"a"', now - 100)
+	_set_mtime(cache, 'books/b.pdf', '"b"', now - 200)
+
+	_put(cache, 'books/c.pdf', '"c"', b'c' * 100)
+
+	assert _read(cache, 'books/b.pdf') is None
+	assert cache.etag('books/b.pdf') is None
+	assert _read(cache, 'books/a.pdf') == b'a' * 100
+	assert _read(cache, 'books/c.pdf') == b'c' * 100
+	assert cache.stats()['evictions'] == 1
+
+
+def test_eviction_keeps_meta_pointing_to_newer_version(tmp_path):
+	cache = _cache(tmp_path, max_bytes=250, max_item_bytes=100)
+	_put(cache, 'books/a.pdf', '"old"', b'o' * 100)
+	_put(cache, 'books/a.pdf', '"new"', b'n' * 100)
+	# 其他进程遗留的旧版本文件：记录已指向新版本，淘汰旧文件时不能删除记录
+	stale = os.path.join(tmp_path, cache._data_file('books/a.pdf', '"old"'))
+	with open(stale, 'wb') as f:
+		f.write(b'o' * 100)
+	_set_mtime(cache, 'books/a.pdf', '"old"', time.time() - 100)
+
+	_put(cache, 'books/b.pdf', '"b"', b'b' * 100)
+
+	assert not os.path.exists(stale)
+	assert cache.etag('books/a.pdf') == '"new"'
+	assert _read(cache, 'books/a.pdf') == b'n' * 100
+
+
+def test_scan_removes_stale_temporary_files(tmp_path):
+	cache = _cache(tmp_path)
+	_put(cache, 'books/a.pdf', '"a"', b'a')
+	stale = tmp_path / 'crashed.tmp'
+	fresh = tmp_path / 'writing.tmp'
+	stale.write_bytes(b'x')
+	fresh.write_bytes(b'x')
+	old = time.time() - DiskBlobCache._STALE_TMP_SECONDS - 1
+	os.utime(stale, (old, old))
+
+	entries = cache._scan()
+
+	assert len(entries) == 1
+	assert not stale.exists()
+	assert fresh.exists()
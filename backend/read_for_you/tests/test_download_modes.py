@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.Services import ProcessingService as processing
+from read_for_you.Services.ProcessingService import ProcessingService
+
+
+REQUEST_ID = '/api/intelligentOcr/analyzeResults/abc123'
+RESULT = {'pages': [{'pageNumber': 1, 'elements': []}]}
+
+
+class _FakeBlobService:
+	def __init__(self):
+		self.blobs = {
+			'results_of_users/abc123/result.json': json.dumps(RESULT).encode('utf-8'),
+			'results_of_users/abc123/result.pdf': b'%PDF-1.4',
+			'zbooksnap/1/book.pdf': b'%PDF-1.4',
+			'zbooksnap/1/toc.json': b'{"toc": []}',
+			'zbooksnap/1/cover.jpg': b'jpg',
+		}
+
+	def getReadUrl(self, blob_name):
+		return f'https://sas.example/{blob_name}?sig=1'
+
+	def findBlobName(self, prefix, file_type, verify=False):
+		for blob_name in self.blobs:
+			if blob_name.startswith(prefix) and blob_name.endswith(file_type):
+				return blob_name
+		raise FileNotFoundError(f'{prefix}*.{file_type}')
+
+	def downloadFile(self, prefix, file_type):
+		return self.blobs[self.findBlobName(prefix, file_type)]
+
+	def downloadBlob(self, blob_name):
+		return self.blobs[blob_name]
+
+	def getBlobProperties(self, blob_name):
+		if blob_name not in self.blobs:
+			raise FileNotFoundError(blob_name)
+		return {'size': len(self.blobs[blob_name]), 'etag': '', 'content_type': None, 'last_modified': None}
+
+	def iterBlob(self, blob_name, offset=None, length=None):
+		yield self.blobs[blob_name]
+
+
+@pytest.fixture
+def blob_service(monkeypatch):
+	service = _FakeBlobService()
+	monkeypatch.setattr(views, 'AzureBlobService', lambda: service)
+	monkeypatch.setattr(processing, 'AzureBlobService', lambda: service)
+	return service
+
+
+@pytest.fixture
+def mode(monkeypatch):
+	def set_mode(value):
+		monkeypatch.setattr(views, 'BLOB_DOWNLOAD_MODE', value)
+		monkeypatch.setattr(processing, 'BLOB_DOWNLOAD_MODE', value)
+	return set_mode
+
+
+def test_load_result_proxy_embeds_json(blob_service, mode):
+	mode('proxy')
+	assert ProcessingService.loadResult(REQUEST_ID) == {
+		'status': 'success', 'result': RESULT, 'pdfUrl': '/getResultPDF?requestId=%2Fapi%2FintelligentOcr%2FanalyzeResults%2Fabc123'}
+
+
+def test_load_result_sas_returns_signed_urls(blob_service, mode):
+	mode('sas')
+	assert ProcessingService.loadResult(REQUEST_ID) == {
+		'status': 'success',
+		'pdfUrl': 'https://sas.example/results_of_users/abc123/result.pdf?sig=1',
+		'resultUrl': 'https://sas.example/results_of_users/abc123/result.json?sig=1',
+	}
+
+
+def test_load_result_redirect_points_at_backend(blob_service, mode):
+	mode('redirect')
+	result = ProcessingService.loadResult(REQUEST_ID)
+	assert 'result' not in result
+	assert result['pdfUrl'].startswith('/getResultPDF?requestId=')
+	assert result['resultUrl'].startswith('/getResultJSON?requestId=')
+
+
+def _storaged_data(file_type, prefix='zbooksnap/1/'):
+	return views.getStoragedData(RequestFactory().get('/getStoragedData', {'prefix': prefix, 'type': file_type}))
+
+
+def test_storaged_data_proxy(blob_service, mode):
+	mode('proxy')
+	assert json.loads(_storaged_data('pdf').content)['url'] == '/getStoragedFile?prefix=zbooksnap%2F1%2F&type=pdf'
+	assert json.loads(_storaged_data('json').content) == {'type': 'json', 'data': {'toc': []}}
+	response = _storaged_data('jpg')
+	assert response.status_code == 200
+	assert response.content == b'jpg'
+	assert response['Content-Type'] == 'image/jpeg'
+
+
+def test_storaged_data_sas(blob_service, mode):
+	mode('sas')
+	assert json.loads(_storaged_data('pdf').content) == {
+		'type': 'pdf', 'url': 'https://sas.example/zbooksnap/1/book.pdf?sig=1'}
+	assert json.loads(_storaged_data('json').content) == {
+		'type': 'json', 'url': 'https://sas.example/zbooksnap/1/toc.json?sig=1'}
+	response = _storaged_data('jpg')
+	assert response.status_code == 302
+	assert response['Location'] == 'https://sas.example/zbooksnap/1/cover.jpg?sig=1'
+
+
+def test_storaged_data_redirect(blob_service, mode):
+	mode('redirect')
+	assert json.loads(_storaged_data('json').content) == {
+		'type': 'json', 'url': '/getStoragedFile?prefix=zbooksnap%2F1%2F&type=json'}
+	assert _storaged_data('jpg')['Location'] == 'https://sas.example/zbooksnap/1/cover.jpg?sig=1'
+
+
+def test_storaged_data_missing_blob(blob_service, mode):
+	mode('sas')
+	assert _storaged_data('pdf', prefix='zbooksnap/2/').status_code == 404
+
+
+def _result_json(request_id=REQUEST_ID):
+	return views.getResultJSON(RequestFactory().get('/getResultJSON', {'requestId': request_id} if request_id else {}))
+
+
+def test_result_json_redirects_to_sas(blob_service, mode):
+	mode('redirect')
+	response = _result_json()
+	assert response.status_code == 302
+	assert response['Location'] == 'https://sas.example/results_of_users/abc123/result.json?sig=1'
+
+
+def test_result_json_proxy_streams_file(blob_service, mode):
+	mode('proxy')
+	response = _result_json()
+	assert response.status_code == 200
+	assert response['Content-Type'] == 'application/json'
+	assert json.loads(b''.join(response.streaming_content)) == RESULT
+	assert _result_json('/api/intelligentOcr/analyzeResults/missing').status_code == 404
+
+
+def test_result_json_requires_request_id(blob_service, mode):
+	mode('proxy')
+	assert _result_json('').status_code == 400
@@ -0,0 +1,56 @@
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from read_for_you.Services.PDFService import PDFService
+
+
+def _pdf(pages, owner_password=None):
+	writer = PdfWriter()
+	for index in range(pages):
+		writer.add_blank_page(width=100 + index, height=100)
+	if owner_password:
+		writer.encrypt(user_password='', owner_password=owner_password)
+	output = BytesIO()
+	writer.write(output)
+	return output.getvalue()
+
+
+@pytest.mark.parametrize('page_range', ['', '1-5', '1-3,4-5', '1-100', '5,4,3,2,1'])
+def test_full_document_is_copied_unchanged(page_range):
+	source = _pdf(5)
+	output = PDFService.extractPDF(BytesIO(source), page_range)
+	assert output.tell() == 0
+	assert output.read() == source
+
+
+def test_partial_range_is_rewritten():
+	source = _pdf(5)
+	output = PDFService.extractPDF(BytesIO(source), '2-3')
+	assert output.getvalue() != source
+	assert [float(page.mediabox.width) for page in PdfReader(output).pages] == [101, 102]
+
+
+def test_encrypted_document_is_rewritten():
+	# 只有所有者密码的加密文档可以打开，但不直接复制：由引擎重写为不加密的 PDF
+	source = _pdf(2, owner_password='secret')
+	assert PdfReader(BytesIO(source)).is_encrypted
+
+	output = PDFService.extractPDF(BytesIO(source), '')
+
+	reader = PdfReader(output)
+	assert not reader.is_encrypted
+	assert len(reader.pages) == 2
+
+
+def test_fast_path_writes_into_given_output():
+	source = _pdf(3)
+	output = BytesIO()
+	assert PDFService.extractPDF(BytesIO(source), '', output) is output
+	assert output.getvalue() == source
+
+
+def test_range_outside_document_raises_value_error():
+	with pytest.raises(ValueError):
+		PDFService.extractPDF(BytesIO(_pdf(3)), '10-20')
@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from read_for_you.Services import HedgedReader as hedged_reader_module
+from read_for_you.Services.HedgedReader import HedgedReader
+
+
+@pytest.fixture
+def reader(monkeypatch):
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_ENABLED', True)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_INITIAL_DELAY_MS', 50)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_MIN_DELAY_MS', 10)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_PERCENTILE', 90)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_MAX_EXTRA_RATIO', 0.5)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_FIRST_CHUNK_BYTES', 4 * 1024 * 1024)
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_READ_TIMEOUT_SECONDS', 5)
+	reader = HedgedReader('test')
+	reader._executor = ThreadPoolExecutor(max_workers=4)
+	yield reader
+	reader._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _fill(reader, size_class, latencies):
+	reader._latencies[size_class].extend(latencies)
+
+
+def test_size_classes():
+	assert HedgedReader.sizeClass(0) == '<=256KB'
+	assert HedgedReader.sizeClass(256 * 1024) == '<=256KB'
+	assert HedgedReader.sizeClass(256 * 1024 + 1) == '<=1MB'
+	assert HedgedReader.sizeClass(1024 * 1024) == '<=1MB'
+	assert HedgedReader.sizeClass(1024 * 1024 + 1) == '>1MB'
+	assert HedgedReader.sizeClass(1024 ** 3) == '>1MB'
+
+
+def test_threshold_uses_initial_delay_until_enough_samples(reader):
+	_fill(reader, '<=256KB', [0.2] * (HedgedReader._MIN_SAMPLES - 1))
+	assert reader.threshold(1024) == pytest.approx(0.05)
+	assert reader.threshold() == pytest.approx(0.05)
+
+
+def test_threshold_uses_percentile_of_size_class(reader):
+	_fill(reader, '<=256KB', [i / 1000 for i in range(1, 101)])
+	_fill(reader, '>1MB', [0.3] * HedgedReader._MIN_SAMPLES)
+	assert reader.threshold(1024) == pytest.approx(0.091)
+	assert reader.threshold(1024 * 1024) == pytest.approx(0.05)
+	# 不知道大小时取样本充足的分档中最大的阈值
+	assert reader.threshold() == pytest.approx(0.3)
+
+
+def test_threshold_not_below_min_delay(reader):
+	_fill(reader, '<=256KB', [0.001] * HedgedReader._MIN_SAMPLES)
+	assert reader.threshold(1024) == pytest.approx(0.01)
+
+
+def test_fast_read_is_not_hedged(reader):
+	assert reader.run(lambda: 'data', 'blob', 1024) == 'data'
+	stats = reader.stats()
+	assert stats['requests'] == 1 and stats['hedged'] == 0
+	assert stats['size_classes']['<=256KB']['samples'] == 1
+
+
+def test_slow_read_is_hedged_and_hedge_wins(reader):
+	calls = []
+
+	def read():
+		calls.append(None)
+		if len(calls) == 1:
+			time.sleep(0.5)
+			return 'primary'
+		return 'hedge'
+
+	assert reader.run(read, 'blob', 1024) == 'hedge'
+	stats = reader.stats()
+	assert stats['hedged'] == 1 and stats['hedge_wins'] == 1
+
+
+def test_token_bucket_caps_hedges(reader, monkeypatch):
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_MAX_EXTRA_RATIO', 0.0)
+	reader._tokens = 1.0
+	calls = []
+
+	def read():
+		calls.append(None)
+		time.sleep(0.1)
+		return len(calls)
+
+	reader.run(read, 'blob', 1024)
+	assert reader.stats()['hedged'] == 1
+	calls.clear()
+
+	# 令牌用完后不再对冲，等待首个请求
+	assert reader.run(read, 'blob', 1024) == 1
+	assert len(calls) == 1
+	stats = reader.stats()
+	assert stats['hedged'] == 1 and stats['hedge_skipped_by_cap'] == 1
+
+
+def test_tokens_accumulate_per_request(reader):
+	reader._tokens = 0.0
+	reader.run(lambda: None)
+	reader.run(lambda: None)
+	assert reader._tokens == pytest.approx(1.0)
+
+
+def test_read_deadline_raises_timeout(reader, monkeypatch):
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_READ_TIMEOUT_SECONDS', 0.2)
+	reader._tokens = 0.0
+	release = threading.Event()
+	try:
+		with pytest.raises(TimeoutError):
+			reader.run(lambda: release.wait(5), 'blob', 1024)
+	finally:
+		release.set()
+
+
+def test_busy_pool_reads_in_caller_thread(reader):
+	reader._executor = ThreadPoolExecutor(max_workers=1)
+	release = threading.Event()
+	reader._executor.submit(release.wait, 5)
+	threads = []
+	try:
+		assert reader.run(lambda: threads.append(threading.current_thread()) or 'data', 'blob', 1024) == 'data'
+	finally:
+		release.set()
+	assert threads == [threading.current_thread()]
+	assert reader.stats()['queue_bypassed'] == 1
+
+
+def test_disabled_reads_directly(reader, monkeypatch):
+	monkeypatch.setattr(hedged_reader_module, 'BLOB_HEDGE_ENABLED', False)
+	assert reader.run(lambda: 'data') == 'data'
+	assert reader.stats()['requests'] == 0
@@ -0,0 +1,124 @@
+import json
+import threading
+
+import pytest
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.Services.AzureBlobService2 import AzureBlobService2
+
+
+def _image(data):
+	return {'data': data, 'mime_type': 'image/png', 'etag': '"v1"'}
+
+
+def _service(download):
+	service = AzureBlobService2.__new__(AzureBlobService2)
+	service.downloadImage = download
+	return service
+
+
+def test_download_images_yields_in_completion_order():
+	release = threading.Event()
+
+	def download(image_url):
+		if image_url == 'a':
+			assert release.wait(5)
+		return _image(image_url.encode())
+
+	results = _service(download).downloadImages(['a', 'b'], concurrency=2)
+	# a 仍在下载时 b 先产出
+	assert next(results) == ('b', _image(b'b'), None)
+	release.set()
+	assert list(results) == [('a', _image(b'a'), None)]
+
+
+def test_download_images_reports_failures_and_skips_duplicates():
+	calls = []
+
+	def download(image_url):
+		calls.append(image_url)
+		if image_url == 'missing':
+			raise FileNotFoundError('图片不存在')
+		return _image(b'png')
+
+	results = {url: (image, error) for url, image, error in _service(download).downloadImages(['a', 'missing', 'a'])}
+
+	assert sorted(calls) == ['a', 'missing']
+	assert results['a'] == (_image(b'png'), None)
+	assert results['missing'][0] is None
+	assert isinstance(results['missing'][1], FileNotFoundError)
+
+
+def test_download_images_limits_concurrency():
+	lock = threading.Lock()
+	active = [0, 0]
+
+	def download(image_url):
+		with lock:
+			active[0] += 1
+			active[1] = max(active[1], active[0])
+		threading.Event().wait(0.01)
+		with lock:
+			active[0] -= 1
+		return _image(b'png')
+
+	assert len(list(_service(download).downloadImages([str(i) for i in range(12)], concurrency=3))) == 12
+	assert active[1] <= 3
+
+
+def test_download_images_empty():
+	assert list(_service(None).downloadImages([])) == []
+
+
+class _FakeBatchService:
+	def __init__(self, results):
+		self.results = results
+		self.requested = None
+
+	def downloadImages(self, image_urls):
+		self.requested = image_urls
+		yield from self.results
+
+
+def _post(body):
+	request = RequestFactory().post('/getImagesBatch', body, content_type='application/json')
+	return views.getImagesBatch(request)
+
+
+def test_batch_view_streams_ndjson(monkeypatch):
+	service = _FakeBatchService([
+		('b', _image(b'\x89PNG'), None),
+		('a', None, FileNotFoundError('图片不存在: a')),
+	])
+	monkeypatch.setattr(views, 'AzureBlobService2', lambda: service)
+
+	response = _post(json.dumps({'imageUrls': ['a', 'b']}))
+
+	assert response['Content-Type'] == 'application/x-ndjson'
+	lines = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+	assert service.requested == ['a', 'b']
+	assert lines == [
+		{'imageUrl': 'b', 'status': 'success', 'etag': '"v1"', 'data': 'data:image/png;base64,iVBORw=='},
+		{'imageUrl': 'a', 'status': 'failed', 'error_msg': '图片不存在: a'},
+	]
+
+
+@pytest.mark.parametrize('body, error', [
+	('{', '请求体不是有效的 JSON'),
+	('{}', '参数 imageUrls 必须是非空的 URL 列表'),
+	('{"imageUrls": "a"}', '参数 imageUrls 必须是非空的 URL 列表'),
+	('{"imageUrls": ["a", ""]}', '参数 imageUrls 必须是非空的 URL 列表'),
+	('{"imageUrls": ["a", 1]}', '参数 imageUrls 必须是非空的 URL 列表'),
+	('{"imageUrls": ["a", "b", "c"]}', '一次最多请求 2 张图片'),
+])
+def test_batch_view_rejects_invalid_requests(monkeypatch, body, error):
+	monkeypatch.setattr(views, 'IMAGE_BATCH_MAX_URLS', 2)
+	payload = json.loads(_post(body).content)
+	assert payload['status'] == 'failed'
+	assert payload['error_msg'].startswith(error)
+
+
+def test_batch_view_requires_post():
+	payload = json.loads(views.getImagesBatch(RequestFactory().get('/getImagesBatch')).content)
+	assert payload['error_msg'] == '仅支持 POST 请求'
@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import pytest
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.Services import AzureBlobService2 as blob_service2_module
+from read_for_you.Services.AzureBlobService2 import AzureBlobService2
+from read_for_you.Services.LRUCache import LRUCache
+
+
+IMAGE_URL = 'https://account.blob.core.windows.net/images/book/1.png'
+BLOB_NAME = 'book/1.png'
+
+
+class _FakeBlobClient:
+	def __init__(self, storage, blob_name):
+		self.storage = storage
+		self.blob_name = blob_name
+
+	def download_blob(self, etag=None, match_condition=None, **kwargs):
+		self.storage.downloads.append(etag)
+		if self.blob_name not in self.storage.blobs:
+			raise ResourceNotFoundError('not found')
+		data, current_etag = self.storage.blobs[self.blob_name]
+		if match_condition == MatchConditions.IfModified and etag == current_etag:
+			raise ResourceNotModifiedError('not modified')
+		return SimpleNamespace(readall=lambda: data, properties=SimpleNamespace(etag=current_etag))
+
+
+class _FakeStorage:
+	def __init__(self):
+		self.blobs = {BLOB_NAME: (b'png-v1', '"v1"')}
+		self.downloads = []
+
+	def get_blob_client(self, container=None, blob=None):
+		return _FakeBlobClient(self, blob)
+
+
+class _DirectReader:
+	def run(self, read, label='', size_hint=None):
+		return read()
+
+
+@pytest.fixture
+def storage():
+	return _FakeStorage()
+
+
+@pytest.fixture
+def blob_service(monkeypatch, storage):
+	monkeypatch.setattr(AzureBlobService2, '_image_cache', LRUCache(1024 * 1024))
+	monkeypatch.setattr(blob_service2_module, 'IMAGE_CACHE_TTL_SECONDS', 3600)
+	service = AzureBlobService2.__new__(AzureBlobService2)
+	service.blob_service_client = storage
+	service.container_name = 'images'
+	service.hedged_reader = _DirectReader()
+	return service
+
+
+def _expire(monkeypatch):
+	monkeypatch.setattr(blob_service2_module, 'IMAGE_CACHE_TTL_SECONDS', -1)
+
+
+def test_cache_hit_within_ttl_skips_storage(blob_service, storage):
+	first = blob_service.downloadImage(IMAGE_URL)
+	second = blob_service.downloadImage(IMAGE_URL)
+	assert first == second == {'data': b'png-v1', 'mime_type': 'image/png', 'etag': '"v1"'}
+	assert storage.downloads == [None]
+
+
+def test_cache_hit_with_matching_client_etag(blob_service, storage):
+	blob_service.downloadImage(IMAGE_URL)
+	assert blob_service.downloadImage(IMAGE_URL, '"v1"')['data'] is None
+	assert blob_service.downloadImage(IMAGE_URL, '"v0"')['data'] == b'png-v1'
+	assert storage.downloads == [None]
+
+
+def test_expired_entry_revalidates_unchanged_blob(monkeypatch, blob_service, storage):
+	blob_service.downloadImage(IMAGE_URL)
+	_expire(monkeypatch)
+	assert blob_service.downloadImage(IMAGE_URL)['data'] == b'png-v1'
+	# 条件下载带上缓存的 ETag，304 时继续使用缓存内容
+	assert storage.downloads == [None, '"v1"']
+	assert blob_service._image_cache.stats()['entries'] == 1
+
+
+def test_expired_entry_picks_up_new_version(monkeypatch, blob_service, storage):
+	blob_service.downloadImage(IMAGE_URL)
+	storage.blobs[BLOB_NAME] = (b'png-v2', '"v2"')
+	assert blob_service.downloadImage(IMAGE_URL)['data'] == b'png-v1'
+
+	_expire(monkeypatch)
+	image = blob_service.downloadImage(IMAGE_URL, '"v1"')
+	assert image == {'data': b'png-v2', 'mime_type': 'image/png', 'etag': '"v2"'}
+
+	monkeypatch.setattr(blob_service2_module, 'IMAGE_CACHE_TTL_SECONDS', 3600)
+	assert blob_service.downloadImage(IMAGE_URL)['etag'] == '"v2"'
+	assert storage.downloads == [None, '"v1"']
+
+
+def test_expired_entry_for_deleted_blob_is_dropped(monkeypatch, blob_service, storage):
+	blob_service.downloadImage(IMAGE_URL)
+	del storage.blobs[BLOB_NAME]
+	_expire(monkeypatch)
+	with pytest.raises(FileNotFoundError):
+		blob_service.downloadImage(IMAGE_URL)
+	assert blob_service._image_cache.stats()['entries'] == 0
+
+
+def _get_image(monkeypatch, blob_service, if_none_match=None):
+	monkeypatch.setattr(views, 'AzureBlobService2', lambda: blob_service)
+	headers = {'HTTP_IF_NONE_MATCH': if_none_match} if if_none_match else {}
+	return views.getImage(RequestFactory().get('/getImage', {'url': IMAGE_URL}, **headers))
+
+
+def test_get_image_returns_etag(monkeypatch, blob_service):
+	response = _get_image(monkeypatch, blob_service)
+	assert response.status_code == 200
+	assert response.content == b'png-v1'
+	assert response['Content-Type'] == 'image/png'
+	assert response['ETag'] == '"v1"'
+	assert 'max-age=' in response['Cache-Control']
+
+
+@pytest.mark.parametrize('header', ['"v1"', 'W/"v1"', '"v1", "v0"'])
+def test_get_image_not_modified(monkeypatch, blob_service, header):
+	response = _get_image(monkeypatch, blob_service, header)
+	assert response.status_code == 304
+	assert response.content == b''
+	assert response['ETag'] == '"v1"'
+
+
+def test_get_image_missing_blob(monkeypatch, blob_service, storage):
+	del storage.blobs[BLOB_NAME]
+	assert _get_image(monkeypatch, blob_service).status_code == 404
@@ -0,0 +1,119 @@
+import os
+import zlib
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+from read_for_you.Services.PDFService import PDFService
+
+
+def _image(writer, width, height, data):
+	image = DecodedStreamObject()
+	image.set_data(zlib.compress(data))
+	image.update({
+		NameObject('/Type'): NameObject('/XObject'),
+		NameObject('/Subtype'): NameObject('/Image'),
+		NameObject('/Width'): NumberObject(width),
+		NameObject('/Height'): NumberObject(height),
+		NameObject('/ColorSpace'): NameObject('/DeviceGray'),
+		NameObject('/BitsPerComponent'): NumberObject(8),
+		NameObject('/Filter'): NameObject('/FlateDecode'),
+	})
+	return writer._add_object(image)
+
+
+def _pdf(images, page_size=200, owner_password=None):
+	"""每页铺满一张灰度图片，images 为 [(宽, 高, 像素), ...]"""
+	writer = PdfWriter()
+	for width, height, data in images:
+		writer.add_blank_page(width=page_size, height=page_size)
+		page = writer.pages[-1]
+		contents = DecodedStreamObject()
+		contents.set_data(f'q {page_size} 0 0 {page_size} 0 0 cm /Im1 Do Q'.encode())
+		page[NameObject('/Contents')] = writer._add_object(contents)
+		page[NameObject('/Resources')] = DictionaryObject({
+			NameObject('/XObject'): DictionaryObject({NameObject('/Im1'): _image(writer, width, height, data)}),
+		})
+	if owner_password:
+		writer.encrypt(user_password='', owner_password=owner_password)
+	output = BytesIO()
+	writer.write(output)
+	return output.getvalue()
+
+
+def _optimize(source, **kwargs):
+	output = BytesIO()
+	stats = PDFService.optimizePDF(BytesIO(source), output, **kwargs)
+	return stats, output.getvalue()
+
+
+def _images(data):
+	reader = PdfReader(BytesIO(data))
+	return [page['/Resources']['/XObject']['/Im1'] for page in reader.pages]
+
+
+def test_high_resolution_image_is_downsampled():
+	# 1000 像素铺满 200pt 的页面约为 360 DPI
+	source = _pdf([(1000, 1000, os.urandom(1000 * 1000))])
+
+	stats, data = _optimize(source, target_dpi=150, jpeg_quality=75)
+
+	assert stats['images_downsampled'] == 1
+	assert stats['bytes_before'] == len(source)
+	assert stats['bytes_after'] == len(data) < len(source)
+	image = _images(data)[0]
+	assert image['/Filter'] == '/DCTDecode'
+	assert (image['/Width'], image['/Height']) == (417, 417)
+
+
+def test_low_resolution_image_is_kept():
+	source = _pdf([(100, 100, bytes(range(100)) * 100)])
+
+	stats, data = _optimize(source, target_dpi=150)
+
+	assert stats['images_downsampled'] == 0
+	assert _images(data)[0]['/Filter'] == '/FlateDecode'
+
+
+def test_identical_images_are_deduplicated():
+	pixels = os.urandom(200 * 200)
+	source = _pdf([(200, 200, pixels)] * 3)
+
+	stats, data = _optimize(source, target_dpi=150)
+
+	assert stats['objects_deduplicated'] == 2
+	assert stats['bytes_after'] < stats['bytes_before']
+	images = _images(data)
+	assert len({image.indirect_reference.idnum for image in images}) == 1
+	assert images[2].get_data() == pixels
+
+
+def test_output_never_grows():
+	# 没有可瘦身内容的 PDF 重写后不会变小，原样输出
+	writer = PdfWriter()
+	writer.add_blank_page(width=100, height=100)
+	source = BytesIO()
+	writer.write(source)
+
+	stats, data = _optimize(source.getvalue())
+
+	assert data == source.getvalue()
+	assert stats == {'bytes_before': len(data), 'bytes_after': len(data),
+	                 'images_downsampled': 0, 'objects_deduplicated': 0}
+
+
+def test_encrypted_document_is_copied_unchanged():
+	source = _pdf([(1000, 1000, os.urandom(1000 * 1000))], owner_password='secret')
+
+	stats, data = _optimize(source)
+
+	assert data == source
+	assert stats == {'bytes_before': len(source), 'bytes_after': len(source),
+	                 'images_downsampled': 0, 'objects_deduplicated': 0}
+
+
+def test_invalid_pdf_raises():
+	with pytest.raises(Exception, match='PDF瘦身失败'):
+		_optimize(b'not a pdf')
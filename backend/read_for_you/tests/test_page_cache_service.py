@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from read_for_you.Services import PageCacheService as page_cache_module
+from read_for_you.Services.PageCacheService import PageCacheService
+from read_for_you.Services.ResultService import ResultService
+
+
+def _page(page_number, text):
+	return {'pageNumber': page_number, 'elements': [{'type': 'paragraph', 'properties': {'content': text}}]}
+
+
+def _texts(result):
+	return [(page['pageNumber'], page['elements'][0]['properties']['content'] if page['elements'] else None)
+		for page in result['pages']]
+
+
+class _FakeBlobService:
+	def __init__(self, blobs=None):
+		self.blobs = dict(blobs or {})
+
+	def downloadBlob(self, blob_name):
+		if blob_name not in self.blobs:
+			raise FileNotFoundError(blob_name)
+		return self.blobs[blob_name]
+
+	def uploadFile(self, prefix, file):
+		self.blobs[f'{prefix}/{file.name}'] = file.read()
+		return True
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+	monkeypatch.setattr(page_cache_module, 'PAGE_CACHE_ENABLED', True)
+
+
+def test_build_plan_prefers_cache_then_local_pages():
+	cached = {'h1': _page(1, 'cached')}
+	local_pages = [
+		{'source': 'text', 'entry': _page(1, 'local')},
+		{'source': 'text', 'entry': _page(1, 'text')},
+		None,
+		{'source': 'blank', 'entry': ResultService.emptyPage()},
+	]
+	plan = PageCacheService.buildPlan(['h1', 'h2', 'h3', 'h4'], cached, 'en', local_pages)
+
+	assert plan['language'] == 'en'
+	assert [(page['hash'], page['source']) for page in plan['pages']] == [
+		('h1', 'cache'), ('h2', 'text'), ('h3', 'ocr'), ('h4', 'blank')]
+	assert plan['pages'][0]['entry'] == _page(1, 'cached')
+	assert 'entry' not in plan['pages'][2]
+	assert str(PageCacheService.ocrPageRanges(plan)) == '3'
+
+
+def test_build_plan_without_local_pages():
+	plan = PageCacheService.buildPlan(['h1', 'h2', 'h1'], {'h2': _page(1, 'b')}, '')
+	assert [page['source'] for page in plan['pages']] == ['ocr', 'cache', 'ocr']
+	assert str(PageCacheService.ocrPageRanges(plan)) == '1,3'
+
+
+def test_apply_plan_merges_pages_in_order_and_caches_fresh_pages():
+	blob_service = _FakeBlobService()
+	page_cache = PageCacheService(blob_service)
+	plan = PageCacheService.buildPlan(
+		['h1', 'h2', 'h3', 'h4'], {'h2': _page(1, 'cached')}, 'en',
+		[None, None, {'source': 'blank', 'entry': ResultService.emptyPage()}, None])
+	ocr_result = {'status': 'ok', 'pages': [_page(2, 'ocr-h4'), _page(1, 'ocr-h1')]}
+
+	merged = page_cache.applyPlan(plan, ocr_result)
+
+	assert merged['status'] == 'ok'
+	assert _texts(merged) == [(1, 'ocr-h1'), (2, 'cached'), (3, None), (4, 'ocr-h4')]
+	assert sorted(blob_service.blobs) == ['ocr_page_cache/en/h1.json', 'ocr_page_cache/en/h4.json']
+	assert json.loads(blob_service.blobs['ocr_page_cache/en/h4.json']) == _page(1, 'ocr-h4')
+
+
+def test_apply_plan_keeps_placeholder_for_missing_ocr_page():
+	blob_service = _FakeBlobService()
+	plan = PageCacheService.buildPlan(['h1', 'h2'], {}, 'en')
+
+	merged = PageCacheService(blob_service).applyPlan(plan, {'pages': [_page(1, 'a')]})
+
+	assert _texts(merged) == [(1, 'a'), (2, None)]
+	# 缺失的页面不写入缓存
+	assert list(blob_service.blobs) == ['ocr_page_cache/en/h1.json']
+
+
+def test_apply_plan_without_ocr_result():
+	blob_service = _FakeBlobService()
+	plan = PageCacheService.buildPlan(['h1'], {'h1': _page(1, 'cached')}, 'en')
+	assert _texts(PageCacheService(blob_service).applyPlan(plan, None)) == [(1, 'cached')]
+	assert blob_service.blobs == {}
+
+
+def test_lookup_returns_only_hits():
+	blob_service = _FakeBlobService({'ocr_page_cache/default/h1.json': json.dumps(_page(1, 'a')).encode('utf-8')})
+	assert PageCacheService(blob_service).lookup(['h1', 'h2', 'h1'], '') == {'h1': _page(1, 'a')}
+
+
+def test_lookup_disabled(monkeypatch):
+	monkeypatch.setattr(page_cache_module, 'PAGE_CACHE_ENABLED', False)
+	blob_service = _FakeBlobService({'ocr_page_cache/default/h1.json': b'{}'})
+	assert PageCacheService(blob_service).lookup(['h1'], '') == {}
+
+
+def test_plan_round_trip():
+	page_cache = PageCacheService(_FakeBlobService())
+	plan = PageCacheService.buildPlan(['h1'], {}, 'zh')
+	assert page_cache.loadPlan('results_of_users/abc') is None
+	page_cache.savePlan('results_of_users/abc', plan)
+	assert page_cache.loadPlan('results_of_users/abc/') == plan
@@ -0,0 +1,64 @@
+import pytest
+
+from read_for_you.Services.PageRangeSet import PageRangeSet
+from read_for_you.Services.PDFService import PDFService
+
+
+def test_parse_merges_overlapping_and_adjacent_ranges():
+	page_ranges = PageRangeSet.parse('7-9, 3-6,5-8,1,2')
+	assert page_ranges.intervals == [(1, 9)]
+	assert str(PageRangeSet.parse('1-3,5,7-9,8')) == '1-3,5,7-9'
+
+
+def test_parse_empty_string_is_empty_set():
+	assert not PageRangeSet.parse('')
+	assert not PageRangeSet.parse(' , ')
+	assert len(PageRangeSet.parse('')) == 0
+
+
+@pytest.mark.parametrize('page_range', ['0', '0-3', '5-3', 'a', '1-', '-2', '1--2', '1;2'])
+def test_parse_rejects_invalid_ranges(page_range):
+	with pytest.raises(ValueError):
+		PageRangeSet.parse(page_range)
+
+
+def test_large_ranges_are_not_expanded():
+	page_ranges = PageRangeSet.parse('1-1000000,2000000')
+	assert page_ranges.intervals == [(1, 1000000), (2000000, 2000000)]
+	assert len(page_ranges) == 1000001
+	assert 999999 in page_ranges
+	assert 1500000 not in page_ranges
+
+
+def test_clamp_truncates_and_drops_ranges_beyond_document():
+	assert str(PageRangeSet.parse('2-4,6-10,20').clamp(8)) == '2-4,6-8'
+	assert not PageRangeSet.parse('10-20').clamp(6)
+
+
+def test_normalized_keeps_gaps():
+	assert str(PageRangeSet.parse('3-4,7').normalized()) == '1-2,5'
+	assert not PageRangeSet().normalized()
+
+
+def test_is_full():
+	assert PageRangeSet.full(5).isFull(5)
+	assert PageRangeSet.parse('1-2,3-5').isFull(5)
+	assert not PageRangeSet.parse('1-4').isFull(5)
+	assert not PageRangeSet.full(0).isFull(0)
+
+
+def test_from_pages_and_iteration():
+	page_ranges = PageRangeSet.fromPages([5, 1, 2, 2, 4])
+	assert str(page_ranges) == '1-2,4-5'
+	assert list(page_ranges) == [1, 2, 4, 5]
+	assert page_ranges == PageRangeSet.parse('1-2,4,5')
+
+
+def test_parse_page_range_clamps_to_document():
+	assert str(PDFService._parse_page_range('4-10', 6)) == '4-6'
+	assert PDFService._parse_page_range('', 6).isFull(6)
+
+
+def test_parse_page_range_rejects_range_beyond_document():
+	with pytest.raises(ValueError, match='页码范围超出 PDF 页数'):
+		PDFService._parse_page_range('10-20', 6)
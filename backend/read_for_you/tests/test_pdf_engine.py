@@ -0,0 +1,72 @@
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from read_for_you.Services import PDFEngine as pdf_engine_module
+from read_for_you.Services.PageRangeSet import PageRangeSet
+from read_for_you.Services.PDFEngine import PDFEngine, PikepdfEngine, PyMuPDFEngine, PyPDF2Engine, getEngine
+from read_for_you.Services.PDFService import PDFService
+
+
+def _pdf(pages):
+	writer = PdfWriter()
+	for index in range(pages):
+		writer.add_blank_page(width=100 + index, height=100)
+	output = BytesIO()
+	writer.write(output)
+	output.seek(0)
+	return output
+
+
+def test_engine_interface_is_abstract():
+	with pytest.raises(TypeError):
+		PDFEngine()
+
+
+def test_get_engine_by_name():
+	assert type(getEngine('pypdf2')) is PyPDF2Engine
+	assert type(getEngine('PyPDF2')) is PyPDF2Engine
+
+
+def test_get_engine_defaults_to_setting(monkeypatch):
+	monkeypatch.setattr(pdf_engine_module, 'PDF_ENGINE', 'pypdf2')
+	assert type(getEngine()) is PyPDF2Engine
+
+
+def test_unknown_engine_raises():
+	with pytest.raises(ValueError):
+		getEngine('ghostscript')
+
+
+@pytest.mark.parametrize('engine', [PyMuPDFEngine, PikepdfEngine])
+def test_missing_dependency_falls_back_to_pypdf2(monkeypatch, engine):
+	monkeypatch.setattr(engine, 'available', classmethod(lambda cls: False))
+	assert type(getEngine(engine.name)) is PyPDF2Engine
+
+
+def test_pypdf2_extracts_requested_pages():
+	engine = getEngine('pypdf2')
+	document = engine.open(_pdf(5))
+	assert engine.pageCount(document) == 5
+	assert not engine.isEncrypted(document)
+
+	output = BytesIO()
+	engine.write(engine.extractPages(document, PageRangeSet.parse('2,4-5')), output)
+	output.seek(0)
+	widths = [float(page.mediabox.width) for page in PdfReader(output).pages]
+	assert widths == [101, 103, 104]
+
+
+def test_extract_pdf_uses_requested_engine(monkeypatch):
+	used = []
+	original = PyPDF2Engine.extractPages
+
+	def extractPages(self, document, pages):
+		used.append(str(pages))
+		return original(self, document, pages)
+
+	monkeypatch.setattr(PyPDF2Engine, 'extractPages', extractPages)
+	output = PDFService.extractPDF(_pdf(5), '1-2', engine='pypdf2')
+	assert used == ['1-2']
+	assert len(PdfReader(output).pages) == 2
@@ -0,0 +1,78 @@
+import operator
+import os
+import time
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from read_for_you.Services import PDFWorkerService as worker_module
+from read_for_you.Services.PDFWorkerService import PDFWorkerService
+
+
+def _pdf(pages):
+	writer = PdfWriter()
+	for index in range(pages):
+		writer.add_blank_page(width=100 + index, height=100)
+	output = BytesIO()
+	writer.write(output)
+	output.seek(0)
+	return output
+
+
+def test_run_returns_job_result():
+	assert PDFWorkerService.run(operator.add, 2, 3) == 5
+
+
+def test_invalid_job_arguments_raise_value_error():
+	with pytest.raises(ValueError, match='invalid literal'):
+		PDFWorkerService.run(int, 'x')
+
+
+def test_job_failure_raises_exception():
+	with pytest.raises(Exception, match='PDF处理失败: division by zero'):
+		PDFWorkerService.run(operator.truediv, 1, 0)
+
+
+def test_slow_job_is_killed_after_timeout():
+	started = time.monotonic()
+	with pytest.raises(Exception, match='PDF处理超时'):
+		PDFWorkerService.run(time.sleep, 30, timeout=0.5)
+	assert time.monotonic() - started < 10
+
+
+def test_crashed_worker_is_reported():
+	with pytest.raises(Exception, match=r'exitcode=3'):
+		PDFWorkerService.run(os._exit, 3)
+
+
+def test_memory_limit():
+	with pytest.raises(Exception, match='超出内存限制 512 MB'):
+		PDFWorkerService.run(bytearray, 4 * 1024 ** 3, memory_mb=512)
+
+
+def test_extract_pdf_in_worker():
+	output = PDFWorkerService.extractPDF(_pdf(5), '2,4')
+	try:
+		assert output.tell() == 0
+		assert [float(page.mediabox.width) for page in PdfReader(output).pages] == [101, 103]
+	finally:
+		output.close()
+
+
+def test_extract_pdf_invalid_range_in_worker():
+	with pytest.raises(ValueError):
+		PDFWorkerService.extractPDF(_pdf(2), '5-6')
+
+
+def test_extract_pdf_inline_when_disabled(monkeypatch):
+	def fail(*args, **kwargs):
+		raise AssertionError('未启用工作进程时不应创建子进程')
+
+	monkeypatch.setattr(worker_module, 'PDF_WORKER_ENABLED', False)
+	monkeypatch.setattr(PDFWorkerService, 'run', fail)
+	output = PDFWorkerService.extractPDF(_pdf(3), '3')
+	try:
+		assert len(PdfReader(output).pages) == 1
+	finally:
+		output.close()
@@ -0,0 +1,155 @@
+import time
+
+import pytest
+import requests
+
+from read_for_you.Services import PollingService
+from read_for_you.Services.PollingService import RecognitionPoller, TaskEventHub
+from read_for_you.Services.RecognitionServices import RecognitionServices
+
+
+class _FakeSqlService:
+	updates = []
+
+	def update_task_status(self, request_id, status, lease_owner=None):
+		self.updates.append((request_id, status, lease_owner))
+		return {'success': True, 'affected': 1, 'error_msg': ''}
+
+
+class _FakeResponse:
+	def __init__(self, status_code=200, payload=None, headers=None):
+		self.status_code = status_code
+		self.payload = payload
+		self.headers = headers or {}
+
+	def json(self):
+		if self.payload is None:
+			raise ValueError('no JSON')
+		return self.payload
+
+
+@pytest.fixture
+def sql(monkeypatch):
+	_FakeSqlService.updates = []
+	monkeypatch.setattr(PollingService, 'SqlService', _FakeSqlService)
+	return _FakeSqlService
+
+
+@pytest.fixture
+def poller():
+	return RecognitionPoller()
+
+
+def _task(request_id, elapsed=10):
+	return {'requestId': request_id, 'elapsedSeconds': elapsed, 'pageRange': '1-4'}
+
+
+@pytest.mark.parametrize('response', [
+	requests.ConnectionError('DNS failure'),
+	_FakeResponse(502),
+	_FakeResponse(429, headers={'Retry-After': '7'}),
+	_FakeResponse(200, payload=None),
+])
+def test_check_status_reports_transient_failures_as_retry(monkeypatch, response):
+	def get(url, timeout):
+		if isinstance(response, Exception):
+			raise response
+		return response
+
+	monkeypatch.setattr(requests, 'get', get)
+	result = RecognitionServices.checkStatus('/analyzeResults/abc')
+	assert result['status'] == 'retry'
+	assert result['retry_after'] == (7 if getattr(response, 'status_code', None) == 429 else 0)
+
+
+def test_check_status_keeps_upstream_errors_terminal(monkeypatch):
+	monkeypatch.setattr(requests, 'get', lambda url, timeout: _FakeResponse(200, {'status': 'error', 'error_message': 'bad pdf'}))
+	assert RecognitionServices.checkStatus('/analyzeResults/abc') == {'status': 'error', 'error_message': 'bad pdf'}
+
+
+def test_transient_failure_schedules_retry_instead_of_failing(monkeypatch, sql, poller):
+	monkeypatch.setattr(PollingService.RecognitionServices, 'checkStatus',
+		lambda request_id: {'status': 'retry', 'error_message': 'request failed', 'retry_after': 0})
+
+	poller._poll_task(_task('/retry/1'))
+
+	assert sql.updates == []
+	assert poller.next_poll_at['/retry/1'] > time.time()
+	latest = TaskEventHub.instance().latest('/retry/1')
+	assert latest is None or latest[1]['stage'] not in TaskEventHub.TERMINAL_STAGES
+
+
+def test_transient_failures_give_up_after_task_timeout(monkeypatch, sql, poller):
+	monkeypatch.setattr(PollingService.RecognitionServices, 'checkStatus',
+		lambda request_id: {'status': 'retry', 'error_message': 'request failed', 'retry_after': 0})
+
+	poller._poll_task(_task('/retry/2', elapsed=PollingService.RECOGNITION_TASK_TIMEOUT_SECONDS + 1))
+
+	assert sql.updates == [('/retry/2', 'timeout', poller.owner)]
+	assert TaskEventHub.instance().latest('/retry/2')[1]['stage'] == 'error'
+	assert '/retry/2' not in poller.next_poll_at
+
+
+def test_upstream_error_fails_task(monkeypatch, sql, poller):
+	monkeypatch.setattr(PollingService.RecognitionServices, 'checkStatus',
+		lambda request_id: {'status': 'error', 'error_message': 'bad pdf'})
+
+	poller._poll_task(_task('/error/1'))
+
+	assert sql.updates == [('/error/1', 'error', poller.owner)]
+	event = TaskEventHub.instance().latest('/error/1')[1]
+	assert (event['stage'], event['error_msg']) == ('error', 'bad pdf')
+
+
+def test_shard_transient_failure_keeps_task_running(monkeypatch, poller):
+	statuses = {'/s/0': {'status': 'success', 'result': {'pages': []}},
+		'/s/1': {'status': 'retry', 'error_message': 'request failed', 'retry_after': 3}}
+	monkeypatch.setattr(PollingService.RecognitionServices, 'checkStatus', lambda request_id: statuses[request_id])
+
+	result = poller._check_shards('/local/x', [{'requestId': '/s/0', 'pages': 2}, {'requestId': '/s/1', 'pages': 2}])
+
+	assert result == {'status': 'Running', 'retry_after': 3}
+	assert list(poller.shard_results['/local/x']) == [0]
+
+
+def test_completed_is_published_only_after_status_update(monkeypatch, poller):
+	monkeypatch.setattr(PollingService.RecognitionServices, 'checkStatus',
+		lambda request_id: {'status': 'success', 'result': {'pages': []}})
+	monkeypatch.setattr(PollingService.ProcessingService, 'completeRecognition',
+		staticmethod(lambda request_id, result, lease_owner: False))
+
+	poller._poll_task(_task('/lost/1'))
+
+	assert TaskEventHub.instance().latest('/lost/1')[1]['stage'] == 'uploading'
+	assert '/lost/1' in poller.next_poll_at
+
+
+@pytest.fixture
+def poll_settings(monkeypatch):
+	monkeypatch.setattr(PollingService, 'RECOGNITION_POLL_MIN_SECONDS', 2)
+	monkeypatch.setattr(PollingService, 'RECOGNITION_POLL_MAX_SECONDS', 60)
+	monkeypatch.setattr(PollingService, 'RECOGNITION_SECONDS_PER_PAGE', 3)
+
+
+@pytest.mark.parametrize('elapsed, page_count, expected', [
+	# 预计 30 秒：等待剩余预计时间的一半
+	(0, 10, 15),
+	(20, 10, 5),
+	# 接近预计时间时不低于最小间隔
+	(29, 10, 2),
+	# 超出预计时间后按超出部分线性退避
+	(30, 10, 2),
+	(80, 10, 12),
+	# 不超过最大间隔
+	(1000, 10, 60),
+	# 页数未知时按 1 页估算
+	(0, 0, 2),
+])
+def test_poll_delay(poll_settings, elapsed, page_count, expected):
+	assert RecognitionPoller.computePollDelay(elapsed, page_count) == pytest.approx(expected)
+
+
+def test_poll_delay_honours_retry_after(poll_settings):
+	assert RecognitionPoller.computePollDelay(20, 10, retry_after=9) == pytest.approx(9)
+	assert RecognitionPoller.computePollDelay(0, 10, retry_after=9) == pytest.approx(15)
+	assert RecognitionPoller.computePollDelay(20, 10, retry_after=600) == pytest.approx(60)
@@ -0,0 +1,59 @@
+import pytest
+
+from read_for_you.Services import ProcessingService as processing
+from read_for_you.Services.ProcessingService import ProcessingService
+
+
+class _FakePageCacheService:
+	def __init__(self, blob_service=None):
+		pass
+
+	def loadPlan(self, prefix):
+		return None
+
+
+def _fake_sql(update_result):
+	class FakeSqlService:
+		updates = []
+
+		def update_task_status(self, request_id, status, lease_owner=None):
+			FakeSqlService.updates.append((request_id, status, lease_owner))
+			return update_result
+	return FakeSqlService
+
+
+@pytest.fixture
+def storage(monkeypatch):
+	uploads = []
+	monkeypatch.setattr(processing, 'AzureBlobService', lambda: object())
+	monkeypatch.setattr(processing, 'PageCacheService', _FakePageCacheService)
+	monkeypatch.setattr(ProcessingService, '_uploadResultJson',
+		staticmethod(lambda blob_service, request_id, result: uploads.append(request_id) or True))
+	return uploads
+
+
+def test_complete_recognition_updates_task(monkeypatch, storage):
+	sql = _fake_sql({'success': True, 'affected': 1, 'error_msg': ''})
+	monkeypatch.setattr(processing, 'SqlService', sql)
+	assert ProcessingService.completeRecognition('/r/1', {'pages': []}, 'node-a')
+	assert sql.updates == [('/r/1', 'Completed', 'node-a')]
+
+
+@pytest.mark.parametrize('update_result', [
+	{'success': True, 'affected': 0, 'error_msg': ''},
+	{'success': False, 'affected': 0, 'error_msg': 'connection lost'},
+])
+def test_complete_recognition_fails_when_status_not_updated(monkeypatch, storage, update_result):
+	monkeypatch.setattr(processing, 'SqlService', _fake_sql(update_result))
+	assert not ProcessingService.completeRecognition('/r/2', {'pages': []}, 'node-a')
+	assert storage == ['/r/2']
+
+
+def test_complete_recognition_skips_update_when_upload_fails(monkeypatch):
+	sql = _fake_sql({'success': True, 'affected': 1, 'error_msg': ''})
+	monkeypatch.setattr(processing, 'AzureBlobService', lambda: object())
+	monkeypatch.setattr(processing, 'PageCacheService', _FakePageCacheService)
+	monkeypatch.setattr(processing, 'SqlService', sql)
+	monkeypatch.setattr(ProcessingService, '_uploadResultJson', staticmethod(lambda *args: False))
+	assert not ProcessingService.completeRecognition('/r/3', {'pages': []}, 'node-a')
+	assert sql.updates == []
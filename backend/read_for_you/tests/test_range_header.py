@@ -0,0 +1,80 @@
+import pytest
+from django.test import RequestFactory
+
+from read_for_you import views
+from read_for_you.views import _parse_range_header
+
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize('header, expected', [
+	('bytes=0-99', (0, 99)),
+	('bytes=100-', (100, 999)),
+	('bytes=990-2000', (990, 999)),
+	('bytes=-100', (900, 999)),
+	('bytes=-5000', (0, 999)),
+	('bytes= 10-19', (10, 19)),
+])
+def test_satisfiable_ranges(header, expected):
+	assert _parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=-0', 'bytes=1000-', 'bytes=1000-1100', 'bytes=5000-6000'])
+def test_unsatisfiable_ranges(header):
+	assert _parse_range_header(header, SIZE) == (SIZE, SIZE)
+
+
+@pytest.mark.parametrize('header', ['', 'items=0-1', 'bytes=0-1,5-6', 'bytes=a-b', 'bytes=5-2', 'bytes=5000-10', 'bytes=-', 'bytes=1-x'])
+def test_ignored_headers_fall_back_to_full_response(header):
+	assert _parse_range_header(header, SIZE) is None
+
+
+class _FakeBlobService:
+	def __init__(self, data):
+		self.data = data
+
+	def getBlobProperties(self, blob_name):
+		return {'size': len(self.data), 'etag': '"0x1"', 'content_type': 'application/pdf', 'last_modified': None}
+
+	def openCachedBlob(self, blob_name, etag, size):
+		return None
+
+	def iterBlob(self, blob_name, offset=None, length=None):
+		offset = offset or 0
+		end = len(self.data) if length is None else offset + length
+		yield self.data[offset:end]
+
+
+@pytest.fixture
+def proxy_mode(monkeypatch):
+	monkeypatch.setattr(views, 'BLOB_DOWNLOAD_MODE', 'proxy')
+
+
+def _response(range_header=None, method='get'):
+	headers = {'HTTP_RANGE': range_header} if range_header else {}
+	request = getattr(RequestFactory(), method)('/getStoragedFile', **headers)
+	return views._blob_file_response(request, _FakeBlobService(bytes(range(256)) * 4), 'zbooksnap/a/book.pdf')
+
+
+def test_response_for_range_request(proxy_mode):
+	response = _response('bytes=-16')
+	assert response.status_code == 206
+	assert response['Content-Range'] == 'bytes 1008-1023/1024'
+	assert response['Content-Length'] == '16'
+	assert b''.join(response.streaming_content) == bytes(range(240, 256))
+
+
+@pytest.mark.parametrize('header', ['bytes=-0', 'bytes=1024-'])
+def test_response_for_unsatisfiable_range(proxy_mode, header):
+	response = _response(header)
+	assert response.status_code == 416
+	assert response['Content-Range'] == 'bytes */1024'
+
+
+def test_response_without_range(proxy_mode):
+	response = _response()
+	assert response.status_code == 200
+	assert response['Content-Length'] == '1024'
+	assert response['Accept-Ranges'] == 'bytes'
+	assert len(b''.join(response.streaming_content)) == 1024
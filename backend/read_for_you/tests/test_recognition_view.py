@@ -0,0 +1,88 @@
+import base64
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory
+
+from read_for_you import views
+
+
+PDF_BYTES = b'%PDF-1.4 cropped'
+
+
+class _FakeSqlService:
+	statuses = []
+	updates = []
+
+	def get_task_by_request_id(self, request_id, user_id=None):
+		status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+		return {'success': True, 'data': {'requestId': request_id, 'userId': user_id, 'status': status}, 'error_msg': ''}
+
+	def update_task_status(self, request_id, status, lease_owner=None):
+		self.updates.append((request_id, status))
+		return {'success': True, 'affected': 1, 'error_msg': ''}
+
+
+class _FakePoller:
+	def isRunning(self):
+		return True
+
+
+@pytest.fixture
+def recognition(monkeypatch):
+	pdf_file = io.BytesIO(PDF_BYTES)
+	submissions = {'completed': False}
+	_FakeSqlService.updates = []
+
+	def submit(file, page_range, language, user_id, book_name):
+		return {'success': True, 'request_id': '/analyzeResults/abc', 'pdf_file': pdf_file,
+			'completed': submissions['completed'], 'content_digest': 'd', 'error_msg': ''}
+
+	monkeypatch.setattr(views.ProcessingService, 'submitRecognition', staticmethod(submit))
+	monkeypatch.setattr(views.ProcessingService, 'loadResultJson',
+		staticmethod(lambda request_id, blob_service=None: {'pages': [{'pageNumber': 1}]}))
+	monkeypatch.setattr(views, 'SqlService', _FakeSqlService)
+	monkeypatch.setattr(views.RecognitionPoller, 'instance', classmethod(lambda cls: _FakePoller()))
+	monkeypatch.setattr(views.time, 'sleep', lambda seconds: None)
+
+	def call(statuses, completed=False):
+		_FakeSqlService.statuses = list(statuses)
+		submissions['completed'] = completed
+		request = RequestFactory().post('/recognition', {
+			'file': SimpleUploadedFile('book.pdf', b'%PDF-1.4 original', content_type='application/pdf'),
+			'pageNum': '1-2',
+		})
+		request.COOKIES['rfy_uuid'] = 'user-1'
+		response = views.recognition(request)
+		return json.loads(response.content), pdf_file
+
+	return call
+
+
+def test_completed_task_returns_legacy_payload(recognition):
+	payload, pdf_file = recognition(['Running', 'Completed'])
+	assert payload['status'] == 'success'
+	assert payload['result'] == {'pages': [{'pageNumber': 1}]}
+	assert payload['pdf'] == 'data:application/pdf;base64,' + base64.b64encode(PDF_BYTES).decode('utf-8')
+	assert 'pdfUrl' not in payload
+	assert pdf_file.closed
+
+
+def test_reused_result_returns_immediately(recognition):
+	payload, _ = recognition(['Completed'], completed=True)
+	assert payload['pdf'].startswith('data:application/pdf;base64,')
+
+
+def test_timeout_marks_task_as_timeout(recognition):
+	payload, pdf_file = recognition(['Running'])
+	assert payload == {'status': 'failed', 'data': None, 'error_msg': '识别超时'}
+	assert _FakeSqlService.updates == [('/analyzeResults/abc', 'timeout')]
+	assert pdf_file.closed
+
+
+def test_failed_task_returns_error(recognition):
+	payload, _ = recognition(['error'])
+	assert payload['status'] == 'failed'
+	assert _FakeSqlService.updates == []
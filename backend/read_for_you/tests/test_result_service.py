@@ -0,0 +1,47 @@
+from read_for_you.Services.ResultService import ResultService
+
+
+def _page(page_number, text):
+	return {'pageNumber': page_number, 'elements': [{'type': 'paragraph', 'properties': {'content': text}}]}
+
+
+def _texts(result):
+	return [(page['pageNumber'], page['elements'][0]['properties']['content']) for page in result['pages']]
+
+
+def test_stitch_shards_renumbers_pages():
+	results = [
+		{'status': 'ok', 'pages': [_page(1, 'a1'), _page(2, 'a2'), _page(3, 'a3')]},
+		{'status': 'ok', 'pages': [_page(1, 'b1'), _page(2, 'b2')]},
+		{'status': 'ok', 'pages': [_page(1, 'c1')]},
+	]
+	stitched = ResultService.stitchShards(results, [3, 2, 1])
+	assert _texts(stitched) == [(1, 'a1'), (2, 'a2'), (3, 'a3'), (4, 'b1'), (5, 'b2'), (6, 'c1')]
+	assert stitched['status'] == 'ok'
+
+
+def test_stitch_shards_sorts_pages_within_shard():
+	results = [{'pages': [_page(2, 'a2'), _page(1, 'a1')]}, {'pages': [_page(2, 'b2'), _page(1, 'b1')]}]
+	assert _texts(ResultService.stitchShards(results, [2, 2])) == [(1, 'a1'), (2, 'a2'), (3, 'b1'), (4, 'b2')]
+
+
+def test_stitch_shards_keeps_page_numbers_when_pages_are_missing():
+	# 第一个分片缺少第 2 页：后续分片仍按分片页数偏移，不向前补位
+	results = [{'pages': [_page(1, 'a1'), _page(3, 'a3')]}, {'pages': [_page(2, 'b2')]}]
+	assert _texts(ResultService.stitchShards(results, [3, 2])) == [(1, 'a1'), (3, 'a3'), (5, 'b2')]
+
+
+def test_stitch_shards_drops_pages_outside_shard():
+	results = [{'pages': [_page(0, 'x'), _page(1, 'a1'), _page(3, 'a3')]}, {'pages': [_page(1, 'b1')]}]
+	assert _texts(ResultService.stitchShards(results, [2, 1])) == [(1, 'a1'), (3, 'b1')]
+
+
+def test_stitch_shards_does_not_modify_inputs():
+	page = _page(1, 'b1')
+	ResultService.stitchShards([{'pages': [_page(1, 'a1')]}, {'pages': [page]}], [1, 1])
+	assert page['pageNumber'] == 1
+
+
+def test_stitch_shards_handles_empty_and_invalid_results():
+	assert ResultService.stitchShards([], []) == {'pages': []}
+	assert _texts(ResultService.stitchShards([None, {'pages': [_page(1, 'b1')]}], [2, 1])) == [(3, 'b1')]
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from read_for_you.Services.SingleFlight import SingleFlight
+
+
+def _wait_for(condition):
+	deadline = time.monotonic() + 5
+	while not condition():
+		assert time.monotonic() < deadline
+		time.sleep(0.001)
+
+
+def _run_concurrently(single_flight, key, fn, count):
+	"""count 个线程以同一 key 调用 do()，首个线程执行 fn 期间其余线程全部进入等待后才放行"""
+	release = threading.Event()
+	outcomes = [None] * count
+
+	def blocking():
+		assert release.wait(5)
+		return fn()
+
+	def worker(index):
+		try:
+			outcomes[index] = ('result', single_flight.do(key, blocking))
+		except Exception as e:
+			outcomes[index] = ('error', e)
+
+	threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+	for thread in threads:
+		thread.start()
+	_wait_for(lambda: single_flight.stats()['coalesced'] == count - 1)
+	release.set()
+	for thread in threads:
+		thread.join(5)
+	return outcomes
+
+
+def test_concurrent_calls_share_one_execution():
+	single_flight = SingleFlight()
+	calls = []
+	result = object()
+
+	outcomes = _run_concurrently(single_flight, 'blob', lambda: calls.append(1) or result, 5)
+
+	assert len(calls) == 1
+	assert all(outcome == ('result', result) for outcome in outcomes)
+	assert single_flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_exception_is_shared_with_waiters():
+	single_flight = SingleFlight()
+	error = FileNotFoundError('blob')
+
+	def fail():
+		raise error
+
+	outcomes = _run_concurrently(single_flight, 'blob', fail, 3)
+
+	assert outcomes == [('error', error)] * 3
+	assert single_flight.stats()['in_flight'] == 0
+
+
+def test_completed_call_is_not_cached():
+	single_flight = SingleFlight()
+	assert single_flight.do('blob', lambda: 1) == 1
+	assert single_flight.do('blob', lambda: 2) == 2
+	with pytest.raises(ValueError):
+		single_flight.do('blob', lambda: int('x'))
+	assert single_flight.do('blob', lambda: 3) == 3
+	assert single_flight.stats() == {'executed': 4, 'coalesced': 0, 'in_flight': 0}
+
+
+def test_different_keys_run_independently():
+	single_flight = SingleFlight()
+	started = threading.Event()
+	release = threading.Event()
+
+	def slow():
+		started.set()
+		assert release.wait(5)
+		return 'a'
+
+	thread = threading.Thread(target=single_flight.do, args=('a', slow))
+	thread.start()
+	assert started.wait(5)
+	assert single_flight.stats()['in_flight'] == 1
+	# 'a' 仍在执行时 'b' 不需要等待
+	assert single_flight.do('b', lambda: 'b') == 'b'
+	release.set()
+	thread.join(5)
+	assert single_flight.stats() == {'executed': 2, 'coalesced': 0, 'in_flight': 0}
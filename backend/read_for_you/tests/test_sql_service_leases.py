@@ -0,0 +1,146 @@
+import re
+
+import pytest
+
+from read_for_you.Services.SqlService import SqlService
+
+
+class _FakeCursor:
+	def __init__(self, connection):
+		self.connection = connection
+		self.rowcount = 0
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		return False
+
+	def execute(self, sql, params=()):
+		sql = re.sub(r'\s+', ' ', sql).strip()
+		self.connection.executed.append((sql, tuple(params)))
+		if self.connection.fail_on and self.connection.fail_on in sql:
+			raise RuntimeError('deadlock')
+		self.rowcount = self.connection.rowcount
+
+	def fetchone(self):
+		return self.connection.results.pop(0)
+
+	def fetchall(self):
+		return self.connection.results.pop(0)
+
+
+class _FakeConnection:
+	def __init__(self, results=(), rowcount=0, fail_on=None):
+		self.results = list(results)
+		self.rowcount = rowcount
+		self.fail_on = fail_on
+		self.executed = []
+		self.events = []
+
+	def cursor(self):
+		return _FakeCursor(self)
+
+	def begin(self):
+		self.events.append('begin')
+
+	def commit(self):
+		self.events.append('commit')
+
+	def rollback(self):
+		self.events.append('rollback')
+
+	def close(self):
+		self.events.append('close')
+
+
+@pytest.fixture
+def connect(monkeypatch):
+	def install(connection):
+		monkeypatch.setattr(SqlService, '_get_connection', lambda self: connection)
+		return connection
+	return install
+
+
+def test_acquire_leases_renews_then_claims_remaining_capacity(connect):
+	held_rows = [{'id': 1, 'requestId': 'a'}, {'id': 7, 'requestId': 'b'}, {'id': 9, 'requestId': 'c'}]
+	connection = connect(_FakeConnection(results=[{'held': 1}, [{'id': 7}, {'id': 9}], held_rows]))
+
+	result = SqlService().acquire_task_leases('node-1', batch_size=3, lease_seconds=90)
+
+	assert result == {'success': True, 'count': 3, 'data': held_rows, 'error_msg': ''}
+	statements = [sql for sql, _ in connection.executed]
+	params = [params for _, params in connection.executed]
+	assert statements[0].startswith('UPDATE Tasks SET leaseExpiry = NOW() + INTERVAL %s SECOND WHERE leaseOwner = %s')
+	assert params[0] == (90, 'node-1')
+	# 只认领剩余容量，且跳过其他节点锁定的行
+	assert statements[2].endswith('LIMIT %s FOR UPDATE SKIP LOCKED')
+	assert 'leaseExpiry < NOW()' in statements[2]
+	assert params[2] == (2,)
+	assert 'WHERE id IN (%s, %s)' in statements[3]
+	assert params[3] == ('node-1', 90, 7, 9)
+	assert params[4] == ('node-1',)
+	assert connection.events == ['begin', 'commit', 'close']
+
+
+def test_acquire_leases_skips_claim_when_full(connect):
+	connection = connect(_FakeConnection(results=[{'held': 3}, []]))
+
+	result = SqlService().acquire_task_leases('node-1', batch_size=3, lease_seconds=90)
+
+	assert result['success'] and result['count'] == 0
+	assert not any('SKIP LOCKED' in sql for sql, _ in connection.executed)
+	assert len(connection.executed) == 3
+
+
+def test_acquire_leases_rolls_back_on_error(connect):
+	connection = connect(_FakeConnection(results=[{'held': 0}], fail_on='SKIP LOCKED'))
+
+	result = SqlService().acquire_task_leases('node-1', batch_size=3, lease_seconds=90)
+
+	assert result == {'success': False, 'count': 0, 'data': [], 'error_msg': 'deadlock'}
+	assert connection.events == ['begin', 'rollback', 'close']
+
+
+def test_acquire_single_lease_only_takes_free_or_own_rows(connect):
+	row = {'id': 3, 'requestId': 'abc', 'elapsedSeconds': 12}
+	connection = connect(_FakeConnection(results=[row]))
+
+	result = SqlService().acquire_task_lease('abc', 'node-1', lease_seconds=90)
+
+	assert result == {'success': True, 'data': row, 'error_msg': ''}
+	claim_sql, claim_params = connection.executed[0]
+	assert 'leaseOwner IS NULL OR leaseOwner = %s OR leaseExpiry IS NULL OR leaseExpiry < NOW()' in claim_sql
+	assert claim_params == ('node-1', 90, 'abc', 'node-1')
+	assert connection.executed[1][1] == ('abc', 'node-1')
+
+
+def test_acquire_single_lease_held_elsewhere(connect):
+	connect(_FakeConnection(results=[None]))
+	assert SqlService().acquire_task_lease('abc', 'node-1', lease_seconds=90)['data'] is None
+
+
+def test_status_update_by_lease_owner_releases_lease(connect):
+	connection = connect(_FakeConnection(rowcount=0))
+
+	result = SqlService().update_task_status('abc', 'Completed', lease_owner='node-1')
+
+	assert result == {'success': True, 'affected': 0, 'error_msg': ''}
+	sql, params = connection.executed[0]
+	assert sql == ('UPDATE Tasks SET status = %s, leaseOwner = NULL, leaseExpiry = NULL '
+		'WHERE requestId = %s AND leaseOwner = %s')
+	assert params == ('Completed', 'abc', 'node-1')
+
+
+def test_status_update_without_owner(connect):
+	connection = connect(_FakeConnection(rowcount=1))
+	assert SqlService().update_task_status('abc', 'timeout')['affected'] == 1
+	assert connection.executed == [('UPDATE Tasks SET status = %s WHERE requestId = %s', ('timeout', 'abc'))]
+
+
+def test_release_leases(connect):
+	connection = connect(_FakeConnection(rowcount=4))
+	assert SqlService().release_task_leases('node-1') == {'success': True, 'affected': 4, 'error_msg': ''}
+	assert connection.executed == [
+		('UPDATE Tasks SET leaseOwner = NULL, leaseExpiry = NULL WHERE leaseOwner = %s', ('node-1',)),
+	]
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+
+import pytest
+
+from read_for_you import views
+from read_for_you.Services.PollingService import TaskEventHub
+
+
+@pytest.fixture
+def hub(monkeypatch):
+	hub = TaskEventHub()
+	monkeypatch.setattr(TaskEventHub, 'instance', classmethod(lambda cls: hub))
+	return hub
+
+
+def test_publish_keeps_latest_event_and_skips_repeats(hub):
+	hub.publish('a', 'queued')
+	hub.publish('a', 'running')
+	hub.publish('a', 'running', progress=1)
+	seq, event = hub.latest('a')
+	assert seq == 2
+	assert event['stage'] == 'running' and 'progress' not in event
+	assert hub.latest('b') is None
+
+
+def test_wait_returns_newer_event_immediately(hub):
+	hub.publish('a', 'running')
+	assert hub.wait('a', 0, timeout=1)[1]['stage'] == 'running'
+
+
+def test_wait_times_out_without_new_event(hub):
+	hub.publish('a', 'running')
+	started = time.monotonic()
+	assert hub.wait('a', 1, timeout=0.05) is None
+	assert time.monotonic() - started >= 0.05
+
+
+def test_wait_wakes_on_publish(hub):
+	timer = threading.Timer(0.05, hub.publish, ('a', 'completed'))
+	timer.start()
+	try:
+		seq, event = hub.wait('a', 0, timeout=5)
+	finally:
+		timer.cancel()
+	assert event['stage'] == 'completed'
+
+
+def test_prune_drops_only_expired_terminal_events(hub, monkeypatch):
+	hub.publish('done', 'completed')
+	hub.publish('failed', 'error')
+	hub.publish('running', 'running')
+	monkeypatch.setattr(TaskEventHub, 'RETENTION_SECONDS', -1)
+	hub.publish('new', 'queued')
+	assert hub.latest('done') is None and hub.latest('failed') is None
+	assert hub.latest('running') is not None and hub.latest('new') is not None
+
+
+class _FakeSqlService:
+	status = 'Running'
+
+	def get_task_by_request_id(self, request_id, user_id=None):
+		return {'success': True, 'data': {'requestId': request_id, 'status': self.status}, 'error_msg': ''}
+
+
+def _stages(stream):
+	return [line[len('event: '):] for chunk in stream for line in chunk.split('\n') if line.startswith('event: ')]
+
+
+def test_stream_replays_terminal_event_and_ends(hub):
+	hub.publish('a', 'completed')
+	chunks = list(views._recognition_event_stream('a', 'Running'))
+	assert chunks[0].startswith('retry: ')
+	assert chunks[1].startswith('id: 1\nevent: completed\n')
+	assert len(chunks) == 2
+
+
+def test_stream_forwards_published_events(hub, monkeypatch):
+	monkeypatch.setattr(views, 'RECOGNITION_EVENTS_KEEPALIVE_SECONDS', 5)
+	timer = threading.Timer(0.05, hub.publish, ('a', 'completed'))
+	timer.start()
+	try:
+		stages = _stages(views._recognition_event_stream('a', 'Running'))
+	finally:
+		timer.cancel()
+	assert stages == ['running', 'completed']
+
+
+def test_stream_falls_back_to_database_status(hub, monkeypatch):
+	monkeypatch.setattr(views, 'RECOGNITION_EVENTS_KEEPALIVE_SECONDS', 0.01)
+	monkeypatch.setattr(views, 'SqlService', _FakeSqlService)
+	monkeypatch.setattr(_FakeSqlService, 'status', 'Failed')
+
+	chunks = list(views._recognition_event_stream('a', 'Running'))
+
+	last = chunks[-1]
+	assert last.startswith('event: error\n')
+	assert json.loads(last.split('data: ', 1)[1])['error_msg'] == '识别任务状态: Failed'
+
+
+def test_stream_sends_keepalive_and_ends_at_deadline(hub, monkeypatch):
+	monkeypatch.setattr(views, 'RECOGNITION_EVENTS_KEEPALIVE_SECONDS', 0.01)
+	monkeypatch.setattr(views, 'RECOGNITION_EVENTS_STREAM_SECONDS', 0.05)
+	monkeypatch.setattr(views, 'SqlService', _FakeSqlService)
+
+	chunks = list(views._recognition_event_stream('a', 'Running'))
+
+	assert ': keep-alive\n\n' in chunks
+	assert not any('event: completed' in chunk or 'event: error' in chunk for chunk in chunks)
@@ -0,0 +1,126 @@
+import pytest
+
+from read_for_you.Services import UploadService as upload_module
+from read_for_you.Services.BlobFile import BlobFile
+from read_for_you.Services.UploadService import UploadService
+
+
+UPLOAD_ID = 'a' * 32
+
+
+class _FakeBlobService:
+	def __init__(self):
+		self.staged = {}
+		self.committed = {}
+		self.blobs = {}
+
+	def stageBlock(self, blob_name, block_id, data):
+		self.staged.setdefault(blob_name, {})[block_id] = data
+
+	def getBlockIds(self, blob_name):
+		return list(self.committed.get(blob_name, [])), sorted(self.staged.get(blob_name, {}))
+
+	def commitBlocks(self, blob_name, block_ids, content_type=None):
+		staged = self.staged.pop(blob_name)
+		self.committed[blob_name] = list(block_ids)
+		self.blobs[blob_name] = b''.join(staged[block_id] for block_id in block_ids)
+
+	def getBlobProperties(self, blob_name):
+		if blob_name not in self.blobs:
+			raise FileNotFoundError(blob_name)
+		return {'size': len(self.blobs[blob_name]), 'etag': '"0x1"', 'content_type': 'application/pdf', 'last_modified': None}
+
+	def iterBlob(self, blob_name, offset=None, length=None):
+		offset = offset or 0
+		end = len(self.blobs[blob_name]) if length is None else offset + length
+		yield self.blobs[blob_name][offset:end]
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+	monkeypatch.setattr(upload_module, 'UPLOAD_CHUNK_SIZE', 4)
+	monkeypatch.setattr(upload_module, 'UPLOAD_MAX_CHUNKS', 10)
+	blob_service = _FakeBlobService()
+	return UploadService(blob_service), blob_service
+
+
+def test_new_upload_ids_are_valid():
+	upload_id = UploadService.newUploadId()
+	assert UploadService._blob_name('user-1', upload_id) == f'uploads/user-1/{upload_id}.pdf'
+
+
+@pytest.mark.parametrize('user_id, upload_id', [
+	('user-1', '../../x'),
+	('user-1', 'A' * 32),
+	('', UPLOAD_ID),
+	('a/b', UPLOAD_ID),
+	('..', UPLOAD_ID),
+])
+def test_invalid_ids_are_rejected(user_id, upload_id):
+	with pytest.raises(ValueError):
+		UploadService._blob_name(user_id, upload_id)
+
+
+@pytest.mark.parametrize('index, data, error', [
+	(-1, b'abc', '分块序号超出范围 (0-9)'),
+	(10, b'abc', '分块序号超出范围 (0-9)'),
+	(0, b'', '分块内容为空'),
+	(0, b'abcde', '分块大小超过 4 字节'),
+])
+def test_stage_chunk_validation(uploads, index, data, error):
+	service, blob_service = uploads
+	assert service.stageChunk('user-1', UPLOAD_ID, index, data) == {'success': False, 'error_msg': error}
+	assert blob_service.staged == {}
+
+
+def test_chunks_commit_in_index_order(uploads):
+	service, blob_service = uploads
+	for index, data in [(2, b'89'), (0, b'0123'), (1, b'4567'), (1, b'4567')]:
+		assert service.stageChunk('user-1', UPLOAD_ID, index, data)['success']
+	assert service.receivedChunks('user-1', UPLOAD_ID) == [0, 1, 2]
+
+	result = service.commit('user-1', UPLOAD_ID, 3)
+
+	blob_name = f'uploads/user-1/{UPLOAD_ID}.pdf'
+	assert result == {'success': True, 'blob_name': blob_name, 'missing': [], 'error_msg': ''}
+	assert blob_service.blobs[blob_name] == b'0123456789'
+	# 重复提交（客户端重试）直接成功
+	assert service.commit('user-1', UPLOAD_ID, 3)['success']
+
+
+def test_commit_reports_missing_chunks(uploads):
+	service, blob_service = uploads
+	service.stageChunk('user-1', UPLOAD_ID, 1, b'4567')
+
+	result = service.commit('user-1', UPLOAD_ID, 4)
+
+	assert not result['success']
+	assert result['missing'] == [0, 2, 3]
+	assert blob_service.blobs == {}
+
+
+@pytest.mark.parametrize('total_chunks', [0, 11])
+def test_commit_rejects_invalid_total(uploads, total_chunks):
+	service, _ = uploads
+	assert service.commit('user-1', UPLOAD_ID, total_chunks)['error_msg'] == 'totalChunks 无效'
+
+
+def test_open_reads_committed_blob_lazily(uploads, monkeypatch):
+	service, _ = uploads
+	monkeypatch.setattr(BlobFile, 'BLOCK_SIZE', 3)
+	for index, data in enumerate([b'%PDF', b'-1.4', b' end']):
+		service.stageChunk('user-1', UPLOAD_ID, index, data)
+	service.commit('user-1', UPLOAD_ID, 3)
+
+	with service.open('user-1', UPLOAD_ID, 'book.pdf') as file:
+		assert file.name == 'book.pdf'
+		file.seek(-3, 2)
+		assert file.read() == b'end'
+		file.seek(0)
+		assert file.read() == b'%PDF-1.4 end'
+
+
+def test_open_missing_upload(uploads):
+	service, _ = uploads
+	with pytest.raises(FileNotFoundError):
+		service.open('user-1', UPLOAD_ID)
@@ -9,12 +9,26 @@ from django.conf.urls.static import static
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("recognition", views.recognition, name="recognition"),
+    path("submitRecognition", views.submitRecognition, name="submitRecognition"),
+    path("submitRecognitionBatch", views.submitRecognitionBatch, name="submitRecognitionBatch"),
+    path("createUpload", views.createUpload, name="createUpload"),
+    path("uploadChunk", views.uploadChunk, name="uploadChunk"),
+    path("getUploadStatus", views.getUploadStatus, name="getUploadStatus"),
+    path("completeUpload", views.completeUpload, name="completeUpload"),
+    path("getRecognitionStatus", views.getRecognitionStatus, name="getRecognitionStatus"),
+    path("recognitionEvents", views.recognitionEvents, name="recognitionEvents"),
     path("getStoragedData", views.getStoragedData, name="getStoragedData"),
+    path("getStoragedFile", views.getStoragedFile, name="getStoragedFile"),
     path("getBookMetadata", views.getBookMetadata, name="getBookMetadata"),
     path("getImageFromAB2", views.getImageFromAB2, name="getImageFromAB2"),
+    path("getImage", views.getImage, name="getImage"),
+    path("getImagesBatch", views.getImagesBatch, name="getImagesBatch"),
+    path("getBlobMetrics", views.getBlobMetrics, name="getBlobMetrics"),
     path("getPageData", views.getPageData, name="getPageData"),
     path("getBookHistory", views.getBookHistory, name="getBookHistory"),
     path("getResultOfUser", views.getResultOfUser, name="getResultOfUser"),
+    path("getResultPDF", views.getResultPDF, name="getResultPDF"),
+    path("getResultJSON", views.getResultJSON, name="getResultJSON"),
 ]
 
 # Serve static files (both development and production for SPA)
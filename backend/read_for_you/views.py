@@ -1,17 +1,31 @@
 import os
 import json
+import mmap
 import time
 import base64
 from io import BytesIO
+from urllib.parse import urlencode
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, FileResponse, HttpResponse
+from django.http import JsonResponse, FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.conf import settings
-from .Services.PDFService import PDFService
+from django.urls import reverse
 from .Services.ProcessingService import ProcessingService
-from .Services.RecognitionServices import RecognitionServices
 from .Services.AzureBlobService import AzureBlobService
 from .Services.AzureBlobService2 import AzureBlobService2
 from .Services.SqlService import SqlService
+from .Services.PollingService import RecognitionPoller, TaskEventHub
+from .Services.UploadService import UploadService
+from .Services.HedgedReader import HedgedReader
+from .constants import (
+	RECOGNITION_EVENTS_KEEPALIVE_SECONDS,
+	RECOGNITION_EVENTS_STREAM_SECONDS,
+	RECOGNITION_EVENTS_RETRY_MS,
+	BATCH_RECOGNITION_MAX_FILES,
+	UPLOAD_CHUNK_SIZE,
+	BLOB_DOWNLOAD_MODE,
+	IMAGE_HTTP_MAX_AGE_SECONDS,
+	IMAGE_BATCH_MAX_URLS,
+)
 from .Services.test import testBulkJSON
 import asyncio
 
@@ -24,14 +38,163 @@ def _standard_api_response(success: bool, data=None, error_msg: str = "") -> Jso
 		"error_msg": error_msg,
 	}, status=200)
 
+def _close_submission_file(submit_result):
+	"""关闭提交结果中裁剪后的 PDF 临时文件"""
+	pdf_file = submit_result.get('pdf_file')
+	if pdf_file:
+		pdf_file.close()
+
+
+def _parse_range_header(range_header: str, size: int):
+	"""
+	解析单个区间的 Range 请求头（bytes=a-b、bytes=a-、bytes=-n）
+
+	返回:
+		(起始偏移, 结束偏移)（含结束位置）；请求头缺失、格式无效或包含多个区间时返回 None（按完整内容响应），
+		区间超出文件范围时返回 (size, size)（对应 416）
+	"""
+	if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+		return None
+	start, _, end = range_header[len('bytes='):].strip().partition('-')
+	try:
+		if not start:
+			length = int(end)
+			if length <= 0:
+				return (size, size)
+			return (max(0, size - length), size - 1)
+		start = int(start)
+		end = int(end) if end else None
+	except ValueError:
+		return None
+	if end is not None and end < start:
+		return None
+	if start >= size:
+		return (size, size)
+	return (start, size - 1 if end is None else min(end, size - 1))
+
+
+def _iter_mmap(content, start: int, end: int, chunk_size: int = 1024 * 1024):
+	"""按块读取 mmap 中 [start, end] 的内容，迭代结束（或响应被关闭）时关闭 mmap"""
+	try:
+		for offset in range(start, end + 1, chunk_size):
+			yield content[offset:min(offset + chunk_size, end + 1)]
+	finally:
+		content.close()
+
+
+def _blob_file_response(request, blob_service, blob_name: str, content_type: str = None, file_name: str = ''):
+	"""
+	以二进制流返回 blob 内容，支持 Range 请求（pdf.js 只按需读取正在渲染的页面）
+
+	完整请求返回 200，区间请求返回 206 与 Content-Range，区间无效返回 416；
+	内容按块从 Blob Storage 读取后直接写出，不在内存中整体缓存；可缓存的 blob 命中本机磁盘缓存时从 mmap 读取，
+	未命中时直接读取所需区间，缓存在后台填充。
+	blob 不存在时抛出 FileNotFoundError。
+	BLOB_DOWNLOAD_MODE 不为 proxy 时直接 302 重定向到短期只读 SAS URL，由浏览器从 Blob Storage 下载
+	"""
+	if BLOB_DOWNLOAD_MODE != 'proxy':
+		return HttpResponseRedirect(blob_service.getReadUrl(blob_name))
+
+	properties = blob_service.getBlobProperties(blob_name)
+	size = properties['size']
+	content_type = content_type or properties['content_type'] or 'application/octet-stream'
+
+	byte_range = _parse_range_header(request.headers.get('Range', ''), size)
+	if byte_range and byte_range[0] >= size:
+		response = HttpResponse(status=416)
+		response['Content-Range'] = f'bytes */{size}'
+		return response
+
+	cached = None
+	if request.method != 'HEAD' and properties['etag'] and size:
+		cached = blob_service.openCachedBlob(blob_name, properties['etag'], size)
+
+	if request.method == 'HEAD':
+		response = HttpResponse(content_type=content_type)
+		content_length = size
+	elif byte_range:
+		start, end = byte_range
+		content_length = end - start + 1
+		if cached is not None:
+			content = _iter_mmap(cached, start, end)
+		else:
+			content = blob_service.iterBlob(blob_name, offset=start, length=content_length)
+		response = StreamingHttpResponse(content, status=206, content_type=content_type)
+		response['Content-Range'] = f'bytes {start}-{end}/{size}'
+	else:
+		content_length = size
+		content = _iter_mmap(cached, 0, size - 1) if cached is not None else blob_service.iterBlob(blob_name)
+		response = StreamingHttpResponse(content, content_type=content_type)
+
+	response['Content-Length'] = str(content_length)
+	response['Accept-Ranges'] = 'bytes'
+	if properties['etag']:
+		response['ETag'] = properties['etag']
+	if file_name:
+		response['Content-Disposition'] = f'inline; filename="{file_name}"'
+	return response
+
+
+def _wait_for_recognition(request_id: str, user_id: str, pdf_file, completed: bool) -> JsonResponse:
+	"""
+	阻塞等待识别任务完成或出错，按旧客户端的格式返回
+
+	返回:
+		完成: { "status": "success", "result": <识别结果>, "pdf": "data:application/pdf;base64,..." }
+		出错或超时: 统一结构的失败响应；超时时将任务状态更新为 timeout
+	"""
+	max_retries = 30  # 最多等待 30 次
+	poll_interval = 5  # 每次间隔 5 秒
+	sql_service = SqlService()
+	poller = RecognitionPoller.instance()
+	polled_inline = False
+
+	for attempt in range(max_retries):
+		# 复用已有结果或全部命中页面缓存时任务已经是 Completed，无需先等待
+		if attempt or not completed:
+			time.sleep(poll_interval)
+		if not completed and not poller.isRunning() and poller.pollNow(request_id):
+			if not polled_inline:
+				print(f"⚠️ 没有识别任务轮询器认领该任务，由请求直接轮询: {request_id}")
+				polled_inline = True
+		task_result = sql_service.get_task_by_request_id(request_id, user_id)
+		status = (task_result['data'] or {}).get('status')
+
+		if status == 'Completed':
+			# 与旧版相同的响应格式：识别结果内嵌，裁剪后的 PDF 以 base64 data URL 返回
+			pdf_file.seek(0)
+			pdf_base64 = base64.b64encode(pdf_file.read()).decode('utf-8')
+			return JsonResponse({
+				'status': 'success',
+				'result': ProcessingService.loadResultJson(request_id),
+				'pdf': f'data:application/pdf;base64,{pdf_base64}',
+			})
+
+		elif status == 'Running' or not task_result['success']:
+			# 继续等待
+			continue
+		else:
+			latest = TaskEventHub.instance().latest(request_id)
+			error_msg = latest[1].get('error_msg') if latest else None
+			return _standard_api_response(False, error_msg=error_msg or f'识别出错: {status}')
+
+	# 超时：与旧版一致，任务状态更新为 timeout，不再继续轮询
+	sql_service.update_task_status(request_id, 'timeout')
+	return _standard_api_response(False, error_msg='识别超时')
+
+
 @csrf_exempt
 def recognition(request):
 	"""
-	识别路由：处理PDF文件上传并进行异步识别
+	识别路由（阻塞模式，供旧客户端使用）：处理PDF文件上传并进行异步识别
+	新客户端请使用 submitRecognition + getRecognitionStatus
 	1. 调用 PDFService.extractPDF 裁剪 PDF
 	2. 调用异步API拿到request_id
 	3. 添加数据库数据，存入uuid(cookie), bookName, pageRange, request_id等信息
-	4. 循环调用checkStatus，直到状态为complete或error时返回json_response
+	4. 等待后台轮询器（RecognitionPoller）更新任务状态，直到状态为complete或error时返回json_response
+	   （响应格式与旧版相同：{ "status": "success", "result": ..., "pdf": <data URL> }，见 _wait_for_recognition）
+	   本进程没有运行轮询器（RECOGNITION_POLLER_IN_PROCESS=false），且任务没有被其他进程的轮询器认领时
+	   （如未运行 scripts/run_recognition_poller.py），由当前请求直接轮询识别状态
 	"""
 	# 1. 解析请求参数
 	file = request.FILES.get('file')
@@ -48,97 +211,410 @@ def recognition(request):
 		return _standard_api_response(False, error_msg='缺少文件参数')
 
 	try:
-		# 2. 使用 PDFService 裁剪 PDF
-		extracted_pdf = PDFService.extractPDF(file, page_range)
-		file_data = extracted_pdf.read()
+		# 2~4. 裁剪 PDF、复用已有结果或调用异步识别 API、上传 PDF 并插入数据库记录
+		submit_result = ProcessingService.submitRecognition(file, page_range, language, user_id, book_name)
+		if not submit_result['success']:
+			_close_submission_file(submit_result)
+			return _standard_api_response(False, error_msg=submit_result['error_msg'])
+
+		request_id = submit_result['request_id']
+		pdf_file = submit_result['pdf_file']
+		try:
+			return _wait_for_recognition(request_id, user_id, pdf_file, submit_result['completed'])
+		finally:
+			pdf_file.close()
 
-		# 将页码范围转换为从1开始（用于传给识别 API）
-		normalized_page_range = ''
-		if page_range:
-			normalized_page_range = PDFService.normalizePageRange(page_range)
+	except Exception as e:
+		print(f"❌ recognition Error: {e}")
+		return _standard_api_response(False, error_msg=f'识别过程中发生错误: {str(e)}')
 
-		# 3. 调用异步识别 API 获取 request_id
-		request_id = RecognitionServices.callAsyncRecognitionAPI(file_data, normalized_page_range, language)
 
-		if not request_id:
-			return _standard_api_response(False, error_msg='调用异步识别 API 失败')
+@csrf_exempt
+def submitRecognition(request):
+	"""
+	非阻塞识别路由：提交识别任务后立即返回 requestId
+	识别结果通过 getRecognitionStatus 查询
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
 
-		# 4. 插入数据库记录
-		sql_service = SqlService()
-		insert_result = sql_service.insert_task(
-			user_id=user_id,
-			request_id=request_id,
-			book_name=book_name,
-			page_range=page_range,
-			status='Running'
-		)
-
-		if not insert_result['success']:
-			print(f"⚠️ 数据库插入失败: {insert_result['error_msg']}")
-
-		# 5. 轮询 checkStatus 直到完成或出错
-		max_retries = 30  # 最多轮询 30 次
-		poll_interval = 5  # 每次间隔 5 秒
-
-		for _ in range(max_retries):
-			status_result = RecognitionServices.checkStatus(request_id)
-			status = status_result.get('status')
-
-			if status == 'success':
-				# 更新数据库状态为 completed
-				sql_service.update_task_status(request_id, 'Completed')
-
-				# 将 PDF 转换为 base64 格式
-				pdf_base64 = base64.b64encode(file_data).decode('utf-8')
-				pdf_data_url = f'data:application/pdf;base64,{pdf_base64}'
-
-				# 上传 PDF 和结果 JSON 到 Azure Blob Storage
-				# 从 request_id 中提取最后的随机字符串部分
-				request_id_suffix = request_id.rstrip('/').split('/')[-1]
-				upload_prefix = f"results_of_users/{request_id_suffix}"
-
-				blob_service = AzureBlobService()
-
-				# 上传 PDF 文件
-				pdf_file = BytesIO(file_data)
-				pdf_file.name = "result.pdf"
-				blob_service.uploadFile(upload_prefix, pdf_file)
-
-				# 上传结果 JSON 文件
-				result_data = status_result.get('result')
-				result_json_bytes = json.dumps(result_data, ensure_ascii=False, indent=2).encode('utf-8')
-				json_file = BytesIO(result_json_bytes)
-				json_file.name = "result.json"
-				blob_service.uploadFile(upload_prefix, json_file)
-
-				# 返回与以前相同的 JSON 格式
-				return JsonResponse({
-					'status': 'success',
-					'result': result_data,
-					'pdf': pdf_data_url
-				})
-
-			elif status == 'error':
-				# 更新数据库状态为 error
-				sql_service.update_task_status(request_id, 'error')
-				return _standard_api_response(False, error_msg=status_result.get('error_message', '识别出错'))
-
-			elif status == 'Running':
-				# 继续等待
-				time.sleep(poll_interval)
+	file = request.FILES.get('file')
+	page_range = request.POST.get('pageNum', '')
+	language = request.GET.get('language', '')
+	book_name = request.POST.get('bookName', file.name if file else 'unknown')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	if not file:
+		return _standard_api_response(False, error_msg='缺少文件参数')
+
+	try:
+		submit_result = ProcessingService.submitRecognition(file, page_range, language, user_id, book_name)
+		_close_submission_file(submit_result)
+		if not submit_result['success']:
+			return _standard_api_response(False, error_msg=submit_result['error_msg'])
+
+		if submit_result['completed']:
+			return _standard_api_response(True, data={
+				'requestId': submit_result['request_id'],
+				'status': 'Completed',
+			})
+
+		TaskEventHub.instance().publish(submit_result['request_id'], 'queued')
+		return _standard_api_response(True, data={
+			'requestId': submit_result['request_id'],
+			'status': 'Running',
+		})
+
+	except Exception as e:
+		print(f"❌ submitRecognition Error: {e}")
+		return _standard_api_response(False, error_msg=f'提交识别任务失败: {str(e)}')
+
+
+@csrf_exempt
+def submitRecognitionBatch(request):
+	"""
+	批量识别路由：一次提交多个 PDF，每个文件各自的页码范围按顺序对应
+	POST: file (多个), pageNum (与 file 一一对应，可省略), bookName (可选，与 file 一一对应)
+	返回:
+		{ "tasks": [{ "fileName": "...", "requestId": "...", "status": "Running|Completed|Failed", "error_msg": "" }, ...] }
+	每个任务的结果通过 getRecognitionStatus / recognitionEvents 查询
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
+
+	files = request.FILES.getlist('file')
+	page_ranges = request.POST.getlist('pageNum')
+	book_names = request.POST.getlist('bookName')
+	language = request.GET.get('language', '')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	if not files:
+		return _standard_api_response(False, error_msg='缺少文件参数')
+
+	if len(files) > BATCH_RECOGNITION_MAX_FILES:
+		return _standard_api_response(False, error_msg=f'单次最多提交 {BATCH_RECOGNITION_MAX_FILES} 个文件')
+
+	if page_ranges and len(page_ranges) != len(files):
+		return _standard_api_response(False, error_msg='pageNum 数量与文件数量不一致')
+
+	documents = [{
+		'file': file,
+		'page_range': page_ranges[index] if page_ranges else '',
+		'book_name': book_names[index] if index < len(book_names) else file.name,
+	} for index, file in enumerate(files)]
+
+	try:
+		submissions = ProcessingService.submitRecognitionBatch(documents, language, user_id)
+
+		tasks = []
+		for document, submission in zip(documents, submissions):
+			if not submission['success']:
+				status = 'Failed'
+			elif submission['completed']:
+				status = 'Completed'
 			else:
-				# 未知状态
-				sql_service.update_task_status(request_id, 'error')
-				return _standard_api_response(False, error_msg=f'未知状态: {status}')
+				status = 'Running'
+				TaskEventHub.instance().publish(submission['request_id'], 'queued')
+			tasks.append({
+				'fileName': document['file'].name,
+				'requestId': submission['request_id'],
+				'status': status,
+				'error_msg': submission['error_msg'],
+			})
 
-		# 超时
-		sql_service.update_task_status(request_id, 'timeout')
-		return _standard_api_response(False, error_msg='识别超时')
+		return _standard_api_response(True, data={'tasks': tasks})
 
 	except Exception as e:
-		print(f"❌ recognition Error: {e}")
-		return _standard_api_response(False, error_msg=f'识别过程中发生错误: {str(e)}')
+		print(f"❌ submitRecognitionBatch Error: {e}")
+		return _standard_api_response(False, error_msg=f'批量提交识别任务失败: {str(e)}')
+
+
+@csrf_exempt
+def createUpload(request):
+	"""
+	创建分块上传会话
+	POST: fileName (可选)
+	返回: { "uploadId": "...", "chunkSize": 分块大小（字节） }
+	之后按 uploadChunk 逐块上传，全部上传后调用 completeUpload 提交并开始识别
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
+
+	if not request.COOKIES.get('rfy_uuid', ''):
+		return _standard_api_response(False, error_msg='未找到用户 ID')
 
+	return _standard_api_response(True, data={
+		'uploadId': UploadService.newUploadId(),
+		'chunkSize': UPLOAD_CHUNK_SIZE,
+	})
+
+
+@csrf_exempt
+def uploadChunk(request):
+	"""
+	上传一个分块，请求体为分块的原始字节（Content-Type: application/octet-stream）
+	POST: ?uploadId=xxx&index=分块序号（从 0 开始）
+	同一序号可重复上传，后一次覆盖前一次
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	upload_id = request.GET.get('uploadId', '')
+	try:
+		index = int(request.GET.get('index', ''))
+	except ValueError:
+		return _standard_api_response(False, error_msg='缺少或无效的参数 index')
+
+	try:
+		# 直接读取原始请求体，最多多读 1 字节用于判断是否超出分块大小
+		data = request.read(UPLOAD_CHUNK_SIZE + 1)
+		stage_result = UploadService().stageChunk(user_id, upload_id, index, data)
+		if not stage_result['success']:
+			return _standard_api_response(False, error_msg=stage_result['error_msg'])
+		return _standard_api_response(True, data={'uploadId': upload_id, 'index': index})
+
+	except ValueError as e:
+		return _standard_api_response(False, error_msg=str(e))
+	except Exception as e:
+		print(f"❌ uploadChunk Error: {e}")
+		return _standard_api_response(False, error_msg=f'分块上传失败: {str(e)}')
+
+
+@csrf_exempt
+def getUploadStatus(request):
+	"""
+	查询分块上传进度，用于断点续传
+	GET: ?uploadId=xxx
+	返回: { "uploadId": "...", "chunkSize": ..., "receivedChunks": [0, 1, 3, ...] }
+	"""
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	upload_id = request.GET.get('uploadId', '')
+	try:
+		return _standard_api_response(True, data={
+			'uploadId': upload_id,
+			'chunkSize': UPLOAD_CHUNK_SIZE,
+			'receivedChunks': UploadService().receivedChunks(user_id, upload_id),
+		})
+
+	except ValueError as e:
+		return _standard_api_response(False, error_msg=str(e))
+	except Exception as e:
+		print(f"❌ getUploadStatus Error: {e}")
+		return _standard_api_response(False, error_msg=f'查询上传进度失败: {str(e)}')
+
+
+@csrf_exempt
+def completeUpload(request):
+	"""
+	提交分块上传并从已提交的 blob 开始识别
+	POST: uploadId, totalChunks, fileName (可选), pageNum (可选), bookName (可选)；?language=xx
+	返回:
+		与 submitRecognition 相同：{ "requestId": "...", "status": "Running|Completed" }
+		有分块缺失时 status 为 failed，data 为 { "missingChunks": [...] }
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	upload_id = request.POST.get('uploadId', '')
+	file_name = request.POST.get('fileName', '')
+	page_range = request.POST.get('pageNum', '')
+	language = request.GET.get('language', '')
+	book_name = request.POST.get('bookName', file_name or 'unknown')
+	try:
+		total_chunks = int(request.POST.get('totalChunks', ''))
+	except ValueError:
+		return _standard_api_response(False, error_msg='缺少或无效的参数 totalChunks')
+
+	try:
+		upload_service = UploadService()
+		commit_result = upload_service.commit(user_id, upload_id, total_chunks)
+		if not commit_result['success']:
+			return JsonResponse({
+				'status': 'failed',
+				'data': {'missingChunks': commit_result['missing']},
+				'error_msg': commit_result['error_msg'],
+			}, status=200)
+
+		file = upload_service.open(user_id, upload_id, file_name)
+		try:
+			submit_result = ProcessingService.submitRecognition(file, page_range, language, user_id, book_name)
+			_close_submission_file(submit_result)
+		finally:
+			file.close()
+		if not submit_result['success']:
+			return _standard_api_response(False, error_msg=submit_result['error_msg'])
+
+		# 裁剪后的 PDF 已保存到结果目录，原始上传文件不再需要
+		upload_service.discard(user_id, upload_id)
+
+		if submit_result['completed']:
+			return _standard_api_response(True, data={
+				'requestId': submit_result['request_id'],
+				'status': 'Completed',
+			})
+
+		TaskEventHub.instance().publish(submit_result['request_id'], 'queued')
+		return _standard_api_response(True, data={
+			'requestId': submit_result['request_id'],
+			'status': 'Running',
+		})
+
+	except ValueError as e:
+		return _standard_api_response(False, error_msg=str(e))
+	except Exception as e:
+		print(f"❌ completeUpload Error: {e}")
+		return _standard_api_response(False, error_msg=f'提交识别任务失败: {str(e)}')
+
+
+@csrf_exempt
+def getRecognitionStatus(request):
+	"""
+	查询识别任务状态
+	GET: ?requestId=/api/intelligentOcr/analyzeResults/abc123xyz
+	返回:
+		运行中: { "status": "running", "requestId": "..." }
+		已完成: { "status": "success", "result": <识别结果>, "pdfUrl": "/getResultPDF?requestId=..." }
+		        （sas 与 redirect 模式下 result 替换为 resultUrl，见 ProcessingService.loadResult）
+		出错:   { "status": "failed", "data": null, "error_msg": "..." }
+	"""
+	request_id = request.GET.get('requestId', '')
+	if not request_id:
+		return _standard_api_response(False, error_msg='缺少参数 requestId')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	try:
+		task_result = SqlService().get_task_by_request_id(request_id, user_id)
+		if not task_result['success']:
+			return _standard_api_response(False, error_msg=task_result['error_msg'])
+
+		task = task_result['data']
+		if not task or task.get('userId') != user_id:
+			return _standard_api_response(False, error_msg='任务不存在')
+
+		# 任务状态由后台轮询器（RecognitionPoller）负责更新，这里只读取数据库
+		status = task.get('status')
+		if status == 'Running':
+			return JsonResponse({'status': 'running', 'requestId': request_id})
+		if status != 'Completed':
+			return _standard_api_response(False, error_msg=f'识别任务状态: {status}')
+
+		return JsonResponse(ProcessingService.loadResult(request_id))
+
+	except FileNotFoundError as e:
+		return _standard_api_response(False, error_msg=f'文件不存在: {str(e)}')
+	except Exception as e:
+		return _standard_api_response(False, error_msg=f'获取识别状态失败: {str(e)}')
+
+
+
+def _task_status_event(request_id: str, status: str) -> dict:
+	"""将 Tasks 表中的状态转换为 SSE 进度事件"""
+	if status == 'Running':
+		return {'requestId': request_id, 'stage': 'running'}
+	if status == 'Completed':
+		return {'requestId': request_id, 'stage': 'completed'}
+	return {'requestId': request_id, 'stage': 'error', 'error_msg': f'识别任务状态: {status}'}
+
+
+def _format_sse(event: dict, seq: int = 0) -> str:
+	"""按 text/event-stream 格式序列化一条事件"""
+	lines = [f"id: {seq}"] if seq else []
+	lines.append(f"event: {event['stage']}")
+	lines.append(f"data: {json.dumps(event, ensure_ascii=False)}")
+	return '\n'.join(lines) + '\n\n'
+
+
+def _recognition_event_stream(request_id: str, status: str):
+	"""
+	识别进度事件流：优先等待本进程轮询器发布的事件，
+	空闲超时时回退读取数据库（任务可能由其他节点轮询），并发送心跳
+
+	每个响应最多保持 RECOGNITION_EVENTS_STREAM_SECONDS 秒后正常结束，避免同步 worker 在整个识别期间被占用；
+	EventSource 在 retry 毫秒后自动重连，重连时先发送任务的最新状态，因此不会漏掉事件
+	"""
+	events = TaskEventHub.instance()
+	latest = events.latest(request_id)
+	if latest:
+		seq, event = latest
+	else:
+		seq, event = 0, _task_status_event(request_id, status)
+	yield f"retry: {RECOGNITION_EVENTS_RETRY_MS}\n\n"
+	yield _format_sse(event, seq)
+	if event['stage'] in TaskEventHub.TERMINAL_STAGES:
+		return
+
+	deadline = time.time() + RECOGNITION_EVENTS_STREAM_SECONDS
+	while True:
+		remaining = deadline - time.time()
+		if remaining <= 0:
+			return
+		latest = events.wait(request_id, seq, min(RECOGNITION_EVENTS_KEEPALIVE_SECONDS, remaining))
+		if latest:
+			seq, event = latest
+			yield _format_sse(event, seq)
+			if event['stage'] in TaskEventHub.TERMINAL_STAGES:
+				return
+			continue
+
+		task = SqlService().get_task_by_request_id(request_id)['data'] or {}
+		if task.get('status') and task['status'] != 'Running':
+			yield _format_sse(_task_status_event(request_id, task['status']))
+			return
+		yield ': keep-alive\n\n'
+
+
+@csrf_exempt
+def recognitionEvents(request):
+	"""
+	识别进度推送（Server-Sent Events）
+	GET: ?requestId=/api/intelligentOcr/analyzeResults/abc123xyz
+	事件: queued / running / uploading / completed / error
+	收到 completed 后，客户端通过 getRecognitionStatus 获取识别结果；
+	未到终态时响应在 RECOGNITION_EVENTS_STREAM_SECONDS 秒后结束，客户端自动重连
+	"""
+	request_id = request.GET.get('requestId', '')
+	if not request_id:
+		return _standard_api_response(False, error_msg='缺少参数 requestId')
+
+	user_id = request.COOKIES.get('rfy_uuid', '')
+	if not user_id:
+		return _standard_api_response(False, error_msg='未找到用户 ID')
+
+	task_result = SqlService().get_task_by_request_id(request_id, user_id)
+	if not task_result['success']:
+		return _standard_api_response(False, error_msg=task_result['error_msg'])
+
+	task = task_result['data']
+	if not task or task.get('userId') != user_id:
+		return _standard_api_response(False, error_msg='任务不存在')
+
+	response = StreamingHttpResponse(
+		_recognition_event_stream(request_id, task.get('status')),
+		content_type='text/event-stream')
+	response['Cache-Control'] = 'no-cache'
+	# 禁止反向代理缓冲，保证事件即时送达
+	response['X-Accel-Buffering'] = 'no'
+	return response
 
 
 @csrf_exempt
@@ -151,8 +627,11 @@ def getStoragedData(request):
 		type: 文件类型（如 pdf, jpg, png）
 
 	返回:
-		如果是 PDF: JSON 格式的 PDF base64 数组
-		如果不是 PDF: 文件的二进制数据
+		如果是 PDF: JSON 格式的下载地址 {'type': 'pdf', 'url': '/getStoragedFile?prefix=...&type=pdf'}
+		            （sas 模式下为 SAS URL）
+		如果是 JSON: {'type': 'json', 'data': 解析后的 JSON 内容}
+		            （sas 与 redirect 模式下为 {'type': 'json', 'url': 下载地址}）
+		其他类型: 文件的二进制数据（sas 与 redirect 模式下 302 重定向到 SAS URL）
 	"""
 	try:
 		# 1. 解析请求参数
@@ -162,23 +641,30 @@ def getStoragedData(request):
 		if not file_type:
 			return JsonResponse({'error': '缺少参数: type'}, status=400)
 
-		# 2. 调用 AzureBlobService 下载文件
 		blob_service = AzureBlobService()
-		file_data = blob_service.downloadFile(prefix, file_type)
 
-		# 3. 根据文件类型返回数据
-		if file_type.lower() == 'pdf':
-			# PDF 文件：转换为 base64 返回
-			import base64
-			pdf_base64 = base64.b64encode(file_data).decode('utf-8')
-			return JsonResponse({
-				'type': 'pdf',
-				'data': f'data:application/pdf;base64,{pdf_base64}'
-			})
-		elif file_type.lower() == 'json':
+		# 2. PDF 文件：确认存在后返回二进制下载地址（getStoragedFile，支持 Range 请求）
+		#    sas 与 redirect 模式下 JSON 文件同样只返回下载地址，其他文件直接重定向
+		if file_type.lower() == 'pdf' or (BLOB_DOWNLOAD_MODE != 'proxy' and file_type.lower() == 'json'):
+			blob_name = blob_service.findBlobName(prefix, file_type, verify=True)
+			if BLOB_DOWNLOAD_MODE == 'sas':
+				url = blob_service.getReadUrl(blob_name)
+			else:
+				url = f"{reverse('getStoragedFile')}?{urlencode({'prefix': prefix, 'type': file_type})}"
+			return JsonResponse({'type': file_type.lower(), 'url': url})
+		if BLOB_DOWNLOAD_MODE != 'proxy':
+			return HttpResponseRedirect(blob_service.getReadUrl(blob_service.findBlobName(prefix, file_type, verify=True)))
+
+		# 3. 其他文件：下载后根据文件类型返回数据
+		# 磁盘缓存命中时 file_data 为只读 mmap
+		file_data = blob_service.downloadFile(prefix, file_type)
+		if file_type.lower() == 'json':
 			# JSON 文件：解析后返回
-			import json
-			json_data = json.loads(file_data.decode('utf-8'))
+			if isinstance(file_data, mmap.mmap):
+				with file_data:
+					json_data = json.loads(file_data[:].decode('utf-8'))
+			else:
+				json_data = json.loads(file_data.decode('utf-8'))
 			return JsonResponse({
 				'type': 'json',
 				'data': json_data
@@ -193,7 +679,11 @@ def getStoragedData(request):
 			}
 			content_type = content_type_map.get(file_type.lower(), 'application/octet-stream')
 			
-			response = HttpResponse(file_data, content_type=content_type)
+			if isinstance(file_data, mmap.mmap):
+				response = StreamingHttpResponse(_iter_mmap(file_data, 0, len(file_data) - 1), content_type=content_type)
+				response['Content-Length'] = str(len(file_data))
+			else:
+				response = HttpResponse(file_data, content_type=content_type)
 			response['Content-Disposition'] = f'attachment; filename="file.{file_type}"'
 			return response
 
@@ -203,6 +693,34 @@ def getStoragedData(request):
 		return JsonResponse({'error': f'获取文件失败: {str(e)}'}, status=500)
 
 
+@csrf_exempt
+def getStoragedFile(request):
+	"""
+	以二进制流返回 Azure Blob Storage 中的文件（支持 Range 请求）
+	GET: ?prefix=zbooksnap/1/&type=pdf
+	"""
+	prefix = request.GET.get('prefix', '')
+	file_type = request.GET.get('type', '')
+	if not file_type:
+		return JsonResponse({'error': '缺少参数: type'}, status=400)
+
+	try:
+		blob_service = AzureBlobService()
+		# 重定向模式下 SAS URL 直接交给浏览器，需先确认 blob 存在；代理模式读取属性时发现不存在再重新查找
+		blob_name = blob_service.findBlobName(prefix, file_type, verify=BLOB_DOWNLOAD_MODE != 'proxy')
+		content_type = 'application/pdf' if file_type.lower() == 'pdf' else None
+		try:
+			return _blob_file_response(request, blob_service, blob_name, content_type, os.path.basename(blob_name))
+		except FileNotFoundError:
+			# 名称索引已过期（blob 被删除或改名），列举前缀重新查找
+			blob_name = blob_service.refindBlobName(prefix, file_type)
+			return _blob_file_response(request, blob_service, blob_name, content_type, os.path.basename(blob_name))
+	except FileNotFoundError as e:
+		return JsonResponse({'error': str(e)}, status=404)
+	except Exception as e:
+		return JsonResponse({'error': f'获取文件失败: {str(e)}'}, status=500)
+
+
 @csrf_exempt
 def getBookMetadata(request):
 	blob_service=AzureBlobService()
@@ -239,6 +757,111 @@ def getImageFromAB2(request):
 		return _standard_api_response(False, error_msg=f'获取图片失败: {exc}')
 
 
+def _parse_if_none_match(header: str) -> str:
+	"""取 If-None-Match 中的第一个 ETag（浏览器只会回传一个），忽略弱校验前缀 W/"""
+	etag = (header or '').split(',')[0].strip()
+	return etag[2:] if etag.startswith('W/') else etag
+
+
+@csrf_exempt
+def getImage(request):
+	"""
+	返回页面图片的原始内容（供 <img> 与 fetch 直接使用，可被浏览器缓存）
+	GET: ?url=<图片 URL 或相对路径>
+
+	响应带强 ETag（blob 版本）与长时间的 Cache-Control；
+	If-None-Match 与当前版本相同时返回 304，热点图片由进程内 LRU 缓存提供
+	"""
+	image_url = request.GET.get('url', '')
+	if not image_url:
+		return JsonResponse({'error': '缺少参数: url'}, status=400)
+
+	try:
+		if_none_match = _parse_if_none_match(request.headers.get('If-None-Match', ''))
+		image = AzureBlobService2().downloadImage(image_url, if_none_match or None)
+	except FileNotFoundError as e:
+		return JsonResponse({'error': str(e)}, status=404)
+	except ValueError as e:
+		return JsonResponse({'error': str(e)}, status=400)
+	except Exception as e:
+		return JsonResponse({'error': f'获取图片失败: {str(e)}'}, status=500)
+
+	if image['data'] is None:
+		response = HttpResponse(status=304)
+	else:
+		response = HttpResponse(image['data'], content_type=image['mime_type'])
+	response['ETag'] = image['etag']
+	response['Cache-Control'] = f'public, max-age={IMAGE_HTTP_MAX_AGE_SECONDS}'
+	return response
+
+
+def _image_batch_stream(blob_service, image_urls):
+	"""按下载完成顺序逐行生成 NDJSON，每行对应一张图片"""
+	for image_url, image, error in blob_service.downloadImages(image_urls):
+		if error is not None:
+			line = {'imageUrl': image_url, 'status': 'failed', 'error_msg': str(error)}
+		else:
+			base64_str = base64.b64encode(image['data']).decode('ascii')
+			line = {'imageUrl': image_url, 'status': 'success', 'etag': image['etag'],
+			        'data': f"data:{image['mime_type']};base64,{base64_str}"}
+		yield json.dumps(line) + '\n'
+
+
+@csrf_exempt
+def getImagesBatch(request):
+	"""
+	批量获取页面图片（打开章节时一次请求预取全部图片）
+	POST: { "imageUrls": ["https://...", ...] }
+	返回: application/x-ndjson，每张图片下载完成后立即输出一行:
+		{"imageUrl": "...", "status": "success", "etag": "...", "data": "data:image/png;base64,..."}
+		{"imageUrl": "...", "status": "failed", "error_msg": "..."}
+	"""
+	if request.method != 'POST':
+		return _standard_api_response(False, error_msg='仅支持 POST 请求')
+
+	try:
+		payload = json.loads(request.body.decode('utf-8') or '{}')
+		image_urls = payload.get('imageUrls') or []
+	except json.JSONDecodeError as exc:
+		return _standard_api_response(False, error_msg=f'请求体不是有效的 JSON: {exc}')
+
+	if not isinstance(image_urls, list) or not image_urls or not all(isinstance(url, str) and url for url in image_urls):
+		return _standard_api_response(False, error_msg='参数 imageUrls 必须是非空的 URL 列表')
+	if len(image_urls) > IMAGE_BATCH_MAX_URLS:
+		return _standard_api_response(False, error_msg=f'一次最多请求 {IMAGE_BATCH_MAX_URLS} 张图片')
+
+	try:
+		blob_service = AzureBlobService2()
+	except Exception as exc:
+		return _standard_api_response(False, error_msg=f'获取图片失败: {exc}')
+
+	response = StreamingHttpResponse(_image_batch_stream(blob_service, image_urls), content_type='application/x-ndjson')
+	response['X-Accel-Buffering'] = 'no'
+	return response
+
+
+@csrf_exempt
+def getBlobMetrics(request):
+	"""
+	Blob 读取的监控指标：各存储账户的对冲读取、请求合并、图片缓存、磁盘缓存与名称索引统计
+	GET: 返回 { "hedging": {...}, "single_flight": {...}, "image_cache": {...}, "disk_cache": {...}, "name_index": {...} }
+	仅限已登录用户（rfy_uuid cookie）或 DEBUG 模式访问
+	"""
+	if not settings.DEBUG and not request.COOKIES.get('rfy_uuid', ''):
+		return JsonResponse({'error': '未找到用户 ID'}, status=403)
+
+	return JsonResponse({
+		'hedging': HedgedReader.allStats(),
+		'single_flight': {
+			'AzureBlobService': AzureBlobService._single_flight.stats(),
+			'AzureBlobService2': AzureBlobService2._single_flight.stats(),
+		},
+		'image_cache': AzureBlobService2._image_cache.stats(),
+		'disk_cache': AzureBlobService._disk_cache.stats(),
+		'name_index': AzureBlobService._name_index.stats(),
+	})
+
+
 @csrf_exempt
 def getPageData(request):
 	"""POST: 接收 info 对象，从 AzureBlobService 下载对应文件"""
@@ -289,7 +912,8 @@ def getResultOfUser(request):
 	"""
 	根据 request_id 获取用户的识别结果
 	POST: { "request_id": "/api/intelligentOcr/analyzeResults/abc123xyz" }
-	返回: { "json": <识别结果>, "pdf": "data:application/pdf;base64,..." }
+	返回: { "status": "success", "result": <识别结果>, "pdfUrl": "/getResultPDF?requestId=..." }
+	      （sas 与 redirect 模式下 result 替换为结果 JSON 的下载地址 resultUrl，见 ProcessingService.loadResult）
 	"""
 	if request.method != 'POST':
 		return _standard_api_response(False, error_msg='仅支持 POST 请求')
@@ -303,30 +927,49 @@ def getResultOfUser(request):
 	if not request_id:
 		return _standard_api_response(False, error_msg='缺少参数 request_id')
 
-	# 从 request_id 中提取最后的随机字符串部分
-	request_id_suffix = request_id.rstrip('/').split('/')[-1]
-	prefix = f"results_of_users/{request_id_suffix}"
-
 	try:
-		blob_service = AzureBlobService()
+		# 返回与 recognition 相同的 JSON 格式
+		return JsonResponse(ProcessingService.loadResult(request_id))
 
-		# 下载 PDF 文件
-		pdf_data = blob_service.downloadFile(prefix, 'pdf')
-		pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
-		pdf_data_url = f'data:application/pdf;base64,{pdf_base64}'
+	except FileNotFoundError as e:
+		return _standard_api_response(False, error_msg=f'文件不存在: {str(e)}')
+	except Exception as e:
+		return _standard_api_response(False, error_msg=f'获取结果失败: {str(e)}')
 
-		# 下载 JSON 文件
-		json_data = blob_service.downloadFile(prefix, 'json')
-		result_json = json.loads(json_data.decode('utf-8'))
 
-		# 返回与 recognition 相同的 JSON 格式
-		return JsonResponse({
-			'status': 'success',
-			'result': result_json,
-			'pdf': pdf_data_url
-		})
+@csrf_exempt
+def getResultPDF(request):
+	"""
+	以二进制流返回识别结果的 PDF（支持 Range 请求）
+	GET: ?requestId=/api/intelligentOcr/analyzeResults/abc123xyz
+	"""
+	request_id = request.GET.get('requestId', '')
+	if not request_id:
+		return JsonResponse({'error': '缺少参数: requestId'}, status=400)
 
+	try:
+		return _blob_file_response(
+			request, AzureBlobService(), ProcessingService.getResultPdfBlobName(request_id), 'application/pdf', 'result.pdf')
 	except FileNotFoundError as e:
-		return _standard_api_response(False, error_msg=f'文件不存在: {str(e)}')
+		return JsonResponse({'error': str(e)}, status=404)
+	except Exception as e:
+		return JsonResponse({'error': f'获取 PDF 失败: {str(e)}'}, status=500)
+
+
+@csrf_exempt
+def getResultJSON(request):
+	"""
+	以二进制流返回识别结果的 JSON 文件（redirect 模式下重定向到 SAS URL）
+	GET: ?requestId=/api/intelligentOcr/analyzeResults/abc123xyz
+	"""
+	request_id = request.GET.get('requestId', '')
+	if not request_id:
+		return JsonResponse({'error': '缺少参数: requestId'}, status=400)
+
+	try:
+		return _blob_file_response(
+			request, AzureBlobService(), ProcessingService.getResultJsonBlobName(request_id), 'application/json')
+	except FileNotFoundError as e:
+		return JsonResponse({'error': str(e)}, status=404)
 	except Exception as e:
-		return _standard_api_response(False, error_msg=f'获取结果失败: {str(e)}')
\ No newline at end of file
+		return JsonResponse({'error': f'获取识别结果失败: {str(e)}'}, status=500)
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "read_for_you.settings")
 
 application = get_wsgi_application()
+
+# 启动进程内的识别任务轮询器（可通过 RECOGNITION_POLLER_IN_PROCESS=false 关闭，
+# 改为运行 scripts/run_recognition_poller.py）
+from read_for_you.Services.PollingService import RecognitionPoller
+
+RecognitionPoller.ensureStarted()
@@ -0,0 +1,170 @@
+"""
+PDF 引擎基准测试脚本
+
+对同一批 PDF 与页码范围，分别用各个 PDF 引擎执行页面提取，报告耗时、峰值内存与输出大小，
+用于选择 PDF_ENGINE 设置。直接调用引擎的 extractPages / write：PDFService.extractPDF
+在请求整本或覆盖全部页面时直接复制原文件，经它测量时整本（空字符串）等范围测不到引擎本身。
+
+每次测量在新的子进程中进行，峰值内存为子进程的最大常驻内存（包含 C 扩展的分配）
+减去导入引擎后的基线；耗时取多次运行的中位数。
+
+用法:
+    python scripts/benchmark_pdf_engines.py 语料目录或PDF文件... [--ranges 1 1-10 1-3,5,7-9]
+        [--engines pypdf2 pymupdf pikepdf] [--repeat 3] [--json 结果文件]
+"""
+
+import sys
+import os
+import argparse
+import json
+import multiprocessing
+import resource
+import statistics
+import time
+from tempfile import TemporaryFile
+from typing import Dict, List
+
+# 将 backend 目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_for_you.Services.PDFEngine import PDF_ENGINES
+
+
+DEFAULT_RANGES = ['1', '1-10', '1-3,5,7-9', '1-100', '']
+
+
+def collect_corpus(paths: List[str]) -> List[str]:
+    """展开目录，返回全部 PDF 文件路径"""
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                corpus.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith('.pdf'))
+        elif os.path.isfile(path):
+            corpus.append(path)
+    return corpus
+
+
+def _measure(conn, engine: str, pdf_path: str, page_range: str):
+    """子进程入口：执行一次提取，返回耗时、峰值内存增量与输出大小"""
+    try:
+        from read_for_you.Services.PDFService import PDFService
+
+        pdf_engine = PDF_ENGINES[engine]()
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(pdf_path, 'rb') as source, TemporaryFile() as output:
+            started = time.perf_counter()
+            document = pdf_engine.open(source)
+            try:
+                page_ranges = PDFService._parse_page_range(page_range, pdf_engine.pageCount(document))
+                extracted = pdf_engine.extractPages(document, page_ranges)
+                try:
+                    pdf_engine.write(extracted, output)
+                finally:
+                    pdf_engine.close(extracted)
+            finally:
+                pdf_engine.close(document)
+            elapsed = time.perf_counter() - started
+            output.seek(0, 2)
+            output_bytes = output.tell()
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb
+        conn.send({'seconds': elapsed, 'peak_mb': peak_kb / 1024, 'output_bytes': output_bytes})
+    except Exception as e:
+        conn.send({'error': str(e)})
+    finally:
+        conn.close()
+
+
+def measure(context, engine: str, pdf_path: str, page_range: str, repeat: int) -> Dict:
+    """在子进程中重复测量，耗时取中位数，峰值内存取最大值"""
+    runs = []
+    for _ in range(repeat):
+        parent_conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=_measure, args=(child_conn, engine, pdf_path, page_range))
+        process.start()
+        child_conn.close()
+        try:
+            run = parent_conn.recv()
+        except EOFError:
+            run = {'error': f'子进程异常退出（exitcode={process.exitcode}）'}
+        process.join()
+        if 'error' in run:
+            return run
+        runs.append(run)
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_mb': max(run['peak_mb'] for run in runs),
+        'output_bytes': runs[-1]['output_bytes'],
+    }
+
+
+def print_results(results: List[Dict]):
+    """按文件与页码范围分组打印结果表"""
+    print(f"\n{'='*96}")
+    print(f"{'文件':<32} {'页码范围':<14} {'引擎':<10} {'耗时(秒)':>10} {'峰值内存(MB)':>14} {'输出(字节)':>12}")
+    print(f"{'-'*96}")
+    for row in results:
+        name = os.path.basename(row['file'])[:32]
+        page_range = row['range'] or '(整本)'
+        if 'error' in row:
+            print(f"{name:<32} {page_range:<14} {row['engine']:<10} ❌ {row['error']}")
+        else:
+            print(f"{name:<32} {page_range:<14} {row['engine']:<10} "
+                  f"{row['seconds']:>10.3f} {row['peak_mb']:>14.1f} {row['output_bytes']:>12}")
+    print(f"{'='*96}\n")
+
+    # 按引擎汇总
+    for engine in dict.fromkeys(row['engine'] for row in results):
+        rows = [row for row in results if row['engine'] == engine and 'error' not in row]
+        failed = sum(1 for row in results if row['engine'] == engine and 'error' in row)
+        if rows:
+            print(f"📊 {engine}: 总耗时 {sum(row['seconds'] for row in rows):.3f} 秒，"
+                  f"最大峰值内存 {max(row['peak_mb'] for row in rows):.1f} MB，"
+                  f"输出合计 {sum(row['output_bytes'] for row in rows)} 字节，失败 {failed} 次")
+        else:
+            print(f"📊 {engine}: 全部 {failed} 次失败")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比各 PDF 引擎的页面提取性能')
+    parser.add_argument('paths', nargs='+', help='PDF 文件或包含 PDF 的目录')
+    parser.add_argument('--ranges', nargs='+', default=DEFAULT_RANGES,
+                        help='页码范围列表，空字符串表示整本（默认: %(default)s）')
+    parser.add_argument('--engines', nargs='+', default=list(PDF_ENGINES), choices=list(PDF_ENGINES))
+    parser.add_argument('--repeat', type=int, default=3, help='每个组合重复次数（默认: 3）')
+    parser.add_argument('--json', help='将结果另存为 JSON 文件')
+    args = parser.parse_args()
+
+    corpus = collect_corpus(args.paths)
+    if not corpus:
+        print("❌ 没有找到 PDF 文件")
+        sys.exit(1)
+
+    engines = []
+    for engine in args.engines:
+        if PDF_ENGINES[engine].available():
+            engines.append(engine)
+        else:
+            print(f"⚠️ 跳过 {engine}：依赖未安装")
+
+    print(f"🔍 {len(corpus)} 个文件 × {len(args.ranges)} 个页码范围 × {len(engines)} 个引擎，每组重复 {args.repeat} 次")
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for pdf_path in corpus:
+        for page_range in args.ranges:
+            for engine in engines:
+                row = {'file': pdf_path, 'range': page_range, 'engine': engine}
+                row.update(measure(context, engine, pdf_path, page_range, args.repeat))
+                results.append(row)
+
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已保存到 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+-- 为 Tasks 表添加轮询租约字段（多节点轮询 Running 任务时使用）
+-- 轮询器使用 SELECT ... FOR UPDATE SKIP LOCKED 认领任务，需要 MySQL 8.0 及以上版本
+ALTER TABLE `Tasks`
+  ADD COLUMN `leaseOwner` varchar(128) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  ADD COLUMN `leaseExpiry` datetime DEFAULT NULL,
+  ADD KEY `idx_tasks_status_lease` (`status`,`leaseExpiry`),
+  ADD KEY `idx_tasks_lease_owner` (`leaseOwner`);
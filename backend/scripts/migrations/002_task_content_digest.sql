@@ -0,0 +1,4 @@
+-- 为 Tasks 表添加识别内容摘要字段（相同 PDF 内容 + 页码范围 + 语言复用识别结果）
+ALTER TABLE `Tasks`
+  ADD COLUMN `contentDigest` char(64) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  ADD KEY `idx_tasks_content_digest` (`contentDigest`,`status`);
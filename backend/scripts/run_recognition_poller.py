@@ -0,0 +1,25 @@
+"""
+独立运行识别任务轮询器的脚本
+
+当 Web 进程设置 RECOGNITION_POLLER_IN_PROCESS=false 时，
+使用此脚本在单独的进程中统一轮询 Tasks 表中所有 Running 的识别任务
+"""
+
+import sys
+import os
+
+# 将 backend 目录添加到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_for_you.Services.PollingService import RecognitionPoller
+
+
+if __name__ == "__main__":
+    print("🔍 开始轮询识别任务...")
+
+    poller = RecognitionPoller.instance()
+    try:
+        poller.run_forever()
+    except KeyboardInterrupt:
+        poller.stop()
+        print("\n✅ 轮询器已停止")
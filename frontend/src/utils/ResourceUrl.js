@@ -0,0 +1,37 @@
+/**
+ * 后端返回的资源下载地址
+ * 相对地址指向后端接口（需要携带 Cookie）；绝对地址为 Blob Storage 的短期 SAS URL（不携带凭据）
+ */
+
+const backendUrl = import.meta.env.VITE_BACKEND_URL;
+
+/**
+ * 解析资源地址
+ * @param {string} url - 后端返回的 pdfUrl / resultUrl / url
+ * @returns {{ url: string, withCredentials: boolean }}
+ */
+export function resolveResourceUrl(url) {
+	const external = /^https?:\/\//i.test(url);
+	return {
+		url: external ? url : `${backendUrl}${url}`,
+		withCredentials: !external
+	};
+}
+
+/**
+ * 下载 JSON 资源
+ * @param {string} url - 后端返回的资源地址
+ * @param {AbortSignal} [signal] - 取消信号
+ * @returns {Promise<any>} 解析后的 JSON
+ */
+export async function fetchResourceJson(url, signal) {
+	const resource = resolveResourceUrl(url);
+	const response = await fetch(resource.url, {
+		signal,
+		credentials: resource.withCredentials ? 'include' : 'omit'
+	});
+	if (!response.ok) {
+		throw new Error(`HTTP error! status: ${response.status}`);
+	}
+	return response.json();
+}
@@ -21,6 +21,8 @@ export const translations = {
     startRecognition: 'Start Recognition',
     cancel: 'Cancel',
     recognizing: 'Recognizing Document...',
+    recognitionQueued: 'Waiting for recognition to start...',
+    recognitionUploading: 'Saving recognition result...',
     translating: 'Translating Document...',
     loading: 'Loading Book...',
     loadingDescription: 'Please wait while we process your document',
@@ -118,6 +120,8 @@ export const translations = {
     startRecognition: '开始识别',
     cancel: '取消',
     recognizing: '正在识别文档...',
+    recognitionQueued: '正在等待识别开始...',
+    recognitionUploading: '正在保存识别结果...',
     translating: '正在翻译文档...',
     loading: '正在加载书籍...',
     loadingDescription: '请稍候，我们正在处理您的文档',
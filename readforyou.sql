@@ -33,7 +33,13 @@ CREATE TABLE `tasks` (
   `bookName` varchar(255) COLLATE utf8mb4_general_ci NOT NULL,
   `pageRange` varchar(100) COLLATE utf8mb4_general_ci NOT NULL,
   `status` varchar(50) COLLATE utf8mb4_general_ci NOT NULL,
-  PRIMARY KEY (`id`)
+  `leaseOwner` varchar(128) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  `leaseExpiry` datetime DEFAULT NULL,
+  `contentDigest` char(64) COLLATE utf8mb4_general_ci DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_tasks_content_digest` (`contentDigest`,`status`),
+  KEY `idx_tasks_status_lease` (`status`,`leaseExpiry`),
+  KEY `idx_tasks_lease_owner` (`leaseOwner`)
 ) ENGINE=InnoDB AUTO_INCREMENT=14 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -43,7 +49,7 @@ CREATE TABLE `tasks` (
 
 LOCK TABLES `tasks` WRITE;
 /*!40000 ALTER TABLE `tasks` DISABLE KEYS */;
-INSERT INTO `tasks` VALUES (9,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/dad2eef1-776e-4fdb-99aa-645f824627e6','2025-12-08 13:43:30','REL1 U1.pdf','1-1','Completed'),(10,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/2729b5b8-4b4f-450f-870d-ea87961de95e','2025-12-08 13:54:15','sample1.pdf','1-1','Completed'),(11,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/fe6ade6c-ce87-4cf8-ae77-e884ba54361e','2025-12-08 13:59:58','sample1.pdf','1-1','Completed'),(12,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/37cb864d-b17c-4fd1-9a95-32e354b418d7','2025-12-08 15:41:27','sample1.pdf','1-1','Completed'),(13,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/ba6bbb6a-6e39-4122-91d3-da6fc86cde84','2025-12-08 16:10:58','REL1 U1.pdf','1-10','Completed');
+INSERT INTO `tasks` VALUES (9,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/dad2eef1-776e-4fdb-99aa-645f824627e6','2025-12-08 13:43:30','REL1 U1.pdf','1-1','Completed',NULL,NULL,NULL),(10,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/2729b5b8-4b4f-450f-870d-ea87961de95e','2025-12-08 13:54:15','sample1.pdf','1-1','Completed',NULL,NULL,NULL),(11,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/fe6ade6c-ce87-4cf8-ae77-e884ba54361e','2025-12-08 13:59:58','sample1.pdf','1-1','Completed',NULL,NULL,NULL),(12,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/37cb864d-b17c-4fd1-9a95-32e354b418d7','2025-12-08 15:41:27','sample1.pdf','1-1','Completed',NULL,NULL,NULL),(13,'5f3fede4-38ae-4399-bd7b-7de32dc5522a','/api/analyzeResults/ba6bbb6a-6e39-4122-91d3-da6fc86cde84','2025-12-08 16:10:58','REL1 U1.pdf','1-10','Completed',NULL,NULL,NULL);
 /*!40000 ALTER TABLE `tasks` ENABLE KEYS */;
 UNLOCK TABLES;
 SET @@SESSION.SQL_LOG_BIN = @MYSQLDUMP_TEMP_LOG_BIN;